@@ -1,27 +1,130 @@
+from django.apps import apps
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
 from django.contrib.contenttypes.models import ContentType
+from django.core.paginator import Paginator
 
 from .constants import ALLOWED_CONTENT_MODELS, APP_LABEL_CORE
+from .counters import VIEWS_ANNOTATION, with_shard_totals
 from .models import Audio, Page, PageContent, Video
+from .pagination import EstimatedCountPaginator
+
+
+class PerformanceAdminMixin:
+    """Changelists that stay fast on tables with millions of rows.
+
+    With `ADMIN_PERFORMANCE_MODE` the result count is an estimate (see
+    `EstimatedCountPaginator`), the second unfiltered `COUNT(*)` and the
+    facet counts are skipped.
+    """
+
+    def get_paginator(self, request, queryset, per_page, *args, **kwargs):
+        paginator = (
+            EstimatedCountPaginator if settings.ADMIN_PERFORMANCE_MODE else Paginator
+        )
+        return paginator(queryset, per_page, *args, **kwargs)
+
+    @property
+    def show_full_result_count(self) -> bool:
+        return not settings.ADMIN_PERFORMANCE_MODE
+
+    @property
+    def show_facets(self) -> admin.ShowFacets:
+        if settings.ADMIN_PERFORMANCE_MODE:
+            return admin.ShowFacets.NEVER
+        return admin.ShowFacets.ALLOW
+
+
+class ShardedCounterAdminMixin:
+    """Show and sort by `counter` plus the object's counter shards.
+
+    The shard sums come from a subquery of the changelist query, so the query
+    count stays constant.
+    """
+
+    def get_queryset(self, request):
+        return with_shard_totals(super().get_queryset(request))
+
+    @admin.display(description="counter", ordering=VIEWS_ANNOTATION)
+    def views(self, obj) -> int:
+        return getattr(obj, VIEWS_ANNOTATION)
+
+
+class ContentTypeChoicesMixin:
+    """Limit `content_type` to the content models, without a query per form.
+
+    Choices come from the `ContentType` cache instead of a `<select>` query for
+    every inline row.
+    """
+
+    def formfield_for_foreignkey(self, db_field, request=None, **kwargs):
+        if db_field.name != "content_type":
+            return super().formfield_for_foreignkey(db_field, request, **kwargs)
+        content_types = ContentType.objects.get_for_models(
+            *(apps.get_model(APP_LABEL_CORE, name) for name in ALLOWED_CONTENT_MODELS)
+        ).values()
+        kwargs["queryset"] = ContentType.objects.filter(
+            pk__in=[ct.pk for ct in content_types]
+        )
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        empty = [] if field.empty_label is None else [("", field.empty_label)]
+        field.choices = empty + [(ct.pk, str(ct)) for ct in content_types]
+        return field
+
+
+class PageIdFilter(admin.SimpleListFilter):
+    """Filter by a page id typed in, instead of listing every page as a link."""
+
+    title = "page id"
+    parameter_name = "page_id"
+    template = "admin/core/input_filter.html"
+
+    def lookups(self, request, model_admin):
+        return ()
+
+    def has_output(self) -> bool:
+        return True
+
+    def choices(self, changelist):
+        yield {
+            "params": [
+                (key, value)
+                for key, value in changelist.params.items()
+                if key != self.parameter_name
+            ],
+            "value": self.value() or "",
+            "clear_query_string": changelist.get_query_string(
+                remove=[self.parameter_name]
+            ),
+        }
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        if not value.isdigit():
+            raise IncorrectLookupParameters(f"Invalid page id: {value!r}")
+        return queryset.filter(page_id=int(value))
 
 
 @admin.register(Video)
-class VideoAdmin(admin.ModelAdmin):
+class VideoAdmin(ShardedCounterAdminMixin, PerformanceAdminMixin, admin.ModelAdmin):
     """Admin configuration for Video model with search by title."""
 
-    list_display = ("id", "title", "counter")
-    search_fields = ("title__istartswith",)
+    list_display = ("id", "title", "views")
+    search_fields = ("title__iprefix",)
 
 
 @admin.register(Audio)
-class AudioAdmin(admin.ModelAdmin):
+class AudioAdmin(ShardedCounterAdminMixin, PerformanceAdminMixin, admin.ModelAdmin):
     """Admin configuration for Audio model with search by title."""
 
-    list_display = ("id", "title", "counter")
-    search_fields = ("title__istartswith",)
+    list_display = ("id", "title", "views")
+    search_fields = ("title__iprefix",)
 
 
-class PageContentInline(admin.TabularInline):
+class PageContentInline(ContentTypeChoicesMixin, admin.TabularInline):
     """Inline block to manage attached content directly on the Page admin page."""
 
     model = PageContent
@@ -29,28 +132,25 @@ class PageContentInline(admin.TabularInline):
     fields = ("content_type", "object_id", "position")
     ordering = ("position",)
 
-    def formfield_for_foreignkey(self, db_field, request=None, **kwargs):
-        if db_field.name == "content_type":
-            kwargs["queryset"] = ContentType.objects.filter(
-                app_label=APP_LABEL_CORE, model__in=ALLOWED_CONTENT_MODELS
-            )
-        return super().formfield_for_foreignkey(db_field, request, **kwargs)
-
 
 @admin.register(Page)
-class PageAdmin(admin.ModelAdmin):
+class PageAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     """Admin configuration for Page model with search by title and inline content."""
 
     list_display = ("id", "title")
-    search_fields = ("title__istartswith",)
+    search_fields = ("title__iprefix",)
     inlines = [PageContentInline]
 
 
 @admin.register(PageContent)
-class PageContentAdmin(admin.ModelAdmin):
-    """Fast control list."""
+class PageContentAdmin(
+    PerformanceAdminMixin, ContentTypeChoicesMixin, admin.ModelAdmin
+):
+    """Fast control list: no per-page filter links, page picked by autocomplete."""
 
     list_display = ("id", "page", "content_type", "object_id", "position")
-    list_filter = ("page", "content_type")
-    search_fields = ("page__title__istartswith",)
+    list_filter = (PageIdFilter, "content_type")
+    list_select_related = ("page", "content_type")
+    autocomplete_fields = ("page",)
+    search_fields = ("page__title__iprefix",)
     ordering = ("page", "position", "id")
@@ -0,0 +1,225 @@
+"""Time-bucketed view analytics.
+
+Every counter write (`core.tasks.apply_counter_deltas`, whatever the counter
+mode) also appends one `ViewBucket` row per object for the current minute;
+page views are recorded under the page's own content type. `rollup_views`
+(periodic task and command) adds complete minutes into hourly and daily
+`ViewRollup` rows, deletes the raw rows it consumed and drops rollups past
+their retention. With `TRENDING_ENABLED` the same raw rows feed the trending
+scores (see `core.trending`), so the counter write path does not touch them.
+
+Time series are read from the rollups only: one range scan of the unique
+index, at most `points` rows, so the cost does not depend on traffic. Views
+of the minutes not rolled up yet are not visible (lag up to
+`ANALYTICS_ROLLUP_INTERVAL` plus one minute).
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Dict, List, Tuple, Type
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection, models, transaction
+from django.db.models import Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from .constants import ANALYTICS_DAY, ANALYTICS_HOUR
+from .models import Audio, Page, Video, ViewBucket, ViewRollup
+from .trending import add_views
+
+Pair = Tuple[int, int]
+
+# Objects whose views are recorded, by their URL segment in the analytics API
+TRACKED_KINDS: Dict[str, Type[models.Model]] = {
+    "videos": Video,
+    "audios": Audio,
+    "pages": Page,
+}
+TRACKED_MODELS: Tuple[Type[models.Model], ...] = tuple(TRACKED_KINDS.values())
+
+ROLLUP_LOCK_KEY: str = "analytics:rollup:lock"
+# Upper bound for one rollup run; the lock expires if the job dies mid-way
+ROLLUP_LOCK_TIMEOUT: int = 300
+# Raw rows folded per transaction
+ROLLUP_BATCH: int = 5000
+
+GRANULARITY_STEPS: Dict[str, timedelta] = {
+    ANALYTICS_HOUR: timedelta(hours=1),
+    ANALYTICS_DAY: timedelta(days=1),
+}
+
+
+def tracked_ct_ids() -> Dict[int, Type[models.Model]]:
+    return {
+        ContentType.objects.get_for_model(model).id: model for model in TRACKED_MODELS
+    }
+
+
+def truncate(moment: datetime, granularity: str) -> datetime:
+    """Start (UTC) of the hour or day containing `moment`."""
+    moment = moment.astimezone(dt_timezone.utc).replace(
+        minute=0, second=0, microsecond=0
+    )
+    return moment.replace(hour=0) if granularity == ANALYTICS_DAY else moment
+
+
+def retention(granularity: str) -> timedelta:
+    if granularity == ANALYTICS_DAY:
+        return timedelta(days=settings.ANALYTICS_DAILY_RETENTION_DAYS)
+    return timedelta(days=settings.ANALYTICS_HOURLY_RETENTION_DAYS)
+
+
+def max_points(granularity: str) -> int:
+    """Series length the retention of `granularity` can fill."""
+    return retention(granularity) // GRANULARITY_STEPS[granularity]
+
+
+def with_page_view(pairs: List[Pair], page_id: int) -> List[Pair]:
+    """Counter pairs of a page view plus the page's own pair when analytics are on."""
+    if not settings.ANALYTICS_ENABLED:
+        return pairs
+    return [*pairs, (ContentType.objects.get_for_model(Page).id, page_id)]
+
+
+def record_views(deltas: Dict[Pair, int]) -> None:
+    """Append the views of this minute; pairs of untracked models are ignored."""
+    tracked = tracked_ct_ids()
+    bucket = timezone.now().replace(second=0, microsecond=0)
+    ViewBucket.objects.bulk_create(
+        [
+            ViewBucket(
+                content_type_id=ct_id,
+                object_id=obj_id,
+                bucket_start=bucket,
+                count=delta,
+            )
+            for (ct_id, obj_id), delta in deltas.items()
+            if ct_id in tracked and delta > 0
+        ]
+    )
+
+
+def _add_to_rollups(rows: Dict[Tuple[int, int, str, datetime], int]) -> None:
+    """`count = count + N` upserts of rollup rows (`executemany`).
+
+    `INSERT ... ON CONFLICT DO UPDATE` with an increment is not expressible with
+    `bulk_create`; the syntax is shared by PostgreSQL and SQLite.
+    """
+    if not rows:
+        return
+    table = connection.ops.quote_name(ViewRollup._meta.db_table)
+    sql = (
+        f"INSERT INTO {table} "
+        "(content_type_id, object_id, granularity, bucket_start, count) "
+        "VALUES (%s, %s, %s, %s, %s) "
+        "ON CONFLICT (content_type_id, object_id, granularity, bucket_start) "
+        f"DO UPDATE SET count = {table}.count + EXCLUDED.count"
+    )
+    params = [
+        (
+            ct_id,
+            obj_id,
+            granularity,
+            connection.ops.adapt_datetimefield_value(bucket),
+            count,
+        )
+        for (ct_id, obj_id, granularity, bucket), count in rows.items()
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def _add_trending_views(ids: List[int]) -> None:
+    """Add raw rows to the trending scores, each minute at its own time."""
+    minutes: Dict[datetime, Counter] = {}
+    for ct_id, obj_id, start, count in ViewBucket.objects.filter(
+        id__in=ids
+    ).values_list("content_type_id", "object_id", "bucket_start", "count"):
+        minutes.setdefault(start, Counter())[(ct_id, obj_id)] += count
+    for start, deltas in minutes.items():
+        add_views(deltas, at=start)
+
+
+def _fold(ids: List[int]) -> None:
+    if settings.TRENDING_ENABLED:
+        _add_trending_views(ids)
+    hourly = (
+        ViewBucket.objects.filter(id__in=ids)
+        .annotate(hour=TruncHour("bucket_start", tzinfo=dt_timezone.utc))
+        .values_list("content_type_id", "object_id", "hour")
+        .annotate(total=Sum("count"))
+        .order_by()
+    )
+    rows: Counter = Counter()
+    for ct_id, obj_id, hour, total in hourly:
+        rows[(ct_id, obj_id, ANALYTICS_HOUR, hour)] += total
+        rows[(ct_id, obj_id, ANALYTICS_DAY, truncate(hour, ANALYTICS_DAY))] += total
+    _add_to_rollups(rows)
+    ViewBucket.objects.filter(id__in=ids).delete()
+
+
+def rollup_views(batch_size: int = ROLLUP_BATCH) -> int | None:
+    """Fold complete minutes into rollups and apply retention.
+
+    Returns the number of raw rows folded, or None if another rollup of this
+    cache is running. The cache lock only saves duplicate work: raw rows are
+    claimed with `SELECT ... FOR UPDATE SKIP LOCKED`, so rollups in processes
+    that do not share the cache never fold a row twice. The current and the
+    previous minute are left alone: writers may still be committing them.
+    """
+    if not cache.add(ROLLUP_LOCK_KEY, 1, timeout=ROLLUP_LOCK_TIMEOUT):
+        return None
+    try:
+        now = timezone.now()
+        cutoff = now.replace(second=0, microsecond=0) - timedelta(minutes=1)
+        folded = 0
+        while True:
+            # Upsert and delete together: a failure leaves the raw rows in place
+            with transaction.atomic():
+                # Claimed rows stay locked until the delete commits; a rollup
+                # in another process skips them instead of counting them again
+                ids = list(
+                    ViewBucket.objects.filter(bucket_start__lt=cutoff)
+                    .select_for_update(skip_locked=True)
+                    .order_by("id")
+                    .values_list("id", flat=True)[:batch_size]
+                )
+                if not ids:
+                    break
+                _fold(ids)
+            folded += len(ids)
+
+        for granularity in GRANULARITY_STEPS:
+            ViewRollup.objects.filter(
+                granularity=granularity, bucket_start__lt=now - retention(granularity)
+            ).delete()
+        return folded
+    finally:
+        cache.delete(ROLLUP_LOCK_KEY)
+
+
+def view_series(
+    ct_id: int, obj_id: int, granularity: str, points: int
+) -> List[Dict[str, Any]]:
+    """The last `points` buckets up to the current one, oldest first, zero-filled."""
+    step = GRANULARITY_STEPS[granularity]
+    last = truncate(timezone.now(), granularity)
+    first = last - step * (points - 1)
+    counts = dict(
+        ViewRollup.objects.filter(
+            content_type_id=ct_id,
+            object_id=obj_id,
+            granularity=granularity,
+            bucket_start__gte=first,
+        ).values_list("bucket_start", "count")
+    )
+    counts = {bucket.astimezone(dt_timezone.utc): n for bucket, n in counts.items()}
+    return [
+        {"start": first + step * n, "views": counts.get(first + step * n, 0)}
+        for n in range(points)
+    ]
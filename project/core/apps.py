@@ -4,3 +4,26 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        from django.conf import settings
+        from django.core.exceptions import ImproperlyConfigured
+
+        from .constants import COUNTER_MODE_BUFFERED
+        from .counters import check_buffer_backend
+
+        # Fail at startup rather than silently losing buffered views
+        if settings.COUNTER_MODE == COUNTER_MODE_BUFFERED:
+            check_buffer_backend()
+        # Without analytics nothing would ever feed the trending scores
+        if settings.TRENDING_ENABLED and not settings.ANALYTICS_ENABLED:
+            raise ImproperlyConfigured(
+                "TRENDING_ENABLED needs ANALYTICS_ENABLED: trending scores are "
+                "fed by rollup_views from the analytics buckets."
+            )
+
+        # Connect cache invalidation handlers
+        from . import signals  # noqa: F401
+
+        # Register the title__iprefix lookup
+        from . import search  # noqa: F401
@@ -0,0 +1,175 @@
+"""Native async variants of the pages list and detail endpoints for ASGI deployments.
+
+They return the same payloads as `PageViewSet` but load pages and content with
+the async ORM, and schedule counter increments in the background instead of
+blocking the response on the broker.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import Http404, HttpRequest, JsonResponse
+from django.urls import reverse
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .analytics import with_page_view
+from .cache import aget_page_detail
+from .loaders import (
+    PageDetail,
+    aload_content_map,
+    attach_shard_totals,
+    counted_pairs,
+)
+from .models import Page
+from .pagination import DefaultPagination
+from .serializers import parse_item_fields, serialize_content
+from .snapshots import aget_snapshot_detail
+from .tasks import increment_counters_async
+
+logger = logging.getLogger(__name__)
+
+NOT_FOUND: Dict[str, str] = {"detail": "Not found."}
+
+# Strong references to in-flight background tasks (the loop keeps weak ones only)
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def _increment_counters(pairs: List[Tuple[int, int]], page_id: int | None) -> None:
+    try:
+        if page_id is not None:
+            pairs = with_page_view(pairs, page_id)
+        if pairs:
+            increment_counters_async(pairs)
+    finally:
+        # Runs in a worker thread outside of the request cycle
+        close_old_connections()
+
+
+def schedule_counter_increment(
+    pairs: List[Tuple[int, int]], page_id: int | None = None
+) -> asyncio.Task:
+    """Enqueue counter increments in a worker thread without awaiting them.
+
+    With `page_id` the view of the page itself is recorded for analytics too.
+    """
+    task = asyncio.create_task(
+        sync_to_async(_increment_counters, thread_sensitive=False)(pairs, page_id)
+    )
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    task.add_done_callback(_log_failure)
+    return task
+
+
+def _log_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Counter increment failed", exc_info=task.exception())
+
+
+async def _build_detail(page_id: int, fields: Optional[FrozenSet[str]]) -> PageDetail:
+    if settings.PAGE_SNAPSHOT_ENABLED:
+        detail = await aget_snapshot_detail(page_id, fields)
+        if detail is None:
+            raise Http404
+        return detail
+
+    try:
+        page = await Page.objects.aget(pk=page_id)
+    except Page.DoesNotExist:
+        raise Http404
+    contents = [pc async for pc in page.contents.all()]
+    objects = await aload_content_map(contents, fields)
+    if settings.COUNTER_SHARDS:
+        await sync_to_async(attach_shard_totals)(objects)
+    items = []
+    for pc in contents:
+        obj = objects.get((pc.content_type_id, pc.object_id))
+        data = serialize_content(obj, fields)
+        if data is not None:
+            items.append(data)
+    # The ContentType cache is sync-only
+    pairs = await sync_to_async(counted_pairs)(
+        [(pc.content_type_id, pc.object_id) for pc in contents]
+    )
+    return {"id": page.id, "title": page.title, "items": items}, pairs
+
+
+async def page_detail(request: HttpRequest, pk: int) -> JsonResponse:
+    """Async `GET /api/async/pages/<pk>/`."""
+    try:
+        fields = parse_item_fields(request.GET)
+    except ValidationError as exc:
+        return JsonResponse(exc.detail, status=400)
+    try:
+        data, content_pairs = await aget_page_detail(
+            pk, lambda: _build_detail(pk, fields), fields
+        )
+    except Http404:
+        return JsonResponse(NOT_FOUND, status=404)
+
+    schedule_counter_increment(content_pairs, page_id=pk)
+
+    return JsonResponse(data)
+
+
+async def page_list(request: HttpRequest) -> JsonResponse:
+    """Async `GET /api/async/pages/` with the page-number response shape."""
+    paginator = DefaultPagination
+    try:
+        number = int(request.GET.get(paginator.page_query_param, 1))
+        size = int(
+            request.GET.get(paginator.page_size_query_param, paginator.page_size)
+        )
+    except ValueError:
+        return JsonResponse(NOT_FOUND, status=404)
+    if number < 1 or size < 1:
+        return JsonResponse(NOT_FOUND, status=404)
+    size = min(size, paginator.max_page_size)
+
+    queryset = Page.objects.all()
+    count = await queryset.acount()
+    offset = (number - 1) * size
+    if offset and offset >= count:
+        return JsonResponse(NOT_FOUND, status=404)
+
+    results = [
+        {
+            "id": page["id"],
+            "title": page["title"],
+            "url": request.build_absolute_uri(
+                reverse("async-page-detail", kwargs={"pk": page["id"]})
+            ),
+        }
+        async for page in queryset[offset : offset + size].values("id", "title")
+    ]
+
+    url = request.build_absolute_uri()
+    next_link = (
+        replace_query_param(url, paginator.page_query_param, number + 1)
+        if offset + size < count
+        else None
+    )
+    if number <= 1:
+        previous_link = None
+    elif number == 2:
+        previous_link = remove_query_param(url, paginator.page_query_param)
+    else:
+        previous_link = replace_query_param(url, paginator.page_query_param, number - 1)
+
+    return JsonResponse(
+        {
+            "count": count,
+            "next": next_link,
+            "previous": previous_link,
+            "results": results,
+        }
+    )
@@ -0,0 +1,90 @@
+"""Helpers shared by the `bench_*` management commands."""
+
+from __future__ import annotations
+
+import math
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+from django.conf import settings
+from django.test import Client
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of `samples` (`pct` in 0..100)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples_ms: Sequence[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    return {
+        "count": len(samples_ms),
+        "mean_ms": round(statistics.fmean(samples_ms), 3) if samples_ms else 0.0,
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+        "max_ms": round(max(samples_ms), 3) if samples_ms else 0.0,
+    }
+
+
+def time_calls(fn: Callable[[], Any], repeat: int, warmup: int = 1) -> List[float]:
+    """Call `fn` `warmup + repeat` times; return the timed samples in ms."""
+    for _ in range(warmup):
+        fn()
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def local_client() -> Client:
+    """Django test client that passes `ALLOWED_HOSTS` outside of the test runner."""
+    hosts = [h for h in settings.ALLOWED_HOSTS if h and not h.startswith((".", "*"))]
+    return Client(HTTP_HOST=hosts[0] if hosts else "localhost")
+
+
+def run_concurrent(
+    fn: Callable[[int], bool], requests: int, concurrency: int
+) -> Tuple[List[float], int, float]:
+    """Call `fn(n)` for n in `range(requests)` from `concurrency` threads.
+
+    `fn` returns True on success. Returns `(samples_ms, errors, elapsed_s)`.
+    """
+    samples: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def timed(n: int) -> None:
+        nonlocal errors
+        start = time.perf_counter()
+        ok = fn(n)
+        took = (time.perf_counter() - start) * 1000
+        with lock:
+            samples.append(took)
+            errors += not ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, range(requests)))
+    return samples, errors, time.perf_counter() - started
+
+
+def http_get(url: str, timeout: float = 30.0) -> bool:
+    """GET `url` over HTTP; True for a 2xx response."""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            resp.read()
+            return 200 <= resp.status < 300
+    except (urllib.error.URLError, OSError):
+        return False
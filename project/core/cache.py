@@ -0,0 +1,164 @@
+"""Versioned cache for serialized page-detail payloads.
+
+Each page has a version number stored in the cache; bodies are stored under
+`(page_id, version)`. Writes bump the version (see `core.signals`), so stale
+bodies are never read again and simply expire. Counters change on every view,
+so they are overlaid from the database when a cached body is served.
+
+A body is cached together with the `(content_type_id, object_id)` pairs whose
+counters a view increments, taken from the rows the body was rendered from,
+so neither a hit nor a miss reads `PageContent` a second time.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .loaders import PageDetail, afetch_counters, fetch_counters, item_ids_by_type
+
+PAGE_VERSION_KEY: str = "page-detail:version:{page_id}"
+PAGE_BODY_KEY: str = "page-detail:entry:{page_id}:{version}:{fields}"
+ALL_FIELDS: str = "*"
+
+
+def _body_key(page_id: int, version: int, fields: Optional[Collection[str]]) -> str:
+    """Body key of a page version; each sparse fieldset is cached on its own."""
+    fieldset = ALL_FIELDS if fields is None else ",".join(sorted(fields))
+    return PAGE_BODY_KEY.format(page_id=page_id, version=version, fields=fieldset)
+
+
+def _apply_counters(
+    data: Dict[str, Any], counters: Dict[Tuple[str, int], int]
+) -> Dict[str, Any]:
+    for item in data.get("items", []):
+        item["counter"] = counters.get((item["type"], item["id"]), item["counter"])
+    return data
+
+
+def _has_counters(data: Dict[str, Any]) -> bool:
+    items: List[Dict[str, Any]] = data.get("items", [])
+    return bool(items) and "counter" in items[0]
+
+
+def _get_version(key: str) -> int:
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted version never goes back in time
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key: str) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Key is missing: nothing is cached under an older version we could hit
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def get_page_version(page_id: int) -> int:
+    """Return the current cache version of a page, initializing it if missing."""
+    return _get_version(PAGE_VERSION_KEY.format(page_id=page_id))
+
+
+def bump_page_versions(page_ids: Iterable[int]) -> None:
+    """Invalidate cached bodies of the given pages by bumping their versions."""
+    for page_id in set(page_ids):
+        _bump_version(PAGE_VERSION_KEY.format(page_id=page_id))
+
+
+def overlay_counters(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace `counter` values of page items with the current database values."""
+    if not _has_counters(data):
+        return data  # no items, or `counter` was not requested
+    items: List[Dict[str, Any]] = data["items"]
+    return _apply_counters(data, fetch_counters(item_ids_by_type(items)))
+
+
+def get_page_detail(
+    page_id: int,
+    build: Callable[[], PageDetail],
+    fields: Optional[Collection[str]] = None,
+) -> PageDetail:
+    """Return the page-detail payload and its counted pairs from cache.
+
+    On a miss they are built and stored. The version is read before `build`
+    runs, so a concurrent write stores the fresh body under a version nobody
+    reads anymore rather than serving it stale.
+    """
+    if not settings.PAGE_DETAIL_CACHE_ENABLED:
+        return build()
+
+    version = get_page_version(page_id)
+    key = _body_key(page_id, version, fields)
+    entry = cache.get(key)
+    if entry is not None:
+        data, pairs = entry
+        return overlay_counters(data), pairs
+
+    entry = build()
+    cache.set(key, entry, timeout=settings.PAGE_DETAIL_CACHE_TIMEOUT)
+    return entry
+
+
+def get_cached_pairs(
+    page_id: int, fields: Optional[Collection[str]] = None
+) -> Optional[List[Tuple[int, int]]]:
+    """Counted pairs of the cached body of a page; None if it is not cached.
+
+    Reads no counters and builds nothing (for `304 Not Modified` responses).
+    """
+    if not settings.PAGE_DETAIL_CACHE_ENABLED:
+        return None
+    entry = cache.get(_body_key(page_id, get_page_version(page_id), fields))
+    return None if entry is None else entry[1]
+
+
+async def aget_page_version(page_id: int) -> int:
+    """Async `get_page_version`."""
+    key = PAGE_VERSION_KEY.format(page_id=page_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+async def aget_page_detail(
+    page_id: int,
+    build: Callable[[], Awaitable[PageDetail]],
+    fields: Optional[Collection[str]] = None,
+) -> PageDetail:
+    """Async `get_page_detail`; `build` is a coroutine function."""
+    if not settings.PAGE_DETAIL_CACHE_ENABLED:
+        return await build()
+
+    version = await aget_page_version(page_id)
+    key = _body_key(page_id, version, fields)
+    entry = await cache.aget(key)
+    if entry is not None:
+        data, pairs = entry
+        if not _has_counters(data):
+            return data, pairs
+        items: List[Dict[str, Any]] = data["items"]
+        counters = await afetch_counters(item_ids_by_type(items))
+        return _apply_counters(data, counters), pairs
+
+    entry = await build()
+    await cache.aset(key, entry, timeout=settings.PAGE_DETAIL_CACHE_TIMEOUT)
+    return entry
@@ -0,0 +1,104 @@
+"""Conditional GET (ETag / Last-Modified) for the pages API.
+
+Validators are computed from `Page.updated_at`, which `core.signals` moves
+forward on every change to a page, its PageContent rows or the objects they
+reference. They cost one indexed query and never render the body, so a
+`304 Not Modified` skips serialization entirely: the detail endpoint only
+reads the pairs whose counters the view increments (from the cached body, else
+one `PageContent` query).
+
+View counters are *not* part of the validators: the detail endpoint bumps them
+on every request, so a counter-aware validator would never match. Hence:
+
+* a representation that includes `counter` (the default) gets a weak ETag,
+  i.e. "equivalent apart from counters", and a 304 may leave the client with
+  older counter values;
+* the counter-free representation (`?exclude=counter`, or `?fields=` without
+  `counter`) is fully determined by the validators and gets a strong ETag.
+
+`Last-Modified` follows the same rule: counter changes never move it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+from typing import Collection, Optional, Tuple
+
+from django.db.models import Max
+from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .models import PAGE_LIST_CHANGE_PK, Page, PageListChange
+
+COUNTER_FIELD: str = "counter"
+
+Validators = Tuple[str, Optional[datetime]]
+
+
+def _etag(*parts: object, weak: bool = False) -> str:
+    digest = hashlib.sha1(
+        "|".join(str(p) for p in parts).encode(), usedforsecurity=False
+    ).hexdigest()
+    etag = quote_etag(digest)
+    return f"W/{etag}" if weak else etag
+
+
+def detail_validators(
+    page_id: int, fields: Optional[Collection[str]]
+) -> Optional[Validators]:
+    """ETag and Last-Modified of a page detail; None if the page does not exist."""
+    updated_at = (
+        Page.objects.filter(pk=page_id).values_list("updated_at", flat=True).first()
+    )
+    if updated_at is None:
+        return None
+    fieldset = "*" if fields is None else ",".join(sorted(fields))
+    with_counters = fields is None or COUNTER_FIELD in fields
+    etag = _etag("page", page_id, updated_at.isoformat(), fieldset, weak=with_counters)
+    return etag, updated_at
+
+
+def list_validators(request: HttpRequest) -> Validators:
+    """ETag and Last-Modified of a pages list response.
+
+    A created or updated page moves `MAX(updated_at)` (one index lookup); a
+    deleted page moves `PageListChange.deleted_at` (a primary key lookup; see
+    `core.signals`), so no request counts the table. Last-Modified is the later
+    of the two. The full URL covers the pagination parameters and the absolute
+    links in the body.
+    """
+    last: Optional[datetime] = Page.objects.aggregate(last=Max("updated_at"))["last"]
+    deleted: Optional[datetime] = (
+        PageListChange.objects.filter(pk=PAGE_LIST_CHANGE_PK)
+        .values_list("deleted_at", flat=True)
+        .first()
+    )
+    etag = _etag(
+        "pages",
+        request.build_absolute_uri(),
+        last.isoformat() if last else "",
+        deleted.isoformat() if deleted else "",
+    )
+    return etag, max(filter(None, (last, deleted)), default=None)
+
+
+def not_modified(
+    request: HttpRequest, validators: Validators
+) -> Optional[HttpResponse]:
+    """`304 Not Modified` (or `412`) if the request's preconditions allow it."""
+    etag, last_modified = validators
+    return get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def set_validators(response: HttpResponse, validators: Validators) -> HttpResponse:
+    etag, last_modified = validators
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
@@ -17,3 +17,46 @@ CDN_SUBS_BASE: str = "https://cdn.example.com/subtitles"
 # API types
 ITEM_TYPE_VIDEO: str = "video"
 ITEM_TYPE_AUDIO: str = "audio"
+
+# View counter modes
+COUNTER_MODE_IMMEDIATE: str = "immediate"
+COUNTER_MODE_BUFFERED: str = "buffered"
+COUNTER_MODE_COALESCED: str = "coalesced"
+
+# View analytics rollup granularities (`GET /api/analytics/<kind>/<id>/`)
+ANALYTICS_HOUR: str = "hour"
+ANALYTICS_DAY: str = "day"
+ANALYTICS_GRANULARITIES: tuple[str, ...] = (ANALYTICS_HOUR, ANALYTICS_DAY)
+ANALYTICS_GRANULARITY_PARAM: str = "granularity"
+ANALYTICS_POINTS_PARAM: str = "points"
+# Points returned by default: the last day by hour, the last month by day
+ANALYTICS_DEFAULT_POINTS: dict[str, int] = {ANALYTICS_HOUR: 24, ANALYTICS_DAY: 30}
+
+# Trending videos and audios (`GET /api/trending/?limit=10`)
+TRENDING_LIMIT_PARAM: str = "limit"
+TRENDING_DEFAULT_LIMIT: int = 10
+TRENDING_MAX_LIMIT: int = 100
+
+# Full-text search of videos and audios (`GET /api/search/?q=...&page=2`)
+SEARCH_QUERY_PARAM: str = "q"
+SEARCH_MAX_QUERY_LENGTH: int = 200
+SEARCH_DEFAULT_PAGE_SIZE: int = 20
+
+# Pagination modes of the pages list
+PAGINATION_QUERY_PARAM: str = "pagination"
+PAGINATION_PAGE: str = "page"
+PAGINATION_CURSOR: str = "cursor"
+
+# Batch page detail (`GET /api/pages/batch/?ids=1,2,3`)
+BATCH_IDS_PARAM: str = "ids"
+BATCH_MAX_IDS: int = 100
+
+# Sparse fieldsets of page items (`?fields=title,counter`, `?exclude=transcript`)
+FIELDS_QUERY_PARAM: str = "fields"
+EXCLUDE_QUERY_PARAM: str = "exclude"
+REQUIRED_ITEM_FIELDS: tuple[str, ...] = ("id", "type")
+# Large columns: not stored in snapshots, read from the database only when requested
+DEFERRED_ITEM_FIELDS: tuple[str, ...] = ("transcript",)
+
+# Streaming NDJSON export (`GET /api/pages/export/`): pages per fetch and per write
+EXPORT_CHUNK_SIZE: int = 500
@@ -0,0 +1,394 @@
+"""Write-behind buffer for view counters.
+
+Increments are summed per `(content_type_id, object_id)` in a shared cache and
+flushed to the database periodically (see `core.tasks.flush_counter_buffer_task`).
+
+The buffer is split into generations. Writers always add to the current one;
+a flush first rotates to a new generation and then drains only generations
+retired by an *earlier* flush, so in-flight writers never race with the drain.
+A generation is marked as flushed only after its deltas were applied, which
+gives an at-least-once guarantee: a crash between the two steps re-applies it.
+
+`CounterCoalescer` is the in-process alternative: it sums increments of all
+requests served by one process for a short window and publishes them as a
+single task message.
+
+With `COUNTER_SHARDS > 0` increments are written to `CounterShard` rows instead
+of the objects' `counter` column (see `add_to_shards`); readers add the cached
+shard sums from `shard_totals` (or the `with_shard_totals` annotation) to
+`counter`. `compact_shards` periodically folds the shards back into `counter`.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import random
+import threading
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Q, QuerySet, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import CounterShard
+
+Pair = Tuple[int, int]
+
+BUFFER_GEN_KEY: str = "counter-buffer:gen"
+BUFFER_FLUSHED_KEY: str = "counter-buffer:flushed"
+BUFFER_LOCK_KEY: str = "counter-buffer:lock"
+BUFFER_SEQ_KEY: str = "counter-buffer:{gen}:seq"
+BUFFER_SLOT_KEY: str = "counter-buffer:{gen}:slot:{seq}"
+BUFFER_DELTA_KEY: str = "counter-buffer:{gen}:delta:{ct_id}:{obj_id}"
+
+COUNTER_TOTAL_KEY: str = "counter-total:{ct_id}:{obj_id}"
+
+# Upper bound for a single flush; the lock expires if a flusher dies mid-way
+BUFFER_LOCK_TIMEOUT: int = 60
+
+# Shard rows folded into `counter` per transaction
+SHARD_COMPACT_BATCH: int = 1000
+SHARD_COMPACT_LOCK_KEY: str = "counter-shards:compact:lock"
+# Upper bound for one compaction run; the lock expires if the job dies mid-way
+SHARD_COMPACT_LOCK_TIMEOUT: int = 300
+
+# Annotation of `with_shard_totals`: `counter` plus the object's shards
+VIEWS_ANNOTATION: str = "views"
+
+
+# Backends the buffer must not live in: private to one process (web processes
+# would write deltas the flusher never sees) or evicting/culling keys
+UNSHARED_OR_EVICTING_BACKENDS: Tuple[str, ...] = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+    "django.core.cache.backends.filebased.FileBasedCache",
+    "django.core.cache.backends.db.DatabaseCache",
+    "django.core.cache.backends.memcached.PyMemcacheCache",
+    "django.core.cache.backends.memcached.PyLibMCCache",
+)
+
+
+def check_buffer_backend() -> None:
+    """Refuse to start buffered mode on a cache that loses deltas.
+
+    Raises `ImproperlyConfigured` unless the buffer cache is a shared backend
+    that keeps keys until they are deleted (e.g. Redis without eviction).
+    """
+    backend = settings.CACHES[settings.COUNTER_BUFFER_CACHE]["BACKEND"]
+    if backend in UNSHARED_OR_EVICTING_BACKENDS:
+        raise ImproperlyConfigured(
+            "COUNTER_MODE=buffered needs a shared, non-evicting cache for the "
+            f"counter buffer; COUNTER_CACHE_BACKEND is {backend}. Use e.g. "
+            "django.core.cache.backends.redis.RedisCache."
+        )
+
+
+class CounterBuffer:
+    """Cache-backed accumulator of counter increments."""
+
+    def __init__(self, alias: str | None = None):
+        self.cache = caches[alias or settings.COUNTER_BUFFER_CACHE]
+
+    def _incr(self, key: str, delta: int = 1) -> int:
+        self.cache.add(key, 0, timeout=None)
+        return self.cache.incr(key, delta)
+
+    def current_generation(self) -> int:
+        gen = self.cache.get(BUFFER_GEN_KEY)
+        if gen is None:
+            self.cache.add(BUFFER_GEN_KEY, 1, timeout=None)
+            gen = self.cache.get(BUFFER_GEN_KEY)
+        return gen
+
+    def add(self, pairs: Iterable[Pair]) -> None:
+        """Add one increment per pair (repeated pairs are summed)."""
+        gen = self.current_generation()
+        for (ct_id, obj_id), delta in Counter(pairs).items():
+            key = BUFFER_DELTA_KEY.format(gen=gen, ct_id=ct_id, obj_id=obj_id)
+            if self.cache.add(key, 0, timeout=None):
+                # First increment of this pair in the generation: register it
+                seq = self._incr(BUFFER_SEQ_KEY.format(gen=gen))
+                self.cache.set(
+                    BUFFER_SLOT_KEY.format(gen=gen, seq=seq),
+                    (ct_id, obj_id),
+                    timeout=None,
+                )
+            self.cache.incr(key, delta)
+
+    def _generation_keys(self, gen: int) -> Tuple[List[str], Dict[str, Pair]]:
+        seq = self.cache.get(BUFFER_SEQ_KEY.format(gen=gen)) or 0
+        slot_keys = [BUFFER_SLOT_KEY.format(gen=gen, seq=n) for n in range(1, seq + 1)]
+        delta_keys = {
+            BUFFER_DELTA_KEY.format(gen=gen, ct_id=ct_id, obj_id=obj_id): (
+                ct_id,
+                obj_id,
+            )
+            for ct_id, obj_id in self.cache.get_many(slot_keys).values()
+        }
+        return [BUFFER_SEQ_KEY.format(gen=gen), *slot_keys], delta_keys
+
+    def drain(self, gen: int) -> Dict[Pair, int]:
+        """Return summed deltas of a retired generation without removing them."""
+        _, delta_keys = self._generation_keys(gen)
+        values = self.cache.get_many(list(delta_keys))
+        return {delta_keys[key]: delta for key, delta in values.items() if delta > 0}
+
+    def discard(self, gen: int) -> None:
+        meta_keys, delta_keys = self._generation_keys(gen)
+        self.cache.delete_many([*delta_keys, *meta_keys])
+
+    def flush(
+        self,
+        apply: Callable[[Dict[Pair, int]], None],
+        wait_for_writers: bool = True,
+    ) -> int:
+        """Rotate the buffer and apply every retired generation; return rows flushed.
+
+        With `wait_for_writers=False` the generation retired by this very call is
+        drained too; use it only when no concurrent writers exist (tests, shutdown).
+        """
+        if not self.cache.add(BUFFER_LOCK_KEY, 1, timeout=BUFFER_LOCK_TIMEOUT):
+            return 0  # another flush is running
+        try:
+            current = self.current_generation()
+            self._incr(BUFFER_GEN_KEY)
+            last = current if not wait_for_writers else current - 1
+            flushed = self.cache.get(BUFFER_FLUSHED_KEY) or 0
+
+            total = 0
+            for gen in range(flushed + 1, last + 1):
+                deltas = self.drain(gen)
+                if deltas:
+                    apply(deltas)
+                    total += len(deltas)
+                # Marked only after `apply` succeeded; a crash before this re-applies
+                self.cache.set(BUFFER_FLUSHED_KEY, gen, timeout=None)
+                self.discard(gen)
+            return total
+        finally:
+            self.cache.delete(BUFFER_LOCK_KEY)
+
+
+class CounterCoalescer:
+    """Per-process accumulator that turns many increments into one publish.
+
+    Pairs added by any request of the process are summed; `publish` receives the
+    per-object deltas once `COUNTER_COALESCE_WINDOW` seconds have passed since
+    the first pending increment, or as soon as `COUNTER_COALESCE_MAX_PAIRS`
+    distinct objects are pending. Pending deltas are also published when the
+    process exits (`atexit`), so a graceful worker shutdown loses no views.
+    """
+
+    def __init__(self, publish: Callable[[Dict[Pair, int]], None]):
+        self.publish = publish
+        self._reset()
+        atexit.register(self.flush)
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._pending: Counter = Counter()
+        self._timer: threading.Timer | None = None
+
+    def _check_fork(self) -> None:
+        # A forked worker inherits the parent's pending deltas but not its
+        # timer thread; those deltas are the parent's to publish
+        if self._pid != os.getpid():
+            self._reset()
+
+    def add(self, pairs: Iterable[Pair]) -> None:
+        """Add one increment per pair (repeated pairs are summed)."""
+        self._check_fork()
+        with self._lock:
+            self._pending.update(pairs)
+            full = len(self._pending) >= settings.COUNTER_COALESCE_MAX_PAIRS
+            if not full and self._timer is None:
+                self._timer = threading.Timer(
+                    settings.COUNTER_COALESCE_WINDOW, self.flush
+                )
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """Publish pending deltas now; return how many objects they cover."""
+        self._check_fork()
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if pending:
+            self.publish(dict(pending))
+        return len(pending)
+
+
+def _group_by_ct(pairs: Iterable[Pair]) -> Dict[int, List[int]]:
+    by_ct: Dict[int, List[int]] = {}
+    for ct_id, obj_id in pairs:
+        by_ct.setdefault(ct_id, []).append(obj_id)
+    return by_ct
+
+
+def _bump_cached_totals(deltas: Dict[Pair, int]) -> None:
+    for (ct_id, obj_id), delta in deltas.items():
+        try:
+            cache.incr(COUNTER_TOTAL_KEY.format(ct_id=ct_id, obj_id=obj_id), delta)
+        except ValueError:
+            pass  # not cached: the next read sums the shards
+
+
+def add_to_shards(deltas: Dict[Pair, int], shards: int) -> None:
+    """Add `deltas` to one randomly chosen shard of each object.
+
+    The whole batch goes to the same shard, so it stays one UPDATE per
+    (content type, delta); concurrent batches spread over `shards` rows per
+    object. Missing shard rows are created on first use.
+    """
+    shard = random.randrange(shards)
+    by_ct_delta: Dict[Tuple[int, int], List[int]] = {}
+    for (ct_id, obj_id), delta in deltas.items():
+        by_ct_delta.setdefault((ct_id, delta), []).append(obj_id)
+
+    with transaction.atomic():
+        for (ct_id, delta), ids in by_ct_delta.items():
+            rows = CounterShard.objects.filter(content_type_id=ct_id, shard=shard)
+            updated = rows.filter(object_id__in=ids).update(count=F("count") + delta)
+            if updated == len(ids):
+                continue
+            existing = set(
+                rows.filter(object_id__in=ids).values_list("object_id", flat=True)
+            )
+            missing = [obj_id for obj_id in ids if obj_id not in existing]
+            # A concurrent writer may create the same rows: keep theirs, add ours
+            CounterShard.objects.bulk_create(
+                [
+                    CounterShard(content_type_id=ct_id, object_id=obj_id, shard=shard)
+                    for obj_id in missing
+                ],
+                ignore_conflicts=True,
+            )
+            rows.filter(object_id__in=missing).update(count=F("count") + delta)
+        transaction.on_commit(lambda: _bump_cached_totals(deltas))
+
+
+def shard_totals(pairs: Iterable[Pair]) -> Dict[Pair, int]:
+    """Sum of the shards of each object, cached for `COUNTER_TOTAL_CACHE_TIMEOUT`."""
+    keys = {
+        COUNTER_TOTAL_KEY.format(ct_id=ct_id, obj_id=obj_id): (ct_id, obj_id)
+        for ct_id, obj_id in pairs
+    }
+    cached = cache.get_many(list(keys))
+    totals = {keys[key]: total for key, total in cached.items()}
+    missing = [pair for key, pair in keys.items() if key not in cached]
+    if not missing:
+        return totals
+
+    condition = Q()
+    for ct_id, ids in _group_by_ct(missing).items():
+        condition |= Q(content_type_id=ct_id, object_id__in=ids)
+    fresh = dict.fromkeys(missing, 0)
+    rows = (
+        CounterShard.objects.filter(condition)
+        .values("content_type_id", "object_id")
+        .annotate(total=Sum("count"))
+        .values_list("content_type_id", "object_id", "total")
+    )
+    for ct_id, obj_id, total in rows:
+        fresh[(ct_id, obj_id)] = total
+    cache.set_many(
+        {
+            COUNTER_TOTAL_KEY.format(ct_id=ct_id, obj_id=obj_id): total
+            for (ct_id, obj_id), total in fresh.items()
+        },
+        timeout=settings.COUNTER_TOTAL_CACHE_TIMEOUT,
+    )
+    totals.update(fresh)
+    return totals
+
+
+def with_shard_totals(queryset: QuerySet) -> QuerySet:
+    """Annotate `views`: `counter` plus the sum of the object's shards.
+
+    For readers that filter or order by the displayed total in SQL (admin
+    changelists, `rebuild_trending --from-counters`); one correlated subquery
+    on the shards' unique index per row.
+    """
+    ct = ContentType.objects.get_for_model(queryset.model)
+    shards = (
+        CounterShard.objects.filter(content_type=ct, object_id=OuterRef("pk"))
+        .values("object_id")
+        .annotate(total=Sum("count"))
+        .values("total")
+    )
+    return queryset.annotate(
+        **{
+            VIEWS_ANNOTATION: F("counter")
+            + Coalesce(Subquery(shards), 0, output_field=models.BigIntegerField())
+        }
+    )
+
+
+def _compact_batch(rows: List[Tuple[int, int, int, int]]) -> None:
+    """Move the counts of `(id, content_type_id, object_id, count)` shard rows."""
+    totals: Counter = Counter()
+    by_count: Dict[int, List[int]] = {}
+    for row_id, ct_id, obj_id, count in rows:
+        totals[(ct_id, obj_id)] += count
+        by_count.setdefault(count, []).append(row_id)
+
+    by_ct_delta: Dict[Tuple[int, int], List[int]] = {}
+    for (ct_id, obj_id), total in totals.items():
+        by_ct_delta.setdefault((ct_id, total), []).append(obj_id)
+
+    for (ct_id, total), ids in by_ct_delta.items():
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        if model is not None and hasattr(model, "counter"):
+            model.objects.filter(id__in=ids).update(counter=F("counter") + total)
+    # Subtract what was moved rather than zeroing: increments that landed on
+    # these rows since they were read stay in their shard
+    for count, ids in by_count.items():
+        CounterShard.objects.filter(id__in=ids).update(count=F("count") - count)
+    CounterShard.objects.filter(id__in=[row[0] for row in rows], count=0).delete()
+    keys = [
+        COUNTER_TOTAL_KEY.format(ct_id=ct_id, obj_id=obj_id) for ct_id, obj_id in totals
+    ]
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def compact_shards(batch_size: int = SHARD_COMPACT_BATCH) -> int | None:
+    """Fold counter shards into the objects' `counter`.
+
+    Returns the number of shard rows folded, or None if another compaction is
+    running. Safe to run while views are written to the shards, and needed
+    after `COUNTER_SHARDS` is turned off to drain what is left. Cached shard
+    totals of the folded objects are dropped once each batch commits.
+    """
+    if not cache.add(SHARD_COMPACT_LOCK_KEY, 1, timeout=SHARD_COMPACT_LOCK_TIMEOUT):
+        return None
+    try:
+        folded, last_id = 0, 0
+        while True:
+            # Move and subtract together: a failure leaves the shards in place
+            with transaction.atomic():
+                rows = list(
+                    CounterShard.objects.filter(id__gt=last_id)
+                    .order_by("id")
+                    .values_list("id", "content_type_id", "object_id", "count")[
+                        :batch_size
+                    ]
+                )
+                if not rows:
+                    return folded
+                _compact_batch(rows)
+            folded += len(rows)
+            last_id = rows[-1][0]
+    finally:
+        cache.delete(SHARD_COMPACT_LOCK_KEY)
@@ -0,0 +1,79 @@
+"""Streaming NDJSON export of pages with their resolved items.
+
+Pages and PageContent rows are read with two server-side cursors ordered by
+page id and merged on the fly; items are resolved one chunk of pages at a time
+(one `.values()` query per content type, see `core.fastpath`). Memory is bounded
+by the chunk size and there is no `COUNT(*)`. When the client goes away the
+server stops pulling chunks (ASGI) or closes the response (WSGI), which closes
+the generator and both cursors.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Collection, Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+
+from rest_framework.renderers import JSONRenderer
+
+from .fastpath import Pair, item_rows
+from .models import Page, PageContent
+from .renderers import ORJSONRenderer
+
+# (page id, title, item pairs in position order)
+ExportPage = Tuple[int, str, List[Pair]]
+
+
+def _renderer() -> JSONRenderer:
+    return ORJSONRenderer() if settings.API_ORJSON_RENDERER else JSONRenderer()
+
+
+def _render_chunk(chunk: List[ExportPage], fields: Optional[Collection[str]]) -> bytes:
+    rows = item_rows((pair for _, _, pairs in chunk for pair in pairs), fields)
+    renderer = _renderer()
+    lines: List[bytes] = []
+    for page_id, title, pairs in chunk:
+        page: Dict[str, Any] = {
+            "id": page_id,
+            "title": title,
+            "items": [rows[pair] for pair in pairs if pair in rows],
+        }
+        lines.append(renderer.render(page) + b"\n")
+    return b"".join(lines)
+
+
+def export_pages(
+    chunk_size: int, fields: Optional[Collection[str]] = None
+) -> Iterator[bytes]:
+    """Yield NDJSON, one line per page in id order, `chunk_size` pages at a time."""
+    pages = (
+        Page.objects.order_by("id")
+        .values_list("id", "title")
+        .iterator(chunk_size=chunk_size)
+    )
+    contents = (
+        PageContent.objects.order_by("page_id", "position", "id")
+        .values_list("page_id", "content_type_id", "object_id")
+        .iterator(chunk_size=chunk_size)
+    )
+    try:
+        pending = next(contents, None)
+        chunk: List[ExportPage] = []
+        for page_id, title in pages:
+            pairs: List[Pair] = []
+            # Skip rows of pages deleted since `pages` was read past them
+            while pending is not None and pending[0] < page_id:
+                pending = next(contents, None)
+            while pending is not None and pending[0] == page_id:
+                pairs.append((pending[1], pending[2]))
+                pending = next(contents, None)
+            chunk.append((page_id, title, pairs))
+            if len(chunk) >= chunk_size:
+                yield _render_chunk(chunk, fields)
+                chunk = []
+        if chunk:
+            yield _render_chunk(chunk, fields)
+    finally:
+        # Releases the server-side cursors when the client disconnects mid-stream
+        pages.close()
+        contents.close()
@@ -0,0 +1,22 @@
+"""Database expressions shared by models, lookups and migrations."""
+
+from django.db.models import Func
+
+
+class BytewiseCollate(Func):
+    """`expression COLLATE "C"` on PostgreSQL, the bare expression elsewhere.
+
+    Under byte order a btree index serves `LIKE 'prefix%'` whatever the
+    database collation; SQLite compares bytes (BINARY) by default. Not a
+    `Collate`, which indexes would render outside the expression.
+    """
+
+    template = "%(expressions)s"
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template='%(expressions)s COLLATE "C"',
+            **extra_context,
+        )
@@ -0,0 +1,107 @@
+"""Opt-in fast serialization of the pages API (`PAGES_FAST_SERIALIZATION`).
+
+Builds the list and detail payloads straight from `.values()` rows using a
+field map precomputed per content model, instead of instantiating DRF
+serializers and fields for every item. The output is byte-identical to the
+serializers' (see `core/tests/test_fastpath.py`).
+"""
+
+from __future__ import annotations
+
+from typing import Any, Collection, Dict, Iterable, List, Optional, Tuple, Type
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+
+from .counters import shard_totals
+from .loaders import PageDetail, counted_pairs
+from .models import Page, PageContent
+from .serializers import CONTENT_SERIALIZERS
+
+Pair = Tuple[int, int]
+# (output key, model column); the column is None for the constant `type`
+FieldMap = Tuple[Tuple[str, Optional[str]], ...]
+
+TYPE_FIELD: str = "type"
+COUNTER_FIELD: str = "counter"
+
+ITEM_FIELD_MAPS: Dict[Type[models.Model], Tuple[str, FieldMap]] = {
+    serializer.Meta.model: (
+        item_type,
+        tuple(
+            (name, None if name == TYPE_FIELD else name)
+            for name in serializer.Meta.fields
+        ),
+    )
+    for item_type, serializer in CONTENT_SERIALIZERS.items()
+}
+
+
+def item_rows(
+    pairs: Iterable[Pair], fields: Optional[Collection[str]] = None
+) -> Dict[Pair, Dict[str, Any]]:
+    """Rendered page items keyed by `(content_type_id, object_id)`.
+
+    One `.values()` query per content type, selecting only the mapped columns
+    (narrowed further by `fields`). Missing objects are absent from the result.
+    """
+    ids_by_ct: Dict[int, set[int]] = {}
+    for ct_id, obj_id in pairs:
+        ids_by_ct.setdefault(ct_id, set()).add(obj_id)
+
+    rows: Dict[Pair, Dict[str, Any]] = {}
+    for ct_id, ids in ids_by_ct.items():
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        if model not in ITEM_FIELD_MAPS:
+            continue
+        item_type, field_map = ITEM_FIELD_MAPS[model]
+        if fields is not None:
+            field_map = tuple(f for f in field_map if f[0] in fields)
+        columns = {column for _, column in field_map if column} | {"id"}
+        for row in model.objects.filter(id__in=ids).values(*columns):
+            rows[(ct_id, row["id"])] = {
+                name: item_type if column is None else row[column]
+                for name, column in field_map
+            }
+
+    if settings.COUNTER_SHARDS and (fields is None or COUNTER_FIELD in fields):
+        totals = shard_totals(rows)
+        for pair, item in rows.items():
+            item[COUNTER_FIELD] += totals.get(pair, 0)
+    return rows
+
+
+def render_page_detail(
+    page_id: int, fields: Optional[Collection[str]] = None
+) -> Optional[PageDetail]:
+    """`PageDetailSerializer` payload of a page and its counted pairs.
+
+    None if the page does not exist.
+    """
+    page = Page.objects.filter(pk=page_id).values("id", "title").first()
+    if page is None:
+        return None
+    # `position` order from PageContent.Meta.ordering
+    pairs: List[Pair] = list(
+        PageContent.objects.filter(page_id=page_id).values_list(
+            "content_type_id", "object_id"
+        )
+    )
+    rows = item_rows(pairs, fields)
+    page["items"] = [rows[pair] for pair in pairs if pair in rows]
+    return page, counted_pairs(pairs)
+
+
+def page_list_rows(
+    rows: Iterable[Dict[str, Any]], list_url: str
+) -> List[Dict[str, Any]]:
+    """`PageListSerializer` payloads of `.values("id", "title")` rows.
+
+    `list_url` is the absolute URL of the pages list; detail routes of the
+    router are `<list_url><pk>/`.
+    """
+    return [
+        {"id": row["id"], "title": row["title"], "url": f"{list_url}{row['id']}/"}
+        for row in rows
+    ]
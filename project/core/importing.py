@@ -0,0 +1,267 @@
+"""Bulk NDJSON import used by the `import_content` command.
+
+One JSON object per line; `type` is `video`, `audio` or `page` and
+`external_id` is the record's key in the upstream system:
+
+    {"type": "video", "external_id": "v-1", "title": "...", "video_url": "..."}
+    {"type": "audio", "external_id": "a-1", "title": "...", "transcript": "..."}
+    {"type": "page", "external_id": "p-1", "title": "...",
+     "items": [{"type": "video", "external_id": "v-1"}]}
+
+Records are applied in chunks, one transaction per chunk. Objects are upserted
+by `external_id` with `bulk_create(update_conflicts=True)` (view counters are
+never overwritten) and a page that lists `items` gets its PageContent rows
+replaced, positions following the list. Items are resolved against objects
+already in the database or in the same chunk, so content should come before the
+pages that use it. Bulk writes send no model signals (and the per-row refresh
+of deleted PageContent rows is skipped): the pages a chunk changed are
+refreshed explicitly once it is committed.
+"""
+
+from __future__ import annotations
+
+import json
+from collections import Counter
+from contextlib import nullcontext
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import models, transaction
+
+from .constants import ITEM_TYPE_AUDIO, ITEM_TYPE_VIDEO
+from .loaders import ITEM_TYPE_MODELS
+from .models import Audio, Page, PageContent, Video
+from .signals import bulk_page_writes, pages_changed
+
+RECORD_TYPE_PAGE: str = "page"
+
+# Record type -> (model, required fields, optional fields with their defaults)
+RECORD_TYPES: Dict[str, Tuple[Type[models.Model], Tuple[str, ...], Dict[str, Any]]] = {
+    ITEM_TYPE_VIDEO: (Video, ("title", "video_url"), {"subtitles_url": ""}),
+    ITEM_TYPE_AUDIO: (Audio, ("title", "transcript"), {}),
+    RECORD_TYPE_PAGE: (Page, ("title",), {}),
+}
+
+
+class RecordError(ValueError):
+    """An input line that is not a valid record."""
+
+
+class Record(NamedTuple):
+    type: str
+    key: str
+    values: Dict[str, Any]
+    # (item type, external id) in page order; None leaves PageContent as is
+    items: Optional[List[Tuple[str, str]]]
+
+
+def _parse_items(raw: Any) -> List[Tuple[str, str]]:
+    if not isinstance(raw, list):
+        raise ValueError("`items` must be a list")
+    items = []
+    for item in raw:
+        if not isinstance(item, dict) or item.get("type") not in ITEM_TYPE_MODELS:
+            raise ValueError(f"invalid item {item!r}")
+        if not isinstance(item.get("external_id"), str) or not item["external_id"]:
+            raise ValueError(f"item without `external_id`: {item!r}")
+        items.append((item["type"], item["external_id"]))
+    return items
+
+
+def _check_value(model: Type[models.Model], name: str, value: Any) -> None:
+    """Reject what the column would refuse: non-strings (null too), overlong text."""
+    if not isinstance(value, str):
+        raise ValueError(f"`{name}` must be a string")
+    max_length = model._meta.get_field(name).max_length
+    if max_length is not None and len(value) > max_length:
+        raise ValueError(f"`{name}` is longer than {max_length} characters")
+
+
+def parse_record(line: str) -> Record:
+    """Parse one NDJSON line; raises `ValueError` for malformed records."""
+    data = json.loads(line)
+    if not isinstance(data, dict) or data.get("type") not in RECORD_TYPES:
+        raise ValueError(f"`type` must be one of {', '.join(RECORD_TYPES)}")
+    key = data.get("external_id")
+    if not isinstance(key, str) or not key:
+        raise ValueError("`external_id` is required")
+    model, required, optional = RECORD_TYPES[data["type"]]
+    missing = [name for name in required if name not in data]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    values = {name: data[name] for name in required}
+    values.update({name: data.get(name, default) for name, default in optional.items()})
+    for name, value in {"external_id": key, **values}.items():
+        _check_value(model, name, value)
+    items = None
+    if data["type"] == RECORD_TYPE_PAGE and "items" in data:
+        items = _parse_items(data["items"])
+    return Record(data["type"], key, values, items)
+
+
+def read_records(lines: Iterable[str]) -> Iterator[Record]:
+    """Records of NDJSON lines; blank lines are skipped."""
+    for lineno, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield parse_record(line)
+        except ValueError as exc:
+            raise RecordError(f"line {lineno}: {exc}") from exc
+
+
+def _upsert(
+    model: Type[models.Model],
+    records: Dict[str, Record],
+    label: str,
+    stats: Counter,
+) -> Dict[str, int]:
+    """Insert or update `records` by `external_id`; return their ids by key."""
+    if not records:
+        return {}
+    keys = list(records)
+    existing = model.objects.filter(external_id__in=keys).count()
+    fields = list(next(iter(records.values())).values)
+    model.objects.bulk_create(
+        [model(external_id=key, **r.values) for key, r in records.items()],
+        update_conflicts=True,
+        unique_fields=["external_id"],
+        update_fields=[*fields, "updated_at"],
+    )
+    stats[f"{label}_created"] += len(keys) - existing
+    stats[f"{label}_updated"] += existing
+    return dict(
+        model.objects.filter(external_id__in=keys).values_list("external_id", "id")
+    )
+
+
+def _replace_items(
+    pages: Dict[str, Record], page_ids: Dict[str, int], stats: Counter
+) -> None:
+    """Rewrite PageContent of the pages that list `items`, one query per step."""
+    listed = {key: r for key, r in pages.items() if r.items is not None}
+    if not listed:
+        return
+    refs: Dict[str, Set[str]] = {}
+    for record in listed.values():
+        for item_type, ref in record.items:
+            refs.setdefault(item_type, set()).add(ref)
+    resolved = {
+        item_type: dict(
+            ITEM_TYPE_MODELS[item_type]
+            .objects.filter(external_id__in=keys)
+            .values_list("external_id", "id")
+        )
+        for item_type, keys in refs.items()
+    }
+    ct_ids = {
+        item_type: ContentType.objects.get_for_model(model).id
+        for item_type, model in ITEM_TYPE_MODELS.items()
+    }
+
+    # The pages are refreshed once per chunk, not once per deleted row
+    with bulk_page_writes():
+        PageContent.objects.filter(
+            page_id__in=[page_ids[key] for key in listed]
+        ).delete()
+    links: List[PageContent] = []
+    for key, record in listed.items():
+        position = 0
+        for item_type, ref in record.items:
+            obj_id = resolved[item_type].get(ref)
+            if obj_id is None:
+                stats["unresolved_items"] += 1
+                continue
+            position += 1
+            links.append(
+                PageContent(
+                    page_id=page_ids[key],
+                    content_type_id=ct_ids[item_type],
+                    object_id=obj_id,
+                    position=position,
+                )
+            )
+    PageContent.objects.bulk_create(links)
+    stats["links"] += len(links)
+
+
+def import_chunk(records: List[Record], stats: Counter) -> Set[int]:
+    """Apply one chunk of records; return ids of the pages it changed.
+
+    A key repeated within the chunk keeps its last record.
+    """
+    by_type: Dict[str, Dict[str, Record]] = {t: {} for t in RECORD_TYPES}
+    for record in records:
+        by_type[record.type][record.key] = record
+
+    changed: Set[int] = set()
+    for item_type, model in ITEM_TYPE_MODELS.items():
+        ids = _upsert(model, by_type[item_type], item_type, stats)
+        if ids:
+            changed.update(
+                PageContent.objects.filter(
+                    content_type=ContentType.objects.get_for_model(model),
+                    object_id__in=ids.values(),
+                )
+                .values_list("page_id", flat=True)
+                .order_by()
+                .distinct()
+            )
+    pages = by_type[RECORD_TYPE_PAGE]
+    page_ids = _upsert(Page, pages, RECORD_TYPE_PAGE, stats)
+    _replace_items(pages, page_ids, stats)
+    changed.update(page_ids.values())
+    return changed
+
+
+def _chunks(records: Iterable[Record], size: int) -> Iterator[List[Record]]:
+    chunk: List[Record] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_lines(
+    lines: Iterable[str],
+    chunk_size: int,
+    dry_run: bool = False,
+    on_chunk: Optional[Callable[[Counter], None]] = None,
+) -> Counter:
+    """Import NDJSON `lines` in chunks of `chunk_size` records.
+
+    Returns counts of records, created/updated objects per type, written
+    PageContent `links` and `unresolved_items`. A dry run performs the same
+    writes inside one transaction that is rolled back at the end, and refreshes
+    no pages.
+    """
+    stats: Counter = Counter()
+    with transaction.atomic() if dry_run else nullcontext():
+        for chunk in _chunks(read_records(lines), chunk_size):
+            with transaction.atomic():
+                changed = import_chunk(chunk, stats)
+            stats["records"] += len(chunk)
+            if not dry_run:
+                ordered = sorted(changed)
+                for start in range(0, len(ordered), chunk_size):
+                    pages_changed(ordered[start : start + chunk_size])
+            if on_chunk is not None:
+                on_chunk(stats)
+        if dry_run:
+            transaction.set_rollback(True)
+    return stats
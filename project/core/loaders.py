@@ -0,0 +1,277 @@
+"""Batch loaders that resolve generic `PageContent` relations without N+1 queries."""
+
+from __future__ import annotations
+
+from typing import (
+    Any,
+    Collection,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.db.models import CharField, Value
+
+from .constants import (
+    ALLOWED_CONTENT_MODELS,
+    APP_LABEL_CORE,
+    ITEM_TYPE_AUDIO,
+    ITEM_TYPE_VIDEO,
+)
+from .counters import shard_totals
+from .models import Audio, PageContent, Video
+
+ITEM_TYPE_MODELS: Dict[str, Type[models.Model]] = {
+    ITEM_TYPE_VIDEO: Video,
+    ITEM_TYPE_AUDIO: Audio,
+}
+
+# Page-detail payload and the pairs its view counts (see `counted_pairs`)
+PageDetail = Tuple[Dict[str, Any], List[Tuple[int, int]]]
+
+# Content type id -> model, for the async path (ContentType's own cache is sync-only)
+_content_models: Dict[int, Type[models.Model] | None] = {}
+
+
+def _group_ids_by_ct(contents: Iterable[PageContent]) -> Dict[int, Set[int]]:
+    ids_by_ct: Dict[int, Set[int]] = {}
+    for pc in contents:
+        ids_by_ct.setdefault(pc.content_type_id, set()).add(pc.object_id)
+    return ids_by_ct
+
+
+def item_ids_by_type(items: Iterable[Dict[str, Any]]) -> Dict[str, List[int]]:
+    """Group rendered page items' ids by their `type`."""
+    ids_by_type: Dict[str, List[int]] = {}
+    for item in items:
+        ids_by_type.setdefault(item["type"], []).append(item["id"])
+    return ids_by_type
+
+
+def allowed_content_type_ids() -> FrozenSet[int]:
+    """Ids of the content types whose views are counted (`ALLOWED_CONTENT_MODELS`).
+
+    Served from the in-process ContentType cache: no query once it is warm.
+    """
+    return frozenset(
+        ContentType.objects.get_by_natural_key(APP_LABEL_CORE, model).id
+        for model in ALLOWED_CONTENT_MODELS
+    )
+
+
+def counted_pairs(pairs: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """`(content_type_id, object_id)` pairs a page view counts, in page order.
+
+    Allowed content types only, once per object: one view counts once even if
+    the page repeats an item.
+    """
+    allowed = allowed_content_type_ids()
+    return [pair for pair in dict.fromkeys(pairs) if pair[0] in allowed]
+
+
+def page_pairs(page_id: int) -> List[Tuple[int, int]]:
+    """Counted pairs of a page read from its `PageContent` rows (one query)."""
+    return counted_pairs(
+        PageContent.objects.filter(page_id=page_id).values_list(
+            "content_type_id", "object_id"
+        )
+    )
+
+
+def item_pairs(items: Iterable[Dict[str, Any]]) -> List[Tuple[int, int]]:
+    """`(content_type_id, object_id)` pairs of rendered page items."""
+    ct_ids = {
+        item_type: ContentType.objects.get_for_model(model).id
+        for item_type, model in ITEM_TYPE_MODELS.items()
+    }
+    return [(ct_ids[item["type"]], item["id"]) for item in items]
+
+
+def _content_queryset(
+    model: Type[models.Model], ids: Iterable[int], fields: Optional[Collection[str]]
+) -> models.QuerySet:
+    """`model` rows by id, loading only the columns behind `fields` (None: all)."""
+    queryset = model.objects.filter(id__in=ids)
+    if fields is None:
+        return queryset
+    columns = [
+        f.name
+        for f in model._meta.concrete_fields
+        if f.name in fields and not f.primary_key
+    ]
+    return queryset.only(*columns)
+
+
+def load_content_map(
+    contents: Iterable[PageContent], fields: Optional[Collection[str]] = None
+) -> Dict[Tuple[int, int], models.Model]:
+    """Fetch objects referenced by PageContent rows, one query per content type.
+
+    Returns a mapping `(content_type_id, object_id) -> object`; missing objects
+    and unknown content types are simply absent from it. With `fields`, other
+    columns are deferred and never read.
+    """
+    objects: Dict[Tuple[int, int], models.Model] = {}
+    for ct_id, ids in _group_ids_by_ct(contents).items():
+        # ContentType lookups are served from the in-process ContentType cache
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        if model is None:
+            continue
+        for obj in _content_queryset(model, ids, fields):
+            objects[(ct_id, obj.pk)] = obj
+    return objects
+
+
+def load_contents(
+    contents: Iterable[PageContent], fields: Optional[Collection[str]] = None
+) -> List[models.Model]:
+    """Resolve `content` for many PageContent rows with one query per content type.
+
+    Objects are returned in the order of the given rows (i.e. `position` order for
+    `page.contents`). Rows pointing to missing objects or unknown content types
+    are skipped, mirroring what the generic relation would resolve to.
+    """
+    rows = list(contents)
+    objects = load_content_map(rows, fields)
+    if settings.COUNTER_SHARDS:
+        attach_shard_totals(objects)
+
+    items: List[models.Model] = []
+    for pc in rows:
+        obj = objects.get((pc.content_type_id, pc.object_id))
+        if obj is not None:
+            items.append(obj)
+    return items
+
+
+async def aload_content_map(
+    contents: Iterable[PageContent], fields: Optional[Collection[str]] = None
+) -> Dict[Tuple[int, int], models.Model]:
+    """Async `load_content_map` built on the async ORM."""
+    objects: Dict[Tuple[int, int], models.Model] = {}
+    for ct_id, ids in _group_ids_by_ct(contents).items():
+        if ct_id not in _content_models:
+            ct = await ContentType.objects.aget(pk=ct_id)
+            _content_models[ct_id] = ct.model_class()
+        model = _content_models[ct_id]
+        if model is None:
+            continue
+        async for obj in _content_queryset(model, ids, fields):
+            objects[(ct_id, obj.pk)] = obj
+    return objects
+
+
+def attach_shard_totals(objects: Dict[Tuple[int, int], models.Model]) -> None:
+    """Add counter shard sums to `counter` of objects loaded for rendering only."""
+    objects = {
+        pair: obj
+        for pair, obj in objects.items()
+        if "counter" not in obj.get_deferred_fields()
+    }
+    totals = shard_totals(objects)
+    for pair, obj in objects.items():
+        obj.counter += totals.get(pair, 0)
+
+
+def add_shard_totals(
+    counters: Dict[Tuple[str, int], int],
+) -> Dict[Tuple[str, int], int]:
+    """Add counter shard sums to `fetch_counters` results."""
+    ct_ids = {
+        item_type: ContentType.objects.get_for_model(model).id
+        for item_type, model in ITEM_TYPE_MODELS.items()
+    }
+    totals = shard_totals((ct_ids[item_type], obj_id) for item_type, obj_id in counters)
+    return {
+        (item_type, obj_id): counter + totals.get((ct_ids[item_type], obj_id), 0)
+        for (item_type, obj_id), counter in counters.items()
+    }
+
+
+def _counters_query(ids_by_type: Dict[str, Iterable[int]]):
+    querysets = [
+        ITEM_TYPE_MODELS[item_type]
+        .objects.filter(id__in=list(ids))
+        .annotate(item_type=Value(item_type, output_field=CharField()))
+        .values_list("item_type", "id", "counter")
+        for item_type, ids in ids_by_type.items()
+    ]
+    if not querysets:
+        return None
+    return querysets[0].union(*querysets[1:], all=True)
+
+
+def fetch_counters(
+    ids_by_type: Dict[str, Iterable[int]],
+) -> Dict[Tuple[str, int], int]:
+    """Current `counter` values keyed by `(item type, id)`, in a single query."""
+    query = _counters_query(ids_by_type)
+    if query is None:
+        return {}
+    counters = {(item_type, obj_id): counter for item_type, obj_id, counter in query}
+    if settings.COUNTER_SHARDS:
+        counters = add_shard_totals(counters)
+    return counters
+
+
+async def afetch_counters(
+    ids_by_type: Dict[str, Iterable[int]],
+) -> Dict[Tuple[str, int], int]:
+    """Async `fetch_counters`."""
+    query = _counters_query(ids_by_type)
+    if query is None:
+        return {}
+    counters = {
+        (item_type, obj_id): counter async for item_type, obj_id, counter in query
+    }
+    if settings.COUNTER_SHARDS:
+        counters = await sync_to_async(add_shard_totals)(counters)
+    return counters
+
+
+def _item_fields_queries(
+    ids_by_type: Dict[str, Iterable[int]], names: Collection[str]
+) -> List[Tuple[str, List[str], models.QuerySet]]:
+    queries = []
+    for item_type, ids in ids_by_type.items():
+        model = ITEM_TYPE_MODELS[item_type]
+        columns = [f.name for f in model._meta.concrete_fields if f.name in names]
+        if columns:
+            queryset = model.objects.filter(id__in=list(ids)).values("id", *columns)
+            queries.append((item_type, columns, queryset))
+    return queries
+
+
+def fetch_item_fields(
+    ids_by_type: Dict[str, Iterable[int]], names: Collection[str]
+) -> Dict[Tuple[str, int], Dict[str, Any]]:
+    """Values of the given columns keyed by `(item type, id)`.
+
+    Item types whose model has none of the columns are not queried.
+    """
+    values: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    for item_type, columns, queryset in _item_fields_queries(ids_by_type, names):
+        for row in queryset:
+            values[(item_type, row["id"])] = {c: row[c] for c in columns}
+    return values
+
+
+async def afetch_item_fields(
+    ids_by_type: Dict[str, Iterable[int]], names: Collection[str]
+) -> Dict[Tuple[str, int], Dict[str, Any]]:
+    """Async `fetch_item_fields`."""
+    values: Dict[Tuple[str, int], Dict[str, Any]] = {}
+    for item_type, columns, queryset in _item_fields_queries(ids_by_type, names):
+        async for row in queryset:
+            values[(item_type, row["id"])] = {c: row[c] for c in columns}
+    return values
@@ -0,0 +1,211 @@
+import json
+import platform
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max, Min
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.benchmarks import http_get, local_client, run_concurrent, summarize
+from core.models import Audio, Page, PageContent, Video
+from core.seeding import DISTRIBUTION_UNIFORM, DISTRIBUTIONS
+
+ENDPOINT_LIST: str = "list"
+ENDPOINT_DETAIL: str = "detail"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark /api/pages/ and /api/pages/<pk>/ in-process and over HTTP; "
+        "write p50/p95/p99, RPS and SQL queries per request as JSON."
+    )
+
+    def add_arguments(self, parser):
+        # Dataset
+        parser.add_argument(
+            "--seed-data",
+            action="store_true",
+            help="Flush and seed a dataset with seed_demo --stream first.",
+        )
+        parser.add_argument(
+            "--pages", type=int, default=10_000, help="Pages to seed (default: 10000)."
+        )
+        parser.add_argument(
+            "--videos", type=int, default=2_000, help="Videos to seed (default: 2000)."
+        )
+        parser.add_argument(
+            "--audios", type=int, default=2_000, help="Audios to seed (default: 2000)."
+        )
+        parser.add_argument(
+            "--min-items", type=int, default=1, help="Min items per page (default: 1)."
+        )
+        parser.add_argument(
+            "--max-items",
+            type=int,
+            default=20,
+            help="Max items per page (default: 20).",
+        )
+        parser.add_argument(
+            "--distribution",
+            choices=DISTRIBUTIONS,
+            default=DISTRIBUTION_UNIFORM,
+            help="Page size/content reuse distribution (default: uniform).",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Random seed for the dataset and request mix (default: 42).",
+        )
+        # Load
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Requests per endpoint and mode (default: 200).",
+        )
+        parser.add_argument(
+            "--url",
+            default=None,
+            help="Base URL of a running server (e.g. http://127.0.0.1:8000) "
+            "to drive with the concurrent HTTP load generator.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=16,
+            help="Concurrent HTTP clients (default: 16).",
+        )
+        parser.add_argument(
+            "--output",
+            default=None,
+            help="Write the JSON report to this file instead of stdout.",
+        )
+
+    def handle(self, *args, **options):
+        if options["seed_data"]:
+            call_command(
+                "seed_demo",
+                "--stream",
+                "--flush",
+                f"--pages={options['pages']}",
+                f"--videos={options['videos']}",
+                f"--audios={options['audios']}",
+                f"--min-items={options['min_items']}",
+                f"--max-items={options['max_items']}",
+                f"--distribution={options['distribution']}",
+                f"--seed={options['seed']}",
+                stdout=self.stderr,
+            )
+
+        bounds = Page.objects.aggregate(low=Min("id"), high=Max("id"))
+        if bounds["low"] is None:
+            raise CommandError("No pages found; pass --seed-data to create a dataset.")
+
+        rng = random.Random(options["seed"])
+        requests: int = options["requests"]
+        paths: Dict[str, List[str]] = {
+            ENDPOINT_LIST: [reverse("page-list")] * requests,
+            ENDPOINT_DETAIL: [
+                reverse(
+                    "page-detail",
+                    kwargs={"pk": rng.randint(bounds["low"], bounds["high"])},
+                )
+                for _ in range(requests)
+            ],
+        }
+
+        results = [self._in_process(name, urls) for name, urls in paths.items()]
+        if options["url"]:
+            base = options["url"].rstrip("/")
+            results += [
+                self._http(name, base, urls, options["concurrency"])
+                for name, urls in paths.items()
+            ]
+
+        report = {
+            "meta": self._meta(),
+            "dataset": {
+                "pages": Page.objects.count(),
+                "videos": Video.objects.count(),
+                "audios": Audio.objects.count(),
+                "page_contents": PageContent.objects.count(),
+            },
+            "results": results,
+        }
+        payload = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(payload + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(payload)
+
+    def _in_process(self, endpoint: str, urls: List[str]) -> Dict[str, Any]:
+        """Sequential requests through the Django test client, counting SQL."""
+        client = local_client()
+        client.get(urls[0])  # warm-up: URL resolver, ContentType cache
+
+        samples: List[float] = []
+        queries: List[int] = []
+        errors = 0
+        started = time.perf_counter()
+        for url in urls:
+            with CaptureQueriesContext(connection) as ctx:
+                t0 = time.perf_counter()
+                resp = client.get(url)
+                samples.append((time.perf_counter() - t0) * 1000)
+            queries.append(len(ctx.captured_queries))
+            errors += resp.status_code != 200
+        elapsed = time.perf_counter() - started
+        return self._row(endpoint, "in-process", samples, errors, elapsed, queries)
+
+    def _http(
+        self, endpoint: str, base: str, urls: List[str], concurrency: int
+    ) -> Dict[str, Any]:
+        """Concurrent requests against a running server."""
+
+        def fetch(n: int) -> bool:
+            return http_get(base + urls[n])
+
+        samples, errors, elapsed = run_concurrent(fetch, len(urls), concurrency)
+        row = self._row(endpoint, "http", samples, errors, elapsed, None)
+        row["concurrency"] = concurrency
+        return row
+
+    def _row(self, endpoint, mode, samples, errors, elapsed, queries):
+        return {
+            "endpoint": endpoint,
+            "mode": mode,
+            "requests": len(samples),
+            "errors": errors,
+            "rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+            **summarize(samples),
+            "queries_per_request": (
+                round(sum(queries) / len(queries), 2) if queries else None
+            ),
+        }
+
+    def _meta(self) -> Dict[str, Any]:
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "settings": {
+                "PAGE_DETAIL_CACHE_ENABLED": settings.PAGE_DETAIL_CACHE_ENABLED,
+                "PAGE_SNAPSHOT_ENABLED": settings.PAGE_SNAPSHOT_ENABLED,
+                "COUNTER_MODE": settings.COUNTER_MODE,
+                "PAGES_PAGINATION": settings.PAGES_PAGINATION,
+                "PAGES_FAST_SERIALIZATION": settings.PAGES_FAST_SERIALIZATION,
+                "API_ORJSON_RENDERER": settings.API_ORJSON_RENDERER,
+            },
+        }
@@ -0,0 +1,155 @@
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.urls import reverse
+
+from core.benchmarks import http_get, run_concurrent, summarize
+from core.models import Page
+
+VIEW_SYNC: str = "sync"
+VIEW_ASYNC: str = "async"
+
+ROUTES: Dict[str, Dict[str, str]] = {
+    VIEW_SYNC: {"list": "page-list", "detail": "page-detail"},
+    VIEW_ASYNC: {"list": "async-page-list", "detail": "async-page-detail"},
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the sync PageViewSet with the async views under uvicorn "
+        "at the same concurrency; print p50/p95/p99 and RPS as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Requests per endpoint and view (default: 500).",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=32,
+            help="Concurrent HTTP clients (default: 32).",
+        )
+        parser.add_argument(
+            "--url",
+            default=None,
+            help="Base URL of an already running ASGI server; "
+            "by default uvicorn is started on a free local port.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="uvicorn worker processes when starting the server (default: 1).",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Random seed for the request mix (default: 42).",
+        )
+
+    def handle(self, *args, **options):
+        bounds = Page.objects.aggregate(low=Min("id"), high=Max("id"))
+        if bounds["low"] is None:
+            raise CommandError("No pages found; run seed_demo first.")
+
+        server: Optional[subprocess.Popen] = None
+        base = options["url"]
+        if base is None:
+            port = _free_port()
+            base = f"http://127.0.0.1:{port}"
+            server = self._start_uvicorn(port, options["workers"])
+        base = base.rstrip("/")
+
+        try:
+            self._wait_ready(base + reverse("page-list"), server)
+            rng = random.Random(options["seed"])
+            page_ids = [
+                rng.randint(bounds["low"], bounds["high"])
+                for _ in range(options["requests"])
+            ]
+            results: List[Dict[str, Any]] = []
+            for endpoint in ("list", "detail"):
+                for view, routes in ROUTES.items():
+                    if endpoint == "list":
+                        urls = [reverse(routes["list"])] * len(page_ids)
+                    else:
+                        urls = [
+                            reverse(routes["detail"], kwargs={"pk": pk})
+                            for pk in page_ids
+                        ]
+                    results.append(
+                        self._run(view, endpoint, base, urls, options["concurrency"])
+                    )
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+
+        self.stdout.write(json.dumps({"url": base, "results": results}, indent=2))
+
+    def _start_uvicorn(self, port: int, workers: int) -> subprocess.Popen:
+        cmd = [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "project.asgi:application",
+            "--host=127.0.0.1",
+            f"--port={port}",
+            f"--workers={workers}",
+            "--log-level=warning",
+            "--no-access-log",
+        ]
+        env = dict(os.environ)
+        env.setdefault("DJANGO_SETTINGS_MODULE", "project.settings")
+        return subprocess.Popen(cmd, env=env)
+
+    def _wait_ready(
+        self, url: str, server: Optional[subprocess.Popen], timeout: float = 30.0
+    ) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server is not None and server.poll() is not None:
+                raise CommandError("uvicorn exited before accepting requests.")
+            if http_get(url, timeout=1.0):
+                return
+            time.sleep(0.2)
+        raise CommandError(f"Server at {url} did not become ready in {timeout}s.")
+
+    def _run(
+        self, view: str, endpoint: str, base: str, urls: List[str], concurrency: int
+    ) -> Dict[str, Any]:
+        http_get(base + urls[0])  # warm-up
+
+        def fetch(n: int) -> bool:
+            return http_get(base + urls[n])
+
+        samples, errors, elapsed = run_concurrent(fetch, len(urls), concurrency)
+        return {
+            "view": view,
+            "endpoint": endpoint,
+            "concurrency": concurrency,
+            "requests": len(samples),
+            "errors": errors,
+            "rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+            **summarize(samples),
+        }
@@ -0,0 +1,132 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import override_settings
+
+from core.benchmarks import summarize
+from core.models import CounterShard, Video
+from core.tasks import apply_counter_deltas
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer the counters of a few hot videos from many parallel workers, "
+        "with the plain `counter` UPDATE and with counter shards; print JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=32,
+            help="Parallel workers, each with its own connection (default: 32).",
+        )
+        parser.add_argument(
+            "--increments",
+            type=int,
+            default=200,
+            help="Increments per worker (default: 200).",
+        )
+        parser.add_argument(
+            "--objects",
+            type=int,
+            default=1,
+            help="Hot videos incremented together by every call (default: 1).",
+        )
+        parser.add_argument(
+            "--shards",
+            default="0,16",
+            help="Comma-separated COUNTER_SHARDS values to compare; 0 is the "
+            "plain UPDATE (default: 0,16).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            modes = [int(n) for n in options["shards"].split(",")]
+        except ValueError:
+            raise CommandError("--shards must be a comma-separated list of ints.")
+        if connection.vendor == "sqlite":
+            self.stderr.write(
+                "SQLite serializes all writers on a database lock; "
+                "row-lock contention only shows on PostgreSQL."
+            )
+
+        ct_id = ContentType.objects.get_for_model(Video).id
+        ids = list(
+            Video.objects.order_by("id").values_list("id", flat=True)[
+                : options["objects"]
+            ]
+        )
+        if not ids:
+            raise CommandError("No videos found; run seed_demo first.")
+        deltas = {(ct_id, obj_id): 1 for obj_id in ids}
+
+        results = [
+            self._run(shards, deltas, options["workers"], options["increments"])
+            for shards in modes
+        ]
+        self.stdout.write(
+            json.dumps(
+                {"database": connection.vendor, "objects": ids, "results": results},
+                indent=2,
+            )
+        )
+
+    def _total(self, deltas: Dict[Any, int]) -> int:
+        ids = [obj_id for _, obj_id in deltas]
+        ct_id = next(iter(deltas))[0]
+        counter = Video.objects.filter(id__in=ids).aggregate(s=Sum("counter"))["s"]
+        shards = CounterShard.objects.filter(
+            content_type_id=ct_id, object_id__in=ids
+        ).aggregate(s=Sum("count"))["s"]
+        return (counter or 0) + (shards or 0)
+
+    def _run(
+        self, shards: int, deltas: Dict[Any, int], workers: int, increments: int
+    ) -> Dict[str, Any]:
+        samples: List[float] = []
+        errors = 0
+        lock = threading.Lock()
+
+        def worker(_: int) -> None:
+            nonlocal errors
+            local: List[float] = []
+            failed = 0
+            try:
+                for _ in range(increments):
+                    start = time.perf_counter()
+                    try:
+                        apply_counter_deltas(deltas)
+                    except Exception:
+                        failed += 1
+                    local.append((time.perf_counter() - start) * 1000)
+            finally:
+                connection.close()  # per-thread connection
+            with lock:
+                samples.extend(local)
+                errors += failed
+
+        before = self._total(deltas)
+        with override_settings(COUNTER_SHARDS=shards):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(worker, range(workers)))
+            elapsed = time.perf_counter() - started
+        applied = (self._total(deltas) - before) // len(deltas)
+
+        return {
+            "shards": shards,
+            "workers": workers,
+            "calls": len(samples),
+            "errors": errors,
+            "lost": len(samples) - errors - applied,
+            "calls_per_s": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+            **summarize(samples),
+        }
@@ -0,0 +1,175 @@
+import json
+import random
+from typing import Dict, List
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max, Min
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import resolve, reverse
+
+from core.benchmarks import local_client, summarize, time_calls
+from core.metrics import MetricsMiddleware, RequestStats, collecting
+from core.models import Page
+
+MODE_OFF: str = "off"
+MODE_ON: str = "on"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the overhead of MetricsMiddleware on /api/pages/ and "
+        "/api/pages/<pk>/: the same requests with METRICS_ENABLED off and on."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed-data",
+            action="store_true",
+            help="Flush and seed a dataset with seed_demo --stream first.",
+        )
+        parser.add_argument(
+            "--pages", type=int, default=1_000, help="Pages to seed (default: 1000)."
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=200,
+            help="Timed requests per endpoint, mode and round (default: 200).",
+        )
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=5,
+            help="Alternating off/on rounds, to even out drift (default: 5).",
+        )
+        parser.add_argument(
+            "--seed", type=int, default=42, help="Random seed (default: 42)."
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print results as JSON.",
+        )
+
+    def handle(self, *args, **options):
+        if options["seed_data"]:
+            call_command(
+                "seed_demo",
+                "--stream",
+                "--flush",
+                f"--pages={options['pages']}",
+                f"--seed={options['seed']}",
+                stdout=self.stderr,
+            )
+        bounds = Page.objects.aggregate(low=Min("id"), high=Max("id"))
+        if bounds["low"] is None:
+            raise CommandError("No pages found; pass --seed-data to create a dataset.")
+
+        rng = random.Random(options["seed"])
+        requests: int = options["requests"]
+        endpoints: Dict[str, List[str]] = {
+            "list": [reverse("page-list")],
+            "detail": [
+                reverse(
+                    "page-detail",
+                    kwargs={"pk": rng.randint(bounds["low"], bounds["high"])},
+                )
+                for _ in range(requests)
+            ],
+        }
+
+        results = []
+        for endpoint, urls in endpoints.items():
+            # Untimed pass: fill the page cache and snapshots for both modes
+            client = local_client()
+            for url in urls:
+                client.get(url)
+            samples: Dict[str, List[float]] = {MODE_OFF: [], MODE_ON: []}
+            for n in range(options["rounds"]):
+                # off, on / on, off / ...: drift hits both modes alike
+                modes = (MODE_OFF, MODE_ON) if n % 2 == 0 else (MODE_ON, MODE_OFF)
+                for mode in modes:
+                    samples[mode] += self._measure(urls, requests, mode == MODE_ON)
+            off, on = summarize(samples[MODE_OFF]), summarize(samples[MODE_ON])
+            overhead = on["mean_ms"] - off["mean_ms"]
+            results.append(
+                {
+                    "endpoint": endpoint,
+                    MODE_OFF: off,
+                    MODE_ON: on,
+                    "overhead_ms": round(overhead, 3),
+                    "overhead_pct": (
+                        round(overhead / off["mean_ms"] * 100, 2)
+                        if off["mean_ms"]
+                        else 0.0
+                    ),
+                }
+            )
+
+        costs = self._costs(endpoints["detail"][0], requests * options["rounds"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"results": results, **costs}, indent=2))
+            return
+        for row in results:
+            self.stdout.write(
+                f"{row['endpoint']:>6}: mean {row[MODE_OFF]['mean_ms']:.3f} ms off, "
+                f"{row[MODE_ON]['mean_ms']:.3f} ms on, "
+                f"overhead {row['overhead_ms']:+.3f} ms ({row['overhead_pct']:+.2f}%)"
+            )
+        self.stdout.write(
+            f"middleware {costs['middleware_us']:.2f} us per request, "
+            f"SQL wrapper {costs['query_wrapper_us']:.2f} us per query"
+        )
+
+    def _costs(self, url: str, repeat: int) -> Dict[str, float]:
+        """Cost of the middleware alone and of the SQL wrapper, in microseconds.
+
+        End-to-end differences above are within request-to-request noise; these
+        isolate what the instrumentation adds.
+        """
+        request = RequestFactory().get(url)
+        request.resolver_match = resolve(url)
+
+        def bare(request):
+            return HttpResponse()
+
+        with override_settings(METRICS_ENABLED=True):
+            wrapped = MetricsMiddleware(bare)
+        middleware = self._median_us(lambda: wrapped(request), repeat) - (
+            self._median_us(lambda: bare(request), repeat)
+        )
+
+        def query():
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+
+        plain = self._median_us(query, repeat)
+        with collecting(RequestStats()):
+            instrumented = self._median_us(query, repeat)
+        return {
+            "middleware_us": round(middleware, 2),
+            "query_wrapper_us": round(instrumented - plain, 2),
+        }
+
+    def _median_us(self, fn, repeat: int) -> float:
+        return summarize(time_calls(fn, repeat, warmup=100))["p50_ms"] * 1000
+
+    def _measure(self, urls: List[str], requests: int, enabled: bool) -> List[float]:
+        """Sequential requests through a client built with metrics on or off."""
+        # The middleware chain is built on the client's first request
+        with override_settings(METRICS_ENABLED=enabled):
+            client = local_client()
+            client.get(urls[0])  # warm-up
+        position = 0
+
+        def call():
+            nonlocal position
+            resp = client.get(urls[position % len(urls)])
+            assert resp.status_code == 200, resp.status_code
+            position += 1
+
+        return time_calls(call, requests, warmup=0)
@@ -0,0 +1,122 @@
+import json
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from rest_framework.pagination import Cursor
+
+from core.benchmarks import local_client, summarize, time_calls
+from core.constants import PAGINATION_CURSOR, PAGINATION_PAGE
+from core.models import Page
+from core.pagination import PageCursorPagination
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare /api/pages/ latency on the first and a deep page for page-number "
+        "and cursor pagination."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--page-number",
+            type=int,
+            default=10_000,
+            help="Deep page to compare with page 1 (default: 10000).",
+        )
+        parser.add_argument(
+            "--page-size",
+            type=int,
+            default=5,
+            help="Items per page (default: 5).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=50,
+            help="Timed requests per case (default: 50).",
+        )
+        parser.add_argument(
+            "--ensure-pages",
+            action="store_true",
+            help="Create missing Page rows so the deep page exists.",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print results as JSON.",
+        )
+
+    def handle(self, *args, **options):
+        page_number: int = options["page_number"]
+        page_size: int = options["page_size"]
+        repeat: int = options["repeat"]
+
+        needed = page_number * page_size
+        existing = Page.objects.count()
+        if existing < needed:
+            if not options["ensure_pages"]:
+                self.stderr.write(
+                    self.style.ERROR(
+                        f"Need {needed} pages, found {existing}; "
+                        "pass --ensure-pages to create them."
+                    )
+                )
+                return
+            self._create_pages(needed - existing)
+
+        client = local_client()
+        url = reverse("page-list")
+        offset = (page_number - 1) * page_size
+        cases = {
+            (PAGINATION_PAGE, 1): {"page": 1},
+            (PAGINATION_PAGE, page_number): {"page": page_number},
+            (PAGINATION_CURSOR, 1): {},
+            (PAGINATION_CURSOR, page_number): {"cursor": self._cursor_at(offset)},
+        }
+
+        results = []
+        for (mode, number), params in cases.items():
+            query = urlencode({"pagination": mode, "page_size": page_size, **params})
+
+            def call(query=query):
+                resp = client.get(f"{url}?{query}")
+                assert resp.status_code == 200, resp.status_code
+
+            results.append(
+                {
+                    "pagination": mode,
+                    "page": number,
+                    **summarize(time_calls(call, repeat)),
+                }
+            )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for row in results:
+            self.stdout.write(
+                f"{row['pagination']:>7} page {row['page']:>7}: "
+                f"p50 {row['p50_ms']:.2f} ms, p95 {row['p95_ms']:.2f} ms"
+            )
+
+    def _create_pages(self, count: int, batch_size: int = 10_000):
+        self.stdout.write(f"Creating {count} pages...")
+        for start in range(0, count, batch_size):
+            size = min(batch_size, count - start)
+            Page.objects.bulk_create(
+                [Page(title=f"Bench page {start + i}") for i in range(size)]
+            )
+
+    def _cursor_at(self, offset: int) -> str:
+        """Encode the cursor a client would hold after reading `offset` rows."""
+        last_id = Page.objects.order_by(*PageCursorPagination.ordering).values_list(
+            "id", flat=True
+        )[offset - 1]
+        paginator = PageCursorPagination()
+        paginator.base_url = "/"
+        link = paginator.encode_cursor(
+            Cursor(offset=0, reverse=False, position=str(last_id))
+        )
+        return parse_qs(urlsplit(link).query)[paginator.cursor_query_param][0]
@@ -0,0 +1,123 @@
+import json
+from urllib.parse import urlencode
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from core.benchmarks import local_client, summarize, time_calls
+from core.models import Audio, Video
+
+DEFAULT_QUERIES = ("pagination", "background tasks", "audio 4242", "missingword")
+DEFAULT_PREFIXES = ("video #4242", "audio #1")
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure /api/search/ and admin-style title prefix search latency "
+        "(seed 1M rows with --seed-data --videos 500000 --audios 500000)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--seed-data",
+            action="store_true",
+            help="Flush and seed videos/audios with seed_demo --stream first.",
+        )
+        parser.add_argument(
+            "--videos", type=int, default=500_000, help="Videos to seed."
+        )
+        parser.add_argument(
+            "--audios", type=int, default=500_000, help="Audios to seed."
+        )
+        parser.add_argument(
+            "--query",
+            action="append",
+            dest="queries",
+            help="Full-text query, repeatable "
+            f"(default: {', '.join(DEFAULT_QUERIES)}).",
+        )
+        parser.add_argument(
+            "--prefix",
+            action="append",
+            dest="prefixes",
+            help="Title prefix, repeatable "
+            f"(default: {', '.join(DEFAULT_PREFIXES)}).",
+        )
+        parser.add_argument(
+            "--page",
+            type=int,
+            default=1,
+            help="Result page of /api/search/ (default: 1).",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=50,
+            help="Timed calls per case (default: 50).",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print results as JSON.",
+        )
+
+    def handle(self, *args, **options):
+        if options["seed_data"]:
+            call_command(
+                "seed_demo",
+                "--flush",
+                "--stream",
+                "--pages=0",
+                f"--videos={options['videos']}",
+                f"--audios={options['audios']}",
+                stdout=self.stdout,
+            )
+        rows = Video.objects.count() + Audio.objects.count()
+        if not rows:
+            raise CommandError("No videos/audios found; pass --seed-data.")
+
+        client = local_client()
+        url = reverse("search")
+        repeat: int = options["repeat"]
+        results = []
+        for query in options["queries"] or DEFAULT_QUERIES:
+            params = urlencode({"q": query, "page": options["page"]})
+
+            def call(params=params):
+                resp = client.get(f"{url}?{params}")
+                assert resp.status_code == 200, resp.status_code
+
+            results.append(
+                {
+                    "case": "fulltext",
+                    "input": query,
+                    **summarize(time_calls(call, repeat)),
+                }
+            )
+        for prefix in options["prefixes"] or DEFAULT_PREFIXES:
+            # What the admin changelist search runs, first page of 100
+            def call(prefix=prefix):
+                list(
+                    Video.objects.filter(title__iprefix=prefix)
+                    .order_by("-id")
+                    .values_list("id", flat=True)[:100]
+                )
+
+            results.append(
+                {
+                    "case": "prefix",
+                    "input": prefix,
+                    **summarize(time_calls(call, repeat)),
+                }
+            )
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"rows": rows, "results": results}, indent=2))
+            return
+        self.stdout.write(f"{rows} videos and audios")
+        for row in results:
+            self.stdout.write(
+                f"{row['case']:>8} {row['input']!r:>22}: "
+                f"p50 {row['p50_ms']:.2f} ms, p95 {row['p95_ms']:.2f} ms"
+            )
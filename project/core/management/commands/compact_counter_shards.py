@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.counters import SHARD_COMPACT_BATCH, compact_shards
+
+
+class Command(BaseCommand):
+    help = "Fold CounterShard rows into the objects' `counter` and delete them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=SHARD_COMPACT_BATCH,
+            help=f"Shard rows folded per transaction (default: {SHARD_COMPACT_BATCH}).",
+        )
+
+    def handle(self, *args, **options):
+        batch_size: int = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be >= 1")
+
+        started = time.perf_counter()
+        folded = compact_shards(batch_size)
+        if folded is None:
+            self.stdout.write("Another compaction is running; nothing done.")
+            return
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(f"Folded {folded} counter shard rows in {elapsed:.2f}s.")
+        )
@@ -0,0 +1,76 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.importing import RecordError, import_lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Import pages, videos and audios from NDJSON, upserting by external_id "
+        "(format: see core/importing.py)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="NDJSON file to import, or - to read standard input.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Records imported per transaction (default: 1000).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Run the import in a transaction that is rolled back at the end.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size: int = options["chunk_size"]
+        dry_run: bool = options["dry_run"]
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be >= 1")
+
+        started = time.perf_counter()
+
+        def report(stats):
+            self.stdout.write(f"Imported {stats['records']} records")
+
+        path = options["path"]
+        try:
+            stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+        except OSError as exc:
+            raise CommandError(f"Cannot read {path}: {exc}") from exc
+        try:
+            stats = import_lines(stream, chunk_size, dry_run, on_chunk=report)
+        except RecordError as exc:
+            # Chunks before the failing one are committed (unless --dry-run);
+            # upserts are idempotent, so the fixed file can simply be re-run
+            raise CommandError(str(exc)) from exc
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.perf_counter() - started
+        counts = ", ".join(
+            f"{stats[f'{kind}_created']}/{stats[f'{kind}_updated']} {kind}s"
+            for kind in ("video", "audio", "page")
+        )
+        summary = (
+            f"{'Dry run: would import' if dry_run else 'Imported'} "
+            f"{stats['records']} records (created/updated: {counts}), "
+            f"{stats['links']} page-content links "
+            f"in {elapsed:.1f}s ({stats['records'] / max(elapsed, 1e-9):.0f} rows/s)."
+        )
+        self.stdout.write(self.style.SUCCESS(summary))
+        if stats["unresolved_items"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Skipped {stats['unresolved_items']} page items referencing "
+                    "unknown external ids."
+                )
+            )
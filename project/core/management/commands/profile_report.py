@@ -0,0 +1,75 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import hot_functions, merge_stacks, read_profiles, write_collapsed
+
+SORT_SELF: str = "self"
+SORT_TOTAL: str = "total"
+
+
+class Command(BaseCommand):
+    help = (
+        "Merge the sampling profiler's files (PROFILING_DIR) into a ranked "
+        "hot-function report and a collapsed-stack file for flamegraph tools."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dir",
+            default=None,
+            help="Profile directory (default: PROFILING_DIR).",
+        )
+        parser.add_argument(
+            "--top",
+            type=int,
+            default=30,
+            help="Functions to list (default: 30).",
+        )
+        parser.add_argument(
+            "--sort",
+            choices=(SORT_SELF, SORT_TOTAL),
+            default=SORT_SELF,
+            help="Rank by samples on top of the stack (self) or anywhere in it "
+            "(total) (default: self).",
+        )
+        parser.add_argument(
+            "--collapsed",
+            default=None,
+            help="Also write the merged stacks to this file "
+            "(e.g. `flamegraph.pl profile.collapsed > profile.svg`).",
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(options["dir"] or settings.PROFILING_DIR)
+        profiles = list(read_profiles(directory))
+        stacks = merge_stacks(profiles)
+        samples = sum(stacks.values())
+        if not samples:
+            raise CommandError(
+                f"No profile samples in {directory}; "
+                "enable PROFILING_ENABLED and send some traffic first."
+            )
+
+        duration = sum(profile["duration_ms"] for profile in profiles)
+        self.stdout.write(
+            f"{len(profiles)} profiled requests, {duration:.0f} ms, "
+            f"{samples} samples"
+        )
+        rank = 1 if options["sort"] == SORT_SELF else 2
+        rows = sorted(hot_functions(stacks), key=lambda row: (-row[rank], row[0]))
+        rows = rows[: options["top"]]
+        self.stdout.write(
+            f"{'self%':>7} {'total%':>7} {'self':>7} {'total':>7}  function"
+        )
+        for name, own, total in rows:
+            self.stdout.write(
+                f"{own / samples:>7.1%} {total / samples:>7.1%} "
+                f"{own:>7} {total:>7}  {name}"
+            )
+
+        if options["collapsed"]:
+            with open(options["collapsed"], "w", encoding="utf-8") as fh:
+                write_collapsed(stacks, fh)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['collapsed']}"))
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        "Recreate missing full-text search tables/triggers/columns and reindex "
+        "all videos and audios."
+    )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rebuild_search_index()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(f"Search index rebuilt in {elapsed:.2f}s.")
+        )
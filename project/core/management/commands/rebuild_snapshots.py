@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.models import Page
+from core.snapshots import rebuild_snapshots
+
+
+class Command(BaseCommand):
+    help = "Rebuild PageSnapshot rows in chunks (backfill or full refresh)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Pages rebuilt per transaction (default: 1000).",
+        )
+        parser.add_argument(
+            "--only-missing",
+            action="store_true",
+            help="Skip pages that already have a snapshot.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size: int = options["chunk_size"]
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be >= 1")
+
+        pages = Page.objects.order_by("id")
+        if options["only_missing"]:
+            pages = pages.filter(snapshot__isnull=True)
+
+        # Keyset iteration: each chunk is an indexed range scan, not an OFFSET
+        total, last_id = 0, 0
+        while True:
+            ids = list(
+                pages.filter(id__gt=last_id).values_list("id", flat=True)[:chunk_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                total += rebuild_snapshots(ids)
+            last_id = ids[-1]
+            self.stdout.write(f"Rebuilt {total} snapshots (last page id {last_id})")
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {total} page snapshots."))
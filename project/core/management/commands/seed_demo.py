@@ -1,15 +1,31 @@
+import multiprocessing
 import random
+import time
 from typing import List
 
 from django.contrib.contenttypes.models import ContentType
+from django.conf import settings
+from django.core.cache import cache, caches
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
 
+from core import seeding
 from core.constants import (
     CDN_SUBS_BASE,
     CDN_VIDEO_BASE,
 )
-from core.models import Audio, Page, PageContent, Video
+from core.models import (
+    Audio,
+    CounterShard,
+    Page,
+    PageContent,
+    PageSnapshot,
+    TrendingScore,
+    Video,
+    ViewBucket,
+    ViewRollup,
+)
 
 
 class Command(BaseCommand):
@@ -62,6 +78,37 @@ class Command(BaseCommand):
             default=None,
             help="Random seed for reproducible data (default: None).",
         )
+        # Streaming mode for multi-million-row datasets
+        parser.add_argument(
+            "--stream",
+            action="store_true",
+            help="Generate rows in fixed-size chunks with bounded memory "
+            "(COPY on PostgreSQL).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10_000,
+            help="Rows per chunk/transaction in --stream mode (default: 10000).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Worker processes in --stream mode, PostgreSQL only (default: 1).",
+        )
+        parser.add_argument(
+            "--distribution",
+            choices=seeding.DISTRIBUTIONS,
+            default=seeding.DISTRIBUTION_UNIFORM,
+            help="Page sizes and content reuse: uniform or zipf (default: uniform).",
+        )
+        parser.add_argument(
+            "--zipf-exponent",
+            type=float,
+            default=1.2,
+            help="Exponent of the zipf distribution (default: 1.2).",
+        )
 
     def handle(self, *args, **options):
         pages_count: int = options["pages"]
@@ -84,6 +131,10 @@ class Command(BaseCommand):
         if seed_value is not None:
             random.seed(seed_value)
 
+        if options["stream"]:
+            self._seed_stream(options)
+            return
+
         # Optionally flush old data
         if do_flush:
             self._flush_demo()
@@ -95,7 +146,14 @@ class Command(BaseCommand):
             pages = self._create_pages(pages_count)
 
             # Attach content to pages in ordered fashion
-            self._attach_content_to_pages(pages, videos, audios, min_items, max_items)
+            sampler = None
+            if options["distribution"] == seeding.DISTRIBUTION_ZIPF:
+                sampler = seeding.Sampler(
+                    seeding.DISTRIBUTION_ZIPF, random, options["zipf_exponent"]
+                )
+            self._attach_content_to_pages(
+                pages, videos, audios, min_items, max_items, sampler
+            )
 
         self.stdout.write(
             self.style.SUCCESS(
@@ -109,13 +167,120 @@ class Command(BaseCommand):
     # ---------------------------
 
     def _flush_demo(self):
-        """Delete all demo data. Keep order: PageContent -> Video/Audio -> Page."""
-        # NOTE: We are aggressive here; if you need selective cleanup, adjust filters.
+        """Delete all demo data by truncating the tables.
+
+        Rows are not loaded and no per-row signals fire, so this stays fast on
+        multi-million-row tables; id sequences restart from 1.
+        """
         self.stdout.write("Flushing existing demo data...")
-        PageContent.objects.all().delete()
-        Video.objects.all().delete()
-        Audio.objects.all().delete()
-        Page.objects.all().delete()
+        tables = [
+            m._meta.db_table
+            for m in (
+                PageSnapshot,
+                PageContent,
+                CounterShard,
+                TrendingScore,
+                ViewBucket,
+                ViewRollup,
+                Video,
+                Audio,
+            )
+        ]
+        tables.append(Page._meta.db_table)
+        with transaction.atomic(), connection.cursor() as cursor:
+            for sql in connection.ops.sql_flush(
+                no_style(), tables, reset_sequences=True, allow_cascade=True
+            ):
+                cursor.execute(sql)
+        # Cached bodies and buffered increments refer to ids that may now be reused
+        cache.clear()
+        caches[settings.COUNTER_BUFFER_CACHE].clear()
+
+    def _seed_stream(self, options):
+        """Chunked, bounded-memory seeding, optionally fanned out over processes."""
+        chunk_size: int = options["chunk_size"]
+        workers: int = options["workers"]
+        videos_count: int = options["videos"]
+        audios_count: int = options["audios"]
+        pages_count: int = options["pages"]
+        base_seed: int = options["seed"] if options["seed"] is not None else 0
+
+        if chunk_size < 1:
+            self.stderr.write(self.style.ERROR("--chunk-size must be >= 1"))
+            return
+        if videos_count + audios_count < 1:
+            self.stderr.write(self.style.ERROR("--videos or --audios must be >= 1"))
+            return
+        if workers > 1 and connection.vendor != "postgresql":
+            self.stdout.write("Concurrent writers need PostgreSQL; using 1 worker.")
+            workers = 1
+
+        if options["flush"]:
+            self._flush_demo()
+
+        started = time.perf_counter()
+        video_start = seeding.next_free_id(Video)
+        audio_start = seeding.next_free_id(Audio)
+        page_start = seeding.next_free_id(Page)
+        content = {
+            "video_start": video_start,
+            "videos": videos_count,
+            "audio_start": audio_start,
+            "audios": audios_count,
+            "min_items": options["min_items"],
+            "max_items": options["max_items"],
+            "distribution": options["distribution"],
+            "zipf_exponent": options["zipf_exponent"],
+        }
+
+        jobs = [
+            (seeding.seed_videos, (start, count, chunk_size, base_seed + n))
+            for n, (start, count) in enumerate(
+                seeding.split_range(video_start, videos_count, workers)
+            )
+        ]
+        jobs += [
+            (seeding.seed_audios, (start, count, chunk_size, base_seed + n))
+            for n, (start, count) in enumerate(
+                seeding.split_range(audio_start, audios_count, workers)
+            )
+        ]
+        # Content pools must exist before pages reference them
+        self._run_jobs(jobs, workers)
+        links = self._run_jobs(
+            [
+                (seeding.seed_pages, (start, count, content, chunk_size, base_seed + n))
+                for n, (start, count) in enumerate(
+                    seeding.split_range(page_start, pages_count, workers)
+                )
+            ],
+            workers,
+        )
+        seeding.reset_sequences([Video, Audio, Page])
+
+        elapsed = time.perf_counter() - started
+        rows = videos_count + audios_count + pages_count + links
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Seeded {pages_count} pages, {videos_count} videos, "
+                f"{audios_count} audios, {links} page-content links "
+                f"in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/s)."
+            )
+        )
+        self.stdout.write(
+            "Page snapshots are built on first read; "
+            "run `rebuild_snapshots --only-missing` to backfill them."
+        )
+
+    def _run_jobs(self, jobs, workers: int) -> int:
+        """Run `(func, args)` jobs inline or in a fork-based process pool."""
+        if workers <= 1:
+            return sum(func(*args) for func, args in jobs)
+        # Children must not share the parent's database connection
+        connections.close_all()
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            results = [pool.apply_async(func, args) for func, args in jobs]
+            return sum(r.get() for r in results)
 
     def _create_videos(self, count: int) -> List[Video]:
         """Create a pool of Video objects."""
@@ -172,8 +337,13 @@ class Command(BaseCommand):
         audios: List[Audio],
         min_items: int,
         max_items: int,
+        sampler: seeding.Sampler | None = None,
     ):
-        """Attach content to pages in a random order with explicit positions."""
+        """Attach content to pages in a random order with explicit positions.
+
+        With a zipf `sampler`, page sizes and picked videos/audios follow it
+        instead of the uniform size / round-robin selection.
+        """
         # Build ContentTypes once for efficiency
         ct_video = ContentType.objects.get_for_model(Video)
         ct_audio = ContentType.objects.get_for_model(Audio)
@@ -184,14 +354,24 @@ class Command(BaseCommand):
 
         for page in pages:
             # Decide how many items this page will have
-            items_count = random.randint(min_items, max_items)
+            if sampler is not None:
+                items_count = sampler.between(min_items, max_items)
+            else:
+                items_count = random.randint(min_items, max_items)
 
             # Mix of videos and audios per page
             mixed_items = []
             for _ in range(items_count):
                 # 50/50 choose video or audio if available
                 pick_video = bool(random.getrandbits(1))
-                if pick_video and videos:
+                if sampler is not None and (videos or audios):
+                    if (pick_video and videos) or not audios:
+                        v = videos[sampler.rank(len(videos))]
+                        mixed_items.append(("video", v.id))
+                    else:
+                        a = audios[sampler.rank(len(audios))]
+                        mixed_items.append(("audio", a.id))
+                elif pick_video and videos:
                     v = videos[v_idx % len(videos)]
                     mixed_items.append(("video", v.id))
                     v_idx += 1
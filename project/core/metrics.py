@@ -0,0 +1,413 @@
+"""Per-endpoint request metrics in the Prometheus text format.
+
+`MetricsMiddleware` times every request and records, per route (URL name) and
+action (viewset action, else the HTTP method):
+
+* a latency histogram;
+* SQL query count and time, through `connection.execute_wrapper`;
+* time spent in request stages: response rendering (`serialization`) and
+  counter enqueueing (`enqueue`, see `timed` in `core.tasks`).
+
+Each worker process sums its requests in memory and writes the totals to its
+own file in `METRICS_DIR` (`metrics-<pid>-<start ns>.json`) at most every
+`METRICS_FLUSH_INTERVAL` seconds and at exit, as prometheus_client does in
+multiprocess mode. `GET /metrics` adds up the files of all processes, so any
+worker answers for the whole host; files of exited workers keep counting, so
+the directory should be emptied when the server is (re)started. The endpoint is
+off by default and, with `METRICS_TOKEN` set, requires
+`Authorization: Bearer <token>`.
+
+Recording costs a dict lookup and a lock per request plus two clock reads per
+query (`bench_metrics` measures it), cheap enough to leave on at full traffic.
+"""
+
+from __future__ import annotations
+
+import atexit
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import (
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseForbidden,
+)
+
+logger = logging.getLogger(__name__)
+
+STAGE_SERIALIZATION: str = "serialization"
+STAGE_ENQUEUE: str = "enqueue"
+UNMATCHED_ROUTE: str = "unmatched"
+
+# Upper bounds of the latency histogram buckets, seconds (Prometheus defaults)
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.075,
+    0.1,
+    0.25,
+    0.5,
+    0.75,
+    1.0,
+    2.5,
+    5.0,
+    7.5,
+    10.0,
+)
+CONTENT_TYPE: str = "text/plain; version=0.0.4; charset=utf-8"
+METRICS_GLOB: str = "metrics-*.json"
+
+Labels = Tuple[str, str]  # (route, action)
+
+
+class RequestStats:
+    """What one request spent; also the `execute_wrapper` counting its SQL."""
+
+    __slots__ = ("queries", "sql_seconds", "stages")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.stages: Dict[str, float] = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - start
+            self.queries += 1
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Add the time spent in the block to `stage` of the current request."""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add(stage, time.perf_counter() - start)
+
+
+def _count_query(execute, sql, params, many, context):
+    """`execute_wrapper` of every connection: count for the current request."""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def _install(connection, **kwargs) -> None:
+    # Connections are per thread; under ASGI sync views run in another thread
+    # than the middleware, but `_current` follows them there
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_count_query)
+
+
+@contextmanager
+def collecting(stats: RequestStats) -> Iterator[RequestStats]:
+    """Add the SQL and stages of the block (in this context) to `stats`."""
+    token = _current.set(stats)
+    try:
+        for conn in connections.all(initialized_only=True):
+            _install(conn)  # opened before `connection_created` was connected
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+class _Series:
+    __slots__ = ("buckets", "count", "seconds", "queries", "sql_seconds", "stages")
+
+    def __init__(self) -> None:
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # the last one is +Inf
+        self.count = 0
+        self.seconds = 0.0
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.stages: Dict[str, float] = {}
+
+    def dump(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def merge(self, data: Dict[str, Any]) -> None:
+        """Add a `dump()` of another series (e.g. another process's)."""
+        self.buckets = [a + b for a, b in zip(self.buckets, data["buckets"])]
+        self.count += data["count"]
+        self.seconds += data["seconds"]
+        self.queries += data["queries"]
+        self.sql_seconds += data["sql_seconds"]
+        for stage, spent in data["stages"].items():
+            self.stages[stage] = self.stages.get(stage, 0.0) + spent
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Labels, **extra: str) -> str:
+    pairs = {"route": labels[0], "action": labels[1], **extra}
+    return ",".join(f'{name}="{_label(value)}"' for name, value in pairs.items())
+
+
+class MetricsRegistry:
+    """Request metrics of this process, keyed by `(route, action)`."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._name = f"metrics-{self._pid}-{time.time_ns()}.json"
+        self._series: Dict[Labels, _Series] = {}
+        self._flushed = 0.0
+
+    def _check_fork(self) -> None:
+        # A forked worker inherits the parent's totals; they are the parent's
+        if self._pid != os.getpid():
+            self._reset()
+
+    def observe(self, labels: Labels, seconds: float, stats: RequestStats) -> None:
+        bucket = bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            self._check_fork()
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = _Series()
+            series.buckets[bucket] += 1
+            series.count += 1
+            series.seconds += seconds
+            series.queries += stats.queries
+            series.sql_seconds += stats.sql_seconds
+            for stage, spent in stats.stages.items():
+                series.stages[stage] = series.stages.get(stage, 0.0) + spent
+            due = time.monotonic() - self._flushed >= settings.METRICS_FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def dump(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._check_fork()
+            return [
+                {"route": route, "action": action, **series.dump()}
+                for (route, action), series in self._series.items()
+            ]
+
+    def flush(self, directory: Optional[Path] = None) -> None:
+        """Write this process's totals to its file in `METRICS_DIR`."""
+        directory = Path(directory or settings.METRICS_DIR)
+        with self._lock:
+            self._flushed = time.monotonic()
+            path = directory / self._name
+        payload = json.dumps(self.dump(), separators=(",", ":"))
+        tmp = path.with_name(f".{path.name}.tmp")
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(payload, encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            logger.warning("Could not write request metrics to %s", directory)
+
+    def render(self) -> str:
+        """Metrics of this process only, in the Prometheus text format."""
+        return render(_merge([self.dump()]))
+
+
+def _merge(dumps: Iterable[List[Dict[str, Any]]]) -> Dict[Labels, _Series]:
+    merged: Dict[Labels, _Series] = {}
+    for dump in dumps:
+        for data in dump:
+            labels = (data["route"], data["action"])
+            merged.setdefault(labels, _Series()).merge(data)
+    return merged
+
+
+def collect(directory: Path) -> Dict[Labels, _Series]:
+    """Sum of the metrics files of all processes; unreadable files are skipped."""
+    dumps = []
+    for path in sorted(directory.glob(METRICS_GLOB)):
+        try:
+            dumps.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError) as exc:
+            logger.warning("Skipping metrics file %s: %s", path, exc)
+    return _merge(dumps)
+
+
+def render(merged: Dict[Labels, _Series]) -> str:
+    """Metrics in the Prometheus text exposition format."""
+    series = sorted(merged.items())
+    lines: List[str] = [
+        "# HELP http_request_duration_seconds Request latency.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for labels, s in series:
+        cumulative = 0
+        for bound, hits in zip((*LATENCY_BUCKETS, "+Inf"), s.buckets):
+            cumulative += hits
+            le = bound if isinstance(bound, str) else repr(bound)
+            lines.append(
+                "http_request_duration_seconds_bucket"
+                f"{{{_labels(labels, le=le)}}} {cumulative}"
+            )
+        lines.append(
+            f"http_request_duration_seconds_sum{{{_labels(labels)}}} {s.seconds!r}"
+        )
+        lines.append(
+            f"http_request_duration_seconds_count{{{_labels(labels)}}} {s.count}"
+        )
+
+    lines += [
+        "# HELP http_request_db_queries_total SQL queries run by requests.",
+        "# TYPE http_request_db_queries_total counter",
+    ]
+    lines += [
+        f"http_request_db_queries_total{{{_labels(labels)}}} {s.queries}"
+        for labels, s in series
+    ]
+    lines += [
+        "# HELP http_request_db_duration_seconds_total Time spent in SQL queries.",
+        "# TYPE http_request_db_duration_seconds_total counter",
+    ]
+    lines += [
+        f"http_request_db_duration_seconds_total{{{_labels(labels)}}} "
+        f"{s.sql_seconds!r}"
+        for labels, s in series
+    ]
+    lines += [
+        "# HELP http_request_stage_duration_seconds_total Time spent in request "
+        "stages (serialization: response rendering; enqueue: counter tasks).",
+        "# TYPE http_request_stage_duration_seconds_total counter",
+    ]
+    lines += [
+        "http_request_stage_duration_seconds_total"
+        f"{{{_labels(labels, stage=stage)}}} {spent!r}"
+        for labels, s in series
+        for stage, spent in sorted(s.stages.items())
+    ]
+    return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    if registry.dump():
+        registry.flush()
+
+
+def request_labels(request: HttpRequest) -> Labels:
+    """`(route, action)` of a resolved request."""
+    match = request.resolver_match
+    method = request.method.lower()
+    if match is None:
+        return UNMATCHED_ROUTE, method
+    # DRF viewsets map HTTP methods to actions, e.g. {"get": "retrieve"}
+    actions = getattr(match.func, "actions", None) or {}
+    return match.view_name or match.route, actions.get(method, method)
+
+
+class MetricsMiddleware:
+    """Record latency, SQL and stage timings of every request in `registry`.
+
+    Put it first in `MIDDLEWARE` so the latency covers the whole stack. Runs
+    natively under both WSGI and ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        connection_created.connect(_install, dispatch_uid="core.metrics")
+
+    @contextmanager
+    def _recording(self, request: HttpRequest) -> Iterator[None]:
+        stats = RequestStats()
+        start = time.perf_counter()
+        try:
+            with collecting(stats):
+                yield
+        finally:
+            seconds = time.perf_counter() - start
+            registry.observe(request_labels(request), seconds, stats)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.async_mode:
+            return self.__acall__(request)
+        with self._recording(request):
+            return self.get_response(request)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        with self._recording(request):
+            return await self.get_response(request)
+
+    def process_template_response(self, request, response):
+        # Runs right before `response.render()`: DRF encodes the body there
+        start = time.perf_counter()
+        stats = _current.get()
+
+        def rendered(_response):
+            if stats is not None:
+                stats.add(STAGE_SERIALIZATION, time.perf_counter() - start)
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+def _authorized(request: HttpRequest) -> bool:
+    token = settings.METRICS_TOKEN
+    if not token:
+        return True
+    expected = f"Bearer {token}".encode()
+    given = request.headers.get("Authorization", "").encode()
+    return hmac.compare_digest(given, expected)
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """`GET /metrics`: request metrics of all processes for Prometheus."""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if not _authorized(request):
+        return HttpResponseForbidden()
+    directory = Path(settings.METRICS_DIR)
+    registry.flush(directory)  # this process's latest requests
+    return HttpResponse(render(collect(directory)), content_type=CONTENT_TYPE)
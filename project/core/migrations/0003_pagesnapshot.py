@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("core", "0002_alter_page_options"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PageSnapshot",
+            fields=[
+                (
+                    "page",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="snapshot",
+                        serialize=False,
+                        to="core.page",
+                    ),
+                ),
+                ("title", models.CharField(max_length=255)),
+                ("items", models.JSONField(default=list)),
+                ("built_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name="pagecontent",
+            name="content_type",
+            field=models.ForeignKey(
+                limit_choices_to=models.Q(
+                    ("app_label", "core"), ("model__in", ("video", "audio"))
+                ),
+                on_delete=django.db.models.deletion.CASCADE,
+                to="contenttypes.contenttype",
+            ),
+        ),
+    ]
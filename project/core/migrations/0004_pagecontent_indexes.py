@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("core", "0003_pagesnapshot"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="pagecontent",
+            index=models.Index(
+                fields=["page", "position", "id"], name="pagecontent_page_pos_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pagecontent",
+            index=models.Index(
+                fields=["content_type", "object_id"], name="pagecontent_ct_obj_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_countershard"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="page",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="page",
+            index=models.Index(fields=["updated_at"], name="page_updated_at_idx"),
+        ),
+    ]
@@ -0,0 +1,128 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:20
+
+import core.expressions
+import django.db.models.functions.text
+from django.db import migrations, models
+
+# The full-text index as of this migration, frozen here rather than imported
+# from `core.search` (which may change later; `rebuild_search_index` reapplies
+# the current version)
+POSTGRESQL_INSTALL = [
+    "ALTER TABLE core_video ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS "
+    "(setweight(to_tsvector('simple', coalesce(title, '')), 'A')) STORED",
+    "CREATE INDEX IF NOT EXISTS video_search_idx "
+    "ON core_video USING GIN (search_vector)",
+    "ALTER TABLE core_audio ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS "
+    "(setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(transcript, '')), 'B')) STORED",
+    "CREATE INDEX IF NOT EXISTS audio_search_idx "
+    "ON core_audio USING GIN (search_vector)",
+]
+POSTGRESQL_UNINSTALL = [
+    "ALTER TABLE core_video DROP COLUMN IF EXISTS search_vector",
+    "ALTER TABLE core_audio DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_INSTALL = [
+    # Videos: title
+    "CREATE VIRTUAL TABLE IF NOT EXISTS core_video_fts USING fts5(title, "
+    "content='core_video', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS core_video_fts_ai AFTER INSERT ON core_video "
+    "BEGIN INSERT INTO core_video_fts(rowid, title) VALUES (new.id, new.title); END",
+    "CREATE TRIGGER IF NOT EXISTS core_video_fts_ad AFTER DELETE ON core_video "
+    "BEGIN INSERT INTO core_video_fts(core_video_fts, rowid, title) "
+    "VALUES ('delete', old.id, old.title); END",
+    "CREATE TRIGGER IF NOT EXISTS core_video_fts_au AFTER UPDATE OF title "
+    "ON core_video "
+    "BEGIN INSERT INTO core_video_fts(core_video_fts, rowid, title) "
+    "VALUES ('delete', old.id, old.title); "
+    "INSERT INTO core_video_fts(rowid, title) VALUES (new.id, new.title); END",
+    # Audios: title, transcript
+    "CREATE VIRTUAL TABLE IF NOT EXISTS core_audio_fts USING fts5(title, "
+    "transcript, content='core_audio', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS core_audio_fts_ai AFTER INSERT ON core_audio "
+    "BEGIN INSERT INTO core_audio_fts(rowid, title, transcript) "
+    "VALUES (new.id, new.title, new.transcript); END",
+    "CREATE TRIGGER IF NOT EXISTS core_audio_fts_ad AFTER DELETE ON core_audio "
+    "BEGIN INSERT INTO core_audio_fts(core_audio_fts, rowid, title, transcript) "
+    "VALUES ('delete', old.id, old.title, old.transcript); END",
+    "CREATE TRIGGER IF NOT EXISTS core_audio_fts_au AFTER UPDATE OF title, "
+    "transcript ON core_audio "
+    "BEGIN INSERT INTO core_audio_fts(core_audio_fts, rowid, title, transcript) "
+    "VALUES ('delete', old.id, old.title, old.transcript); "
+    "INSERT INTO core_audio_fts(rowid, title, transcript) "
+    "VALUES (new.id, new.title, new.transcript); END",
+    # Index the rows that already exist
+    "INSERT INTO core_video_fts(core_video_fts) VALUES ('rebuild')",
+    "INSERT INTO core_audio_fts(core_audio_fts) VALUES ('rebuild')",
+]
+SQLITE_UNINSTALL = [
+    f"DROP TRIGGER IF EXISTS {fts}_{suffix}"
+    for fts in ("core_video_fts", "core_audio_fts")
+    for suffix in ("ai", "ad", "au")
+] + [
+    "DROP TABLE IF EXISTS core_video_fts",
+    "DROP TABLE IF EXISTS core_audio_fts",
+]
+
+STATEMENTS = {
+    "postgresql": (POSTGRESQL_INSTALL, POSTGRESQL_UNINSTALL),
+    "sqlite": (SQLITE_INSTALL, SQLITE_UNINSTALL),
+}
+
+
+def _run(schema_editor, index):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    for sql in statements[index] if statements else ():
+        schema_editor.execute(sql, params=None)
+
+
+def install(apps, schema_editor):
+    _run(schema_editor, 0)
+
+
+def uninstall(apps, schema_editor):
+    _run(schema_editor, 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_trendingscore"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="audio",
+            index=models.Index(
+                core.expressions.BytewiseCollate(
+                    django.db.models.functions.text.Lower("title")
+                ),
+                name="audio_title_lower_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="page",
+            index=models.Index(
+                core.expressions.BytewiseCollate(
+                    django.db.models.functions.text.Lower("title")
+                ),
+                name="page_title_lower_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="video",
+            index=models.Index(
+                core.expressions.BytewiseCollate(
+                    django.db.models.functions.text.Lower("title")
+                ),
+                name="video_title_lower_idx",
+            ),
+        ),
+        # tsvector + GIN on PostgreSQL, FTS5 tables and triggers on SQLite
+        migrations.RunPython(install, uninstall),
+    ]
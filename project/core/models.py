@@ -2,17 +2,36 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.db.models import Q
+from django.db.models.functions import Lower
 
-from .constants import ALLOWED_CONTENT_MODELS, APP_LABEL_CORE
+from .constants import (
+    ALLOWED_CONTENT_MODELS,
+    ANALYTICS_DAY,
+    ANALYTICS_HOUR,
+    APP_LABEL_CORE,
+)
+from .expressions import BytewiseCollate
 
 
 class Page(models.Model):
     """Represents a landing-like page that aggregates ordered content items."""
 
     title = models.CharField(max_length=255)
+    # Key of the page in the upstream system, used by `import_content` upserts
+    external_id = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    # Last change of the page representation, including its PageContent rows and
+    # the objects they reference (touched by `core.signals`); view counters
+    # are not part of it. Drives ETag/Last-Modified of the API.
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ("id",)
+        indexes = [
+            # List validators: MAX(updated_at)
+            models.Index(fields=["updated_at"], name="page_updated_at_idx"),
+            # Admin search: title__iprefix (see `core.search`)
+            models.Index(BytewiseCollate(Lower("title")), name="page_title_lower_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -23,11 +42,19 @@ class ContentBase(models.Model):
 
     title = models.CharField(max_length=255)
     counter = models.PositiveIntegerField(default=0)
+    # Key of the object in the upstream system, used by `import_content` upserts
+    external_id = models.CharField(max_length=255, unique=True, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         abstract = True
+        indexes = [
+            # Admin search: title__iprefix (see `core.search`)
+            models.Index(
+                BytewiseCollate(Lower("title")), name="%(class)s_title_lower_idx"
+            ),
+        ]
 
 
 class Video(ContentBase):
@@ -58,3 +85,124 @@ class PageContent(models.Model):
 
     class Meta:
         ordering = ("position", "id")
+        indexes = [
+            # Page detail: WHERE page_id = ? ORDER BY position, id
+            models.Index(
+                fields=["page", "position", "id"], name="pagecontent_page_pos_idx"
+            ),
+            # "Where is this object used": WHERE content_type_id = ? AND object_id = ?
+            models.Index(
+                fields=["content_type", "object_id"], name="pagecontent_ct_obj_idx"
+            ),
+        ]
+
+
+class PageSnapshot(models.Model):
+    """Denormalized page-detail document: title and rendered items without counters."""
+
+    page = models.OneToOneField(
+        Page, on_delete=models.CASCADE, primary_key=True, related_name="snapshot"
+    )
+    title = models.CharField(max_length=255)
+    items = models.JSONField(default=list)
+    built_at = models.DateTimeField(auto_now=True)
+
+
+class CounterShard(models.Model):
+    """One of `COUNTER_SHARDS` partial view counters of a content object.
+
+    Increments go to a random shard instead of the object's `counter` row, so
+    concurrent views of a hot object do not queue on a single row lock. The
+    displayed value is `counter` plus the sum of the object's shards.
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    shard = models.PositiveSmallIntegerField()
+    count = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "object_id", "shard"],
+                name="countershard_ct_obj_shard_uniq",
+            )
+        ]
+
+
+class ViewBucket(models.Model):
+    """Raw views of an object (video, audio or page) within one minute.
+
+    Append-only: every counter write inserts new rows, never updates them, so
+    concurrent writers do not contend. `rollup_views` folds them into
+    `ViewRollup` and deletes them.
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    bucket_start = models.DateTimeField()
+    count = models.PositiveIntegerField()
+
+
+class ViewRollup(models.Model):
+    """Views of an object per hour or per day, kept for a retention period."""
+
+    GRANULARITY_CHOICES = [(ANALYTICS_HOUR, "Hour"), (ANALYTICS_DAY, "Day")]
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    granularity = models.CharField(max_length=8, choices=GRANULARITY_CHOICES)
+    bucket_start = models.DateTimeField()
+    count = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Upsert target; also serves the time-series range scan
+            models.UniqueConstraint(
+                fields=["content_type", "object_id", "granularity", "bucket_start"],
+                name="viewrollup_series_uniq",
+            )
+        ]
+        indexes = [
+            # Retention: WHERE granularity = ? AND bucket_start < ?
+            models.Index(
+                fields=["granularity", "bucket_start"], name="viewrollup_retention_idx"
+            ),
+        ]
+
+
+class TrendingScore(models.Model):
+    """Exponentially decayed view score of a video or audio (see `core.trending`).
+
+    `score` is stored in log space and relative to a fixed epoch, so views only
+    ever add to it and the row order is the current ranking without rescaling.
+    """
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["content_type", "object_id"], name="trendingscore_ct_obj_uniq"
+            )
+        ]
+        indexes = [
+            # Top N: ORDER BY score DESC LIMIT N
+            models.Index(fields=["-score"], name="trendingscore_score_idx"),
+        ]
+
+
+PAGE_LIST_CHANGE_PK: int = 1
+
+
+class PageListChange(models.Model):
+    """When a page was last deleted; a single row (`pk=1`).
+
+    `MAX(Page.updated_at)` does not move when a page goes away, so the pages
+    list validators (see `core.conditional`) read this row as well. It lives in
+    the database so every worker sees the same value.
+    """
+
+    deleted_at = models.DateTimeField()
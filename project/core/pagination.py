@@ -1,6 +1,30 @@
-from rest_framework.pagination import PageNumberPagination
+from __future__ import annotations
 
-from .constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+import json
+from typing import Optional, Type
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, transaction
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    PageNumberPagination,
+)
+from rest_framework.request import Request
+
+from .constants import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    PAGINATION_CURSOR,
+    PAGINATION_PAGE,
+    PAGINATION_QUERY_PARAM,
+)
+from .models import Page
 
 
 class DefaultPagination(PageNumberPagination):
@@ -9,3 +33,100 @@ class DefaultPagination(PageNumberPagination):
     page_size = DEFAULT_PAGE_SIZE
     page_size_query_param = "page_size"
     max_page_size = MAX_PAGE_SIZE
+
+
+class PageCursorPagination(CursorPagination):
+    """Keyset paginator: no COUNT(*) and no OFFSET, constant cost at any depth."""
+
+    page_size = DEFAULT_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = MAX_PAGE_SIZE
+    ordering = Page._meta.ordering
+
+
+PAGINATION_CLASSES: dict[str, Type[BasePagination]] = {
+    PAGINATION_PAGE: DefaultPagination,
+    PAGINATION_CURSOR: PageCursorPagination,
+}
+
+
+def get_pagination_class(request: Request) -> Type[BasePagination]:
+    """Pick the paginator for a request.
+
+    `?pagination=page|cursor` wins; otherwise a `cursor`/`page` query param
+    implies its mode, and `PAGES_PAGINATION` in settings is the default.
+    """
+    params = request.query_params
+    mode = params.get(PAGINATION_QUERY_PARAM)
+    if mode is None:
+        if PageCursorPagination.cursor_query_param in params:
+            mode = PAGINATION_CURSOR
+        elif DefaultPagination.page_query_param in params:
+            mode = PAGINATION_PAGE
+        else:
+            mode = settings.PAGES_PAGINATION
+
+    try:
+        return PAGINATION_CLASSES[mode]
+    except KeyError:
+        choices = ", ".join(PAGINATION_CLASSES)
+        raise ValidationError(
+            {PAGINATION_QUERY_PARAM: [f"Expected one of: {choices}."]}
+        )
+
+
+def _table_estimate(queryset: QuerySet) -> Optional[int]:
+    """Row count of the whole table from planner statistics (ANALYZE)."""
+    table = queryset.model._meta.db_table
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql":
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass"
+    elif connection.vendor == "sqlite":
+        # The first number of `stat` is the row count of the table
+        sql = "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1"
+    else:
+        return None
+    # A savepoint: sqlite_stat1 does not exist until the first ANALYZE
+    with transaction.atomic(using=queryset.db), connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    # -1: never analyzed (PostgreSQL 14+)
+    return estimate if estimate >= 0 else None
+
+
+def estimate_count(queryset: QuerySet) -> Optional[int]:
+    """Approximate `queryset.count()` without scanning; None if unknown.
+
+    An unfiltered queryset reads the table statistics; a filtered one asks the
+    PostgreSQL planner for its row estimate (other databases: None).
+    """
+    try:
+        if not queryset.query.where:
+            return _table_estimate(queryset)
+        if connections[queryset.db].vendor == "postgresql":
+            # Django dumps each element of the JSON array: `{"Plan": ...}`
+            plan = json.loads(queryset.order_by().explain(format="json"))
+            return int(plan["Plan"]["Plan Rows"])
+    except (DatabaseError, KeyError, ValueError, TypeError):
+        pass
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that trusts planner estimates for large result sets.
+
+    An exact `COUNT(*)` of millions of rows is a full scan on every changelist
+    load; the estimate is free. Below `ADMIN_EXACT_COUNT_LIMIT` estimated rows
+    (or without statistics) the exact count is used, so small tables and
+    narrow filters stay precise.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < settings.ADMIN_EXACT_COUNT_LIMIT:
+            return super().count
+        return estimate
@@ -0,0 +1,225 @@
+"""Opt-in sampling profiler for the pages API.
+
+With `PROFILING_ENABLED`, `ProfilingMiddleware` profiles a random
+`PROFILING_SAMPLE_RATE` fraction of requests under `PROFILING_PATH_PREFIX`
+(`/api/pages/`): a background thread samples the request thread's call stack
+every `PROFILING_INTERVAL` seconds. Unsampled requests pay one `random()` call.
+
+Each profiled request is written to `PROFILING_DIR` as one small gzipped JSON
+file `profile-<ns>-<pid>.json.gz` holding the request line, its duration and the
+sampled stacks in the collapsed format (`outer;inner;leaf` -> samples). Only the
+newest `PROFILING_MAX_FILES` files are kept. `manage.py profile_report` merges
+them into a hot-function table and a collapsed-stack file for flamegraph tools
+(`flamegraph.pl`, speedscope, inferno).
+
+Frames are named like `pstats`: `path/to/module.py:<first line>(<function>)`,
+with the path relative to `sys.path`.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple
+
+from asgiref.sync import (
+    async_to_sync,
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpRequest, HttpResponse
+
+logger = logging.getLogger(__name__)
+
+PROFILE_GLOB: str = "profile-*.json.gz"
+STACK_SEPARATOR: str = ";"
+
+
+@lru_cache(maxsize=None)
+def _short_path(filename: str) -> str:
+    """`filename` relative to the longest `sys.path` entry containing it."""
+    for prefix in sorted((p for p in sys.path if p), key=len, reverse=True):
+        if filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1 :]
+    return filename
+
+
+@lru_cache(maxsize=8192)
+def frame_name(code: CodeType) -> str:
+    path = _short_path(code.co_filename).replace(STACK_SEPARATOR, "_")
+    return f"{path}:{code.co_firstlineno}({code.co_name})"
+
+
+def collapse(frame: Optional[FrameType], stop: Optional[CodeType] = None) -> str:
+    """Collapsed stack of `frame`, outermost first, below the frame running `stop`."""
+    names: List[str] = []
+    while frame is not None and frame.f_code is not stop:
+        names.append(frame_name(frame.f_code))
+        frame = frame.f_back
+    return STACK_SEPARATOR.join(reversed(names))
+
+
+class StackSampler:
+    """Sample the call stack of one thread from a background thread.
+
+    Use as a context manager around the code to profile; `stacks` counts the
+    samples of each collapsed stack.
+    """
+
+    def __init__(
+        self,
+        thread_id: int,
+        interval: float,
+        stop: Optional[CodeType] = None,
+    ):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stop = stop
+        self.stacks: Counter[str] = Counter()
+        self._done = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+
+    def __enter__(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._done.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None or self._done.is_set():
+                return  # the thread is gone, or waiting in `__exit__` for us
+            self.stacks[collapse(frame, self.stop)] += 1
+            del frame  # do not keep the sampled thread's frames alive
+
+
+def write_profile(directory: Path, profile: Dict, max_files: int) -> Path:
+    """Write one profile atomically and drop the oldest beyond `max_files`."""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"profile-{time.time_ns()}-{os.getpid()}.json.gz"
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_bytes(
+        gzip.compress(json.dumps(profile, separators=(",", ":")).encode(), 6)
+    )
+    os.replace(tmp, path)
+    for old in sorted(directory.glob(PROFILE_GLOB))[:-max_files]:
+        try:
+            old.unlink()
+        except FileNotFoundError:
+            pass  # rotated by another process
+    return path
+
+
+def read_profiles(directory: Path) -> Iterable[Dict]:
+    """Profiles in `directory`, oldest first; unreadable files are skipped."""
+    for path in sorted(directory.glob(PROFILE_GLOB)):
+        try:
+            yield json.loads(gzip.decompress(path.read_bytes()))
+        except (OSError, EOFError, ValueError) as exc:
+            logger.warning("Skipping profile %s: %s", path, exc)
+
+
+def merge_stacks(profiles: Iterable[Dict]) -> Counter[str]:
+    stacks: Counter[str] = Counter()
+    for profile in profiles:
+        stacks.update(profile["stacks"])
+    return stacks
+
+
+def hot_functions(stacks: Dict[str, int]) -> List[Tuple[str, int, int]]:
+    """`(function, self samples, total samples)` of every sampled function.
+
+    Self samples have the function on top of the stack; total samples have it
+    anywhere in the stack (counted once for recursion).
+    """
+    own: Counter[str] = Counter()
+    total: Counter[str] = Counter()
+    for stack, samples in stacks.items():
+        names = stack.split(STACK_SEPARATOR)
+        own[names[-1]] += samples
+        for name in set(names):
+            total[name] += samples
+    return [(name, own[name], samples) for name, samples in total.items()]
+
+
+def write_collapsed(stacks: Dict[str, int], out: TextIO) -> None:
+    """`stack samples` lines, the input format of flamegraph tools."""
+    for stack, samples in sorted(stacks.items()):
+        out.write(f"{stack} {samples}\n")
+
+
+class ProfilingMiddleware:
+    """Profile a sample of pages API requests (see module docstring).
+
+    Under ASGI the other requests pass through as they are; a sampled one runs
+    the rest of the stack in a worker thread, which the sampler follows.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.directory = Path(settings.PROFILING_DIR)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not (
+            request.path.startswith(settings.PROFILING_PATH_PREFIX)
+            and random.random() < settings.PROFILING_SAMPLE_RATE
+        ):
+            return self.get_response(request)  # a coroutine in async mode
+        if self.async_mode:
+            return sync_to_async(self._profile)(request)
+        return self._profile(request)
+
+    def _profile(self, request: HttpRequest) -> HttpResponse:
+        get_response = self.get_response
+        if self.async_mode:
+            # Sync views then run in this thread too, under the sampler
+            get_response = async_to_sync(get_response)
+        started, start = time.time(), time.perf_counter()
+        sampler = StackSampler(
+            threading.get_ident(),
+            settings.PROFILING_INTERVAL,
+            # Stacks start below this frame
+            stop=sys._getframe().f_code,
+        )
+        with sampler:
+            response = get_response(request)
+        profile = {
+            "request": f"{request.method} {request.get_full_path()}",
+            "status": response.status_code,
+            "started": started,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 3),
+            "interval": sampler.interval,
+            "stacks": sampler.stacks,
+        }
+        try:
+            write_profile(self.directory, profile, settings.PROFILING_MAX_FILES)
+        except OSError:
+            logger.warning("Could not write a profile to %s", self.directory)
+        return response
@@ -0,0 +1,84 @@
+"""orjson-backed JSON renderer (enabled with `API_ORJSON_RENDERER`)."""
+
+from __future__ import annotations
+
+from typing import Any, Mapping, Optional
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+# DRF escapes these so the output stays a strict JavaScript subset
+_LINE_SEPARATORS = (
+    ("\u2028".encode(), b"\\u2028"),
+    ("\u2029".encode(), b"\\u2029"),
+)
+# Leave these to DRF's encoder so dates and dataclasses render as before
+_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    if orjson is not None
+    else 0
+)
+
+
+class ORJSONRenderer(JSONRenderer):
+    """Drop-in `JSONRenderer` backed by orjson.
+
+    The output is byte-identical except for floats in exponent range: orjson
+    writes `1e16` and `0.00001` where the stdlib writes `1e+16` and `1e-05`
+    (the same numbers to any JSON parser; e.g. search `rank`, trending
+    `score`). Falls back to the stdlib encoder when orjson is not installed,
+    when indentation is requested or for data orjson rejects.
+    """
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Mapping[str, Any]] = None,
+    ) -> bytes:
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if (
+            orjson is None
+            or indent is not None
+            or self.ensure_ascii
+            or not self.compact
+            or not self.strict
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default, option=_OPTIONS
+            )
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        for raw, escaped in _LINE_SEPARATORS:
+            ret = ret.replace(raw, escaped)
+        return ret
+
+
+class NDJSONRenderer(JSONRenderer):
+    """Newline-delimited JSON (`application/x-ndjson`).
+
+    Streaming views write their own lines; this renders anything else the
+    view returns (e.g. a validation error) as a single line.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def render(
+        self,
+        data: Any,
+        accepted_media_type: Optional[str] = None,
+        renderer_context: Optional[Mapping[str, Any]] = None,
+    ) -> bytes:
+        if data is None:
+            return b""
+        # No `indent` media type parameter: a record must stay on one line
+        return super().render(data, self.media_type, renderer_context) + b"\n"
@@ -0,0 +1,236 @@
+"""Title prefix lookups and full-text search over videos and audios.
+
+`title__iprefix="abc"` is a case-insensitive prefix match served by the
+`LOWER(title)` indexes: `LOWER(title) COLLATE "C" LIKE 'abc%'` on PostgreSQL
+(the index is in the same byte-order collation), a `LOWER(title)` range on
+SQLite. Unlike `istartswith` (`UPPER(title) LIKE ...`), no table scan.
+
+Full-text search covers video titles and audio titles and transcripts
+(titles rank higher). The search index lives outside the Django models:
+
+* PostgreSQL — a stored generated `search_vector tsvector` column per table
+  (`simple` configuration: no stemming, any language) with a GIN index;
+* SQLite — FTS5 external-content tables `core_video_fts` / `core_audio_fts`
+  kept in sync by triggers, so bulk writes are indexed too.
+
+Both are created by migration `0010_search`, which keeps its own copy of the
+DDL below. Django rebuilds a SQLite table (dropping its triggers) on some
+`ALTER TABLE`s; `rebuild_search_index` recreates whatever is missing and
+reindexes.
+"""
+
+from __future__ import annotations
+
+import re
+import string
+from typing import Any, Dict, List, Tuple
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import CharField, Lookup
+from django.db.models.functions import Lower
+
+from .expressions import BytewiseCollate
+from .fastpath import item_rows
+from .models import Audio, Video
+
+SEARCH_CONFIG: str = "simple"
+# Fields of the listed items
+SEARCH_ITEM_FIELDS: frozenset[str] = frozenset({"id", "type", "title", "counter"})
+# Weights of title and transcript matches in the SQLite ranking
+FTS_TITLE_WEIGHT: float = 10.0
+FTS_TRANSCRIPT_WEIGHT: float = 1.0
+
+# SQLite LOWER() folds ASCII letters only
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+_WORD_RE = re.compile(r"\w+")
+
+
+@CharField.register_lookup
+class PrefixIgnoreCase(Lookup):
+    """`field__iprefix=value`: case-insensitive prefix match on `LOWER(field)`."""
+
+    lookup_name = "iprefix"
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = compiler.compile(BytewiseCollate(Lower(self.lhs)))
+        pattern = connection.ops.prep_for_like_query(str(self.rhs).lower()) + "%"
+        return f"{lhs} LIKE %s", [*lhs_params, pattern]
+
+    def as_sqlite(self, compiler, connection):
+        # LIKE cannot use an expression index on SQLite: compare as a range
+        lhs, lhs_params = compiler.compile(Lower(self.lhs))
+        prefix = str(self.rhs).translate(_ASCII_LOWER)
+        if not prefix or prefix[-1] == chr(0x10FFFF):
+            return f"{lhs} >= %s", [*lhs_params, prefix]
+        # Every string starting with `prefix` sorts before its successor
+        successor = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return (
+            f"{lhs} >= %s AND {lhs} < %s",
+            [*lhs_params, prefix, *lhs_params, successor],
+        )
+
+
+# name -> (table, indexed columns); the first column is the title
+SQLITE_FTS_TABLES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "core_video_fts": (Video._meta.db_table, ("title",)),
+    "core_audio_fts": (Audio._meta.db_table, ("title", "transcript")),
+}
+
+
+def _sqlite_fts_sql(fts: str, table: str, columns: Tuple[str, ...]) -> List[str]:
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    delete = (
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old});"
+    )
+    insert = f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({cols}, "
+        f"content='{table}', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} "
+        f"BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} "
+        f"BEGIN {delete} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} "
+        f"BEGIN {delete} {insert} END",
+    ]
+
+
+def _postgresql_sql() -> List[str]:
+    title = f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A')"
+    transcript = (
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(transcript, '')), 'B')"
+    )
+    sql = []
+    for model, vector in ((Video, title), (Audio, f"{title} || {transcript}")):
+        table = model._meta.db_table
+        sql += [
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({vector}) STORED",
+            f"CREATE INDEX IF NOT EXISTS {model._meta.model_name}_search_idx "
+            f"ON {table} USING GIN (search_vector)",
+        ]
+    return sql
+
+
+def _execute(db, statements: List[str]) -> None:
+    with db.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def install_search_index(db=connection) -> None:
+    """Create the full-text index of the database (idempotent)."""
+    vendor = db.vendor
+    if vendor == "postgresql":
+        statements = _postgresql_sql()
+    elif vendor == "sqlite":
+        statements = [
+            sql
+            for fts, (table, columns) in SQLITE_FTS_TABLES.items()
+            for sql in _sqlite_fts_sql(fts, table, columns)
+        ]
+        statements += [
+            f"INSERT INTO {fts}({fts}) VALUES ('rebuild')" for fts in SQLITE_FTS_TABLES
+        ]
+    else:
+        return
+    _execute(db, statements)
+
+
+def uninstall_search_index(db=connection) -> None:
+    if db.vendor == "postgresql":
+        _execute(
+            db,
+            [
+                f"ALTER TABLE {model._meta.db_table} "
+                "DROP COLUMN IF EXISTS search_vector"
+                for model in (Video, Audio)
+            ],
+        )
+    elif db.vendor == "sqlite":
+        _execute(
+            db,
+            [
+                f"DROP TRIGGER IF EXISTS {fts}_{suffix}"
+                for fts in SQLITE_FTS_TABLES
+                for suffix in ("ai", "ad", "au")
+            ]
+            + [f"DROP TABLE IF EXISTS {fts}" for fts in SQLITE_FTS_TABLES],
+        )
+
+
+def rebuild_search_index() -> None:
+    """Recreate missing parts of the search index and reindex every row."""
+    install_search_index()
+    if connection.vendor == "postgresql":
+        _execute(
+            connection,
+            [
+                f"REINDEX INDEX {model._meta.model_name}_search_idx"
+                for model in (Video, Audio)
+            ],
+        )
+
+
+def _fts5_query(query: str) -> str:
+    """All words of `query` as quoted FTS5 terms (implicit AND, no operators)."""
+    return " ".join(f'"{word}"' for word in _WORD_RE.findall(query))
+
+
+def _hits_sql(query: str) -> Tuple[str, List[Any]]:
+    """`SELECT ct_id, id, rank` of every match, both content types."""
+    video_ct = ContentType.objects.get_for_model(Video).id
+    audio_ct = ContentType.objects.get_for_model(Audio).id
+    if connection.vendor == "postgresql":
+        parts = [
+            f"SELECT %s AS ct_id, id, ts_rank_cd(search_vector, q) AS rank "
+            f"FROM {model._meta.db_table}, "
+            f"websearch_to_tsquery('{SEARCH_CONFIG}', %s) AS q "
+            "WHERE search_vector @@ q"
+            for model in (Video, Audio)
+        ]
+        return " UNION ALL ".join(parts), [video_ct, query, audio_ct, query]
+
+    match = _fts5_query(query)
+    # bm25() is lower for better matches
+    video = (
+        f"SELECT %s AS ct_id, rowid AS id, -bm25(core_video_fts, {FTS_TITLE_WEIGHT}) "
+        "AS rank FROM core_video_fts WHERE core_video_fts MATCH %s"
+    )
+    audio = (
+        "SELECT %s, rowid, -bm25(core_audio_fts, "
+        f"{FTS_TITLE_WEIGHT}, {FTS_TRANSCRIPT_WEIGHT}) "
+        "FROM core_audio_fts WHERE core_audio_fts MATCH %s"
+    )
+    return f"{video} UNION ALL {audio}", [video_ct, match, audio_ct, match]
+
+
+def search(query: str, offset: int, limit: int) -> List[Dict[str, Any]]:
+    """Videos and audios matching `query`, best first, with their `rank`.
+
+    One ranked query over both content types plus one query per content type
+    for the fields. Ties are ordered by content type and id.
+    """
+    if not _WORD_RE.search(query):
+        return []
+    hits_sql, params = _hits_sql(query)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT ct_id, id, rank FROM ({hits_sql}) AS hits "
+            "ORDER BY rank DESC, ct_id, id LIMIT %s OFFSET %s",
+            [*params, limit, offset],
+        )
+        hits = cursor.fetchall()
+    items = item_rows(
+        ((ct_id, obj_id) for ct_id, obj_id, _ in hits), SEARCH_ITEM_FIELDS
+    )
+    return [
+        {**items[(ct_id, obj_id)], "rank": round(rank, 6)}
+        for ct_id, obj_id, rank in hits
+        if (ct_id, obj_id) in items
+    ]
@@ -0,0 +1,231 @@
+"""Streaming generators used by `seed_demo --stream` for multi-million-row datasets.
+
+Rows are produced in fixed-size chunks with explicit ids taken from ranges
+reserved up front, so workers never have to read back what others inserted and
+memory stays bounded by the chunk size. PostgreSQL loads chunks with `COPY`;
+other databases fall back to `bulk_create`.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import math
+import random
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Type
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from .constants import CDN_SUBS_BASE, CDN_VIDEO_BASE
+from .models import Audio, Page, PageContent, Video
+
+DISTRIBUTION_UNIFORM: str = "uniform"
+DISTRIBUTION_ZIPF: str = "zipf"
+DISTRIBUTIONS: tuple[str, ...] = (DISTRIBUTION_UNIFORM, DISTRIBUTION_ZIPF)
+
+TRANSCRIPTS: tuple[str, ...] = (
+    "Short transcript about testing API endpoints.",
+    "Longer transcript regarding background tasks and atomic updates.",
+    "Transcript focusing on pagination and serializer design.",
+    "Notes on generic relations and content modeling.",
+)
+
+
+class Sampler:
+    """Draws ranks in `[0, n)` uniformly or from a bounded Zipf law (0 is hottest)."""
+
+    def __init__(self, distribution: str, rng: random.Random, exponent: float = 1.2):
+        self.distribution = distribution
+        self.rng = rng
+        self.exponent = exponent
+
+    def rank(self, n: int) -> int:
+        if self.distribution == DISTRIBUTION_UNIFORM:
+            return self.rng.randrange(n)
+        # Inverse CDF of the continuous approximation of a Zipf law on [1, n + 1)
+        u = self.rng.random()
+        s = self.exponent
+        if s == 1:
+            x = math.exp(u * math.log(n + 1))
+        else:
+            x = ((math.pow(n + 1, 1 - s) - 1) * u + 1) ** (1 / (1 - s))
+        return min(int(x) - 1, n - 1)
+
+    def between(self, low: int, high: int) -> int:
+        """Value in `[low, high]`; with Zipf, small values are the most frequent."""
+        return low + self.rank(high - low + 1)
+
+
+def next_free_id(model: Type[models.Model]) -> int:
+    """First id above the current max: explicit ids are allocated from here."""
+    last = model.objects.aggregate(last=models.Max("id"))["last"] or 0
+    return last + 1
+
+
+def reset_sequences(model_list: Sequence[Type[models.Model]]) -> None:
+    """Move id sequences past explicitly inserted ids (no-op on SQLite)."""
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), model_list):
+            cursor.execute(sql)
+
+
+def write_rows(
+    model: Type[models.Model], fields: Sequence[str], rows: List[Sequence[Any]]
+) -> None:
+    """Insert one chunk: `COPY FROM STDIN` on PostgreSQL, `bulk_create` elsewhere."""
+    if not rows:
+        return
+    if connection.vendor == "postgresql":
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        buf.seek(0)
+        columns = ", ".join(
+            connection.ops.quote_name(model._meta.get_field(f).column) for f in fields
+        )
+        table = connection.ops.quote_name(model._meta.db_table)
+        sql = f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)"
+        with connection.cursor() as cursor:
+            raw = cursor.cursor
+            if hasattr(raw, "copy_expert"):  # psycopg2
+                raw.copy_expert(sql, buf)
+            else:  # psycopg 3
+                with raw.copy(sql) as copy:
+                    copy.write(buf.getvalue())
+        return
+    model.objects.bulk_create(
+        [model(**dict(zip(fields, row))) for row in rows], batch_size=len(rows)
+    )
+
+
+def _chunks(rows: Iterable[Sequence[Any]], size: int) -> Iterator[List[Sequence[Any]]]:
+    chunk: List[Sequence[Any]] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _write_chunked(
+    model: Type[models.Model],
+    fields: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    chunk_size: int,
+) -> int:
+    written = 0
+    for chunk in _chunks(rows, chunk_size):
+        # One bounded transaction per chunk
+        with transaction.atomic():
+            write_rows(model, fields, chunk)
+        written += len(chunk)
+    return written
+
+
+def seed_videos(start_id: int, count: int, chunk_size: int, seed: int) -> int:
+    rng = random.Random(seed)
+    now = timezone.now()
+    fields = (
+        "id",
+        "title",
+        "counter",
+        "created_at",
+        "updated_at",
+        "video_url",
+        "subtitles_url",
+    )
+    rows = (
+        (
+            i,
+            f"Video #{i}",
+            rng.randint(0, 3),
+            now,
+            now,
+            f"{CDN_VIDEO_BASE}/v{i}.mp4",
+            f"{CDN_SUBS_BASE}/v{i}.vtt",
+        )
+        for i in range(start_id, start_id + count)
+    )
+    return _write_chunked(Video, fields, rows, chunk_size)
+
+
+def seed_audios(start_id: int, count: int, chunk_size: int, seed: int) -> int:
+    rng = random.Random(seed)
+    now = timezone.now()
+    fields = ("id", "title", "counter", "created_at", "updated_at", "transcript")
+    rows = (
+        (i, f"Audio #{i}", rng.randint(0, 3), now, now, rng.choice(TRANSCRIPTS))
+        for i in range(start_id, start_id + count)
+    )
+    return _write_chunked(Audio, fields, rows, chunk_size)
+
+
+def seed_pages(
+    start_id: int,
+    count: int,
+    content: Dict[str, Any],
+    chunk_size: int,
+    seed: int,
+) -> int:
+    """Create pages `start_id..start_id+count-1` and their PageContent rows.
+
+    `content` describes the pools: `video_start`, `videos`, `audio_start`,
+    `audios`, `min_items`, `max_items`, `distribution` and `zipf_exponent`.
+    Returns the number of PageContent rows written.
+    """
+    rng = random.Random(seed)
+    sampler = Sampler(content["distribution"], rng, content["zipf_exponent"])
+    ct_video = ContentType.objects.get_for_model(Video).id
+    ct_audio = ContentType.objects.get_for_model(Audio).id
+
+    now = timezone.now()
+    _write_chunked(
+        Page,
+        ("id", "title", "updated_at"),
+        ((i, f"Page {i}", now) for i in range(start_id, start_id + count)),
+        chunk_size,
+    )
+
+    def page_contents() -> Iterator[Sequence[Any]]:
+        for page_id in range(start_id, start_id + count):
+            items = sampler.between(content["min_items"], content["max_items"])
+            for position in range(1, items + 1):
+                pick_video = bool(rng.getrandbits(1))
+                if (pick_video and content["videos"]) or not content["audios"]:
+                    yield (
+                        page_id,
+                        ct_video,
+                        content["video_start"] + sampler.rank(content["videos"]),
+                        position,
+                    )
+                else:
+                    yield (
+                        page_id,
+                        ct_audio,
+                        content["audio_start"] + sampler.rank(content["audios"]),
+                        position,
+                    )
+
+    return _write_chunked(
+        PageContent,
+        ("page_id", "content_type_id", "object_id", "position"),
+        page_contents(),
+        chunk_size,
+    )
+
+
+def split_range(start: int, count: int, parts: int) -> List[tuple[int, int]]:
+    """Split `count` ids from `start` into at most `parts` `(start, count)` slices."""
+    parts = max(1, min(parts, count)) if count else 1
+    size, extra = divmod(count, parts)
+    slices, cursor = [], start
+    for n in range(parts):
+        length = size + (1 if n < extra else 0)
+        if length:
+            slices.append((cursor, length))
+        cursor += length
+    return slices
@@ -1,10 +1,17 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Collection, Dict, FrozenSet, List, Mapping, Optional
 
 from rest_framework import serializers
 
-from .constants import ITEM_TYPE_AUDIO, ITEM_TYPE_VIDEO
+from .constants import (
+    EXCLUDE_QUERY_PARAM,
+    FIELDS_QUERY_PARAM,
+    ITEM_TYPE_AUDIO,
+    ITEM_TYPE_VIDEO,
+    REQUIRED_ITEM_FIELDS,
+)
+from .loaders import load_contents
 from .models import Audio, Page, Video
 
 
@@ -20,7 +27,17 @@ class PageListSerializer(serializers.HyperlinkedModelSerializer):
         fields = ("id", "title", "url")
 
 
-class VideoSerializer(serializers.ModelSerializer):
+class ContentSerializer(serializers.ModelSerializer):
+    """Base serializer of page items; `fields=` keeps only the given fields."""
+
+    def __init__(self, *args, fields: Optional[Collection[str]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class VideoSerializer(ContentSerializer):
     """Serializer for video content objects."""
 
     type = serializers.SerializerMethodField()
@@ -33,7 +50,7 @@ class VideoSerializer(serializers.ModelSerializer):
         return ITEM_TYPE_VIDEO
 
 
-class AudioSerializer(serializers.ModelSerializer):
+class AudioSerializer(ContentSerializer):
     """Serializer for audio content objects."""
 
     type = serializers.SerializerMethodField()
@@ -46,6 +63,55 @@ class AudioSerializer(serializers.ModelSerializer):
         return ITEM_TYPE_AUDIO
 
 
+CONTENT_SERIALIZERS: Dict[str, type[ContentSerializer]] = {
+    ITEM_TYPE_VIDEO: VideoSerializer,
+    ITEM_TYPE_AUDIO: AudioSerializer,
+}
+
+# Every field a page item may have, in output order
+ITEM_FIELD_NAMES: tuple[str, ...] = tuple(
+    dict.fromkeys(f for s in CONTENT_SERIALIZERS.values() for f in s.Meta.fields)
+)
+
+
+def serialize_content(
+    obj: Any, fields: Optional[Collection[str]] = None
+) -> Optional[Dict[str, Any]]:
+    """Serialize a Video/Audio page item; other objects yield None."""
+    if isinstance(obj, Video):
+        return VideoSerializer(obj, fields=fields).data
+    if isinstance(obj, Audio):
+        return AudioSerializer(obj, fields=fields).data
+    return None
+
+
+def _field_names(params: Mapping[str, str], param: str) -> set[str]:
+    names = {name.strip() for name in params[param].split(",") if name.strip()}
+    unknown = names - set(ITEM_FIELD_NAMES)
+    if unknown:
+        raise serializers.ValidationError(
+            {param: f"Unknown fields: {', '.join(sorted(unknown))}."}
+        )
+    return names
+
+
+def parse_item_fields(params: Mapping[str, str]) -> Optional[FrozenSet[str]]:
+    """Page item fields selected by `?fields=`/`?exclude=`; None means all.
+
+    `id` and `type` are always kept. Unknown names raise a ValidationError.
+    """
+    selected: Optional[set[str]] = None
+    if FIELDS_QUERY_PARAM in params:
+        selected = _field_names(params, FIELDS_QUERY_PARAM)
+    if EXCLUDE_QUERY_PARAM in params:
+        excluded = _field_names(params, EXCLUDE_QUERY_PARAM)
+        base = set(ITEM_FIELD_NAMES) if selected is None else selected
+        selected = base - excluded
+    if selected is None:
+        return None
+    return frozenset(selected | set(REQUIRED_ITEM_FIELDS))
+
+
 class PageDetailSerializer(serializers.ModelSerializer):
     """Serializer for detailed page view with related content."""
 
@@ -57,10 +123,19 @@ class PageDetailSerializer(serializers.ModelSerializer):
 
     def get_items(self, obj: Page) -> List[Dict[str, Any]]:
         items: List[Dict[str, Any]] = []
-        for pc in obj.contents.select_related("content_type").all():
-            c = pc.content
-            if isinstance(c, Video):
-                items.append(VideoSerializer(c).data)
-            elif isinstance(c, Audio):
-                items.append(AudioSerializer(c).data)
+        fields = self.context.get("item_fields")
+        # `contents.all()` reuses the viewset prefetch; objects are batch-loaded,
+        # or taken from `content_map` when many pages were loaded together
+        content_map = self.context.get("content_map")
+        if content_map is None:
+            contents = load_contents(obj.contents.all(), fields)
+        else:
+            contents = [
+                content_map.get((pc.content_type_id, pc.object_id))
+                for pc in obj.contents.all()
+            ]
+        for c in contents:
+            data = serialize_content(c, fields)
+            if data is not None:
+                items.append(data)
         return items
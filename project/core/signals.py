@@ -0,0 +1,157 @@
+"""Signal handlers that keep page caches, snapshots, counter shards and trending
+scores in sync.
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Set
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .cache import bump_page_versions
+from .models import (
+    PAGE_LIST_CHANGE_PK,
+    Audio,
+    CounterShard,
+    Page,
+    PageContent,
+    PageListChange,
+    TrendingScore,
+    Video,
+)
+from .snapshots import rebuild_snapshots
+
+
+def _is_page_deletion(origin) -> bool:
+    """True if a delete cascades from a Page (its snapshot goes away with it)."""
+    if isinstance(origin, QuerySet):
+        return origin.model is Page
+    return isinstance(origin, Page)
+
+
+# Pages whose snapshots wait for the current transaction to commit
+_pending = threading.local()
+# Set inside `bulk_page_writes`
+_bulk = threading.local()
+
+
+def _pending_rebuilds() -> Set[int]:
+    if not hasattr(_pending, "page_ids"):
+        _pending.page_ids = set()
+    return _pending.page_ids
+
+
+def _rebuild_pending() -> None:
+    page_ids = _pending_rebuilds()
+    if not page_ids:
+        return  # an earlier callback of the same transaction did the work
+    page_ids = set(page_ids)
+    _pending.page_ids = set()
+    rebuild_snapshots(page_ids)
+    # Drop bodies cached from the old snapshot between the write and now
+    bump_page_versions(page_ids)
+
+
+def schedule_rebuild(page_ids: Iterable[int]) -> None:
+    """Rebuild snapshots of the pages once, when the transaction commits.
+
+    Every write of a transaction (e.g. an admin page saved with its inline
+    contents) adds its pages to one pending set; the first commit callback
+    rebuilds them all and the others find nothing left. Outside a transaction
+    the rebuild runs right away. Pages left over by a rolled back transaction
+    are rebuilt with the next commit, which is harmless.
+    """
+    _pending_rebuilds().update(page_ids)
+    transaction.on_commit(_rebuild_pending)
+
+
+def _pages_changed(
+    page_ids: Iterable[int], rebuild: bool = True, touch: bool = True
+) -> None:
+    page_ids = set(page_ids)
+    if touch and page_ids:
+        # Validators of the API (see `core.conditional`)
+        Page.objects.filter(id__in=page_ids).update(updated_at=timezone.now())
+    if rebuild and settings.PAGE_SNAPSHOT_ENABLED and page_ids:
+        schedule_rebuild(page_ids)
+    bump_page_versions(page_ids)
+
+
+def pages_changed(page_ids: Iterable[int]) -> None:
+    """Refresh pages after a bulk write that sends no signals (`import_content`)."""
+    _pages_changed(page_ids)
+
+
+@contextmanager
+def bulk_page_writes() -> Iterator[None]:
+    """Skip the per-row page refresh of `PageContent` writes in the block.
+
+    For bulk writers that call `pages_changed` for the pages they touched.
+    """
+    previous = getattr(_bulk, "active", False)
+    _bulk.active = True
+    try:
+        yield
+    finally:
+        _bulk.active = previous
+
+
+@receiver(post_save, sender=Page)
+def page_saved(sender, instance: Page, **kwargs) -> None:
+    # `updated_at` was just set by `save()`
+    _pages_changed([instance.pk], touch=False)
+
+
+@receiver(post_delete, sender=Page)
+def page_deleted(sender, instance: Page, **kwargs) -> None:
+    _pages_changed([instance.pk], rebuild=False, touch=False)
+    # `MAX(updated_at)` does not move when a page goes away
+    PageListChange.objects.update_or_create(
+        pk=PAGE_LIST_CHANGE_PK, defaults={"deleted_at": timezone.now()}
+    )
+
+
+@receiver(post_save, sender=PageContent)
+def page_content_saved(sender, instance: PageContent, **kwargs) -> None:
+    if getattr(_bulk, "active", False):
+        return
+    _pages_changed([instance.page_id])
+
+
+@receiver(post_delete, sender=PageContent)
+def page_content_deleted(sender, instance: PageContent, origin=None, **kwargs) -> None:
+    if getattr(_bulk, "active", False):
+        return
+    alive = not _is_page_deletion(origin)
+    _pages_changed([instance.page_id], rebuild=alive, touch=alive)
+
+
+@receiver([post_save, post_delete], sender=Video)
+@receiver([post_save, post_delete], sender=Audio)
+def content_changed(sender, instance: Video | Audio, **kwargs) -> None:
+    """Refresh every page that references the changed object."""
+    page_ids = PageContent.objects.filter(
+        content_type=ContentType.objects.get_for_model(sender),
+        object_id=instance.pk,
+    ).values_list("page_id", flat=True)
+    _pages_changed(page_ids)
+
+
+@receiver(post_delete, sender=Video)
+@receiver(post_delete, sender=Audio)
+def content_deleted(sender, instance: Video | Audio, **kwargs) -> None:
+    """Drop counter shards and the trending score of a deleted object.
+
+    They have no foreign key to it.
+    """
+    ct = ContentType.objects.get_for_model(sender)
+    CounterShard.objects.filter(content_type=ct, object_id=instance.pk).delete()
+    TrendingScore.objects.filter(content_type=ct, object_id=instance.pk).delete()
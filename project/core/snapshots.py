@@ -0,0 +1,172 @@
+"""Materialized page-detail snapshots.
+
+`PageSnapshot` keeps each page's rendered items without counters and large
+columns (`DEFERRED_ITEM_FIELDS`), so the detail endpoint reads one row by
+primary key plus one counter query instead of walking the generic relation;
+large columns are read separately and only when the request asks for them.
+Snapshots are rebuilt only for pages touched by a write, once per page when
+the transaction commits (see `core.signals`), and in bulk by the
+`rebuild_snapshots` command.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Collection, Dict, Iterable, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+
+from .constants import DEFERRED_ITEM_FIELDS
+from .loaders import (
+    PageDetail,
+    afetch_counters,
+    afetch_item_fields,
+    counted_pairs,
+    fetch_counters,
+    fetch_item_fields,
+    item_ids_by_type,
+    item_pairs,
+    load_content_map,
+)
+from .models import Page, PageSnapshot
+from .serializers import CONTENT_SERIALIZERS, ITEM_FIELD_NAMES, serialize_content
+
+COUNTER_FIELD: str = "counter"
+
+# Field order of rendered items, used to put `counter` back where it belongs
+ITEM_FIELDS: Dict[str, tuple[str, ...]] = {
+    item_type: serializer.Meta.fields
+    for item_type, serializer in CONTENT_SERIALIZERS.items()
+}
+
+# What a snapshot stores of each item
+SNAPSHOT_FIELDS: frozenset[str] = frozenset(ITEM_FIELD_NAMES) - {
+    COUNTER_FIELD,
+    *DEFERRED_ITEM_FIELDS,
+}
+
+
+def _deferred_names(fields: Optional[Collection[str]]) -> List[str]:
+    """Large columns the request asks for (all of them when `fields` is None)."""
+    return [f for f in DEFERRED_ITEM_FIELDS if fields is None or f in fields]
+
+
+def build_snapshots(page_ids: Iterable[int]) -> List[PageSnapshot]:
+    """Render snapshots for the given pages with a constant number of queries."""
+    pages = list(
+        Page.objects.filter(id__in=list(page_ids)).prefetch_related("contents")
+    )
+    objects = load_content_map(
+        (pc for page in pages for pc in page.contents.all()), SNAPSHOT_FIELDS
+    )
+
+    snapshots: List[PageSnapshot] = []
+    for page in pages:
+        items: List[Dict[str, Any]] = []
+        for pc in page.contents.all():
+            obj = objects.get((pc.content_type_id, pc.object_id))
+            data = serialize_content(obj, SNAPSHOT_FIELDS)
+            if data is not None:
+                items.append(dict(data))
+        snapshots.append(PageSnapshot(page=page, title=page.title, items=items))
+    return snapshots
+
+
+def save_snapshots(snapshots: List[PageSnapshot]) -> None:
+    """Insert or overwrite snapshots in a single statement."""
+    PageSnapshot.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=["page"],
+        update_fields=["title", "items", "built_at"],
+    )
+
+
+def rebuild_snapshots(page_ids: Iterable[int]) -> int:
+    """Rebuild snapshots of the given pages; return how many were written."""
+    snapshots = build_snapshots(page_ids)
+    save_snapshots(snapshots)
+    return len(snapshots)
+
+
+def _render(
+    snapshot: PageSnapshot,
+    counters: Dict[Tuple[str, int], int],
+    deferred: Dict[Tuple[str, int], Dict[str, Any]],
+    fields: Optional[Collection[str]],
+) -> Dict[str, Any]:
+    items: List[Dict[str, Any]] = []
+    for item in snapshot.items:
+        key = (item["type"], item["id"])
+        counter = counters.get(key)
+        if counter is None:
+            continue  # deleted since the snapshot was built
+        item = {**item, COUNTER_FIELD: counter, **deferred.get(key, {})}
+        items.append(
+            {
+                field: item[field]
+                for field in ITEM_FIELDS[item["type"]]
+                if fields is None or field in fields
+            }
+        )
+    return {"id": snapshot.page_id, "title": snapshot.title, "items": items}
+
+
+def render_snapshot(
+    snapshot: PageSnapshot, fields: Optional[Collection[str]] = None
+) -> Dict[str, Any]:
+    """Page-detail payload of a snapshot with live counters.
+
+    One counter query, plus one query per item type owning a requested large
+    column.
+    """
+    ids_by_type = item_ids_by_type(snapshot.items)
+    deferred = {}
+    names = _deferred_names(fields)
+    if names:
+        deferred = fetch_item_fields(ids_by_type, names)
+    return _render(snapshot, fetch_counters(ids_by_type), deferred, fields)
+
+
+def snapshot_pairs(snapshot: PageSnapshot) -> List[Tuple[int, int]]:
+    """Counted `(content_type_id, object_id)` pairs of the snapshot's items."""
+    return counted_pairs(item_pairs(snapshot.items))
+
+
+def get_snapshot_detail(
+    page_id: int, fields: Optional[Collection[str]] = None
+) -> Optional[PageDetail]:
+    """Page-detail payload served from the snapshot and its counted pairs.
+
+    None if the page does not exist. Pages without a snapshot yet (e.g. before
+    a backfill, or before the writing transaction's rebuild ran) are rendered
+    from a snapshot built in memory; reads never write it, so they cannot race
+    with the rebuild.
+    """
+    snapshot = PageSnapshot.objects.filter(page_id=page_id).first()
+    if snapshot is None:
+        snapshots = build_snapshots([page_id])
+        if not snapshots:
+            return None
+        snapshot = snapshots[0]
+    return render_snapshot(snapshot, fields), snapshot_pairs(snapshot)
+
+
+async def aget_snapshot_detail(
+    page_id: int, fields: Optional[Collection[str]] = None
+) -> Optional[PageDetail]:
+    """Async `get_snapshot_detail`; a missing snapshot is built in a thread."""
+    snapshot = await PageSnapshot.objects.filter(page_id=page_id).afirst()
+    if snapshot is None:
+        snapshots = await sync_to_async(build_snapshots)([page_id])
+        if not snapshots:
+            return None
+        snapshot = snapshots[0]
+    ids_by_type = item_ids_by_type(snapshot.items)
+    deferred = {}
+    names = _deferred_names(fields)
+    if names:
+        deferred = await afetch_item_fields(ids_by_type, names)
+    counters = await afetch_counters(ids_by_type)
+    # The ContentType cache is sync-only
+    pairs = await sync_to_async(snapshot_pairs)(snapshot)
+    return _render(snapshot, counters, deferred, fields), pairs
@@ -0,0 +1,247 @@
+"""Append-only on-disk spool for view counters the broker could not take.
+
+When publishing `increment_counters_task` fails, the request appends its
+deltas to a local file instead of writing to the database inline: one `write()`
+of one line, no fsync. A drainer (a thread started by the first spooled write
+of a process, or the `replay_counter_spool` command) later claims the file and
+applies it in batches once the broker is back.
+
+Layout of `COUNTER_SPOOL_DIR`:
+
+* `active.spool` — the file writers append to;
+* `claimed-<ns>.spool` — files taken over by a drainer (renamed from active);
+* `drain.lock` — held by the one drainer allowed to run at a time.
+
+Each line is `<crc32 hex> <json [[ct_id, obj_id, delta], ...]>\\n`. A line
+torn by a crash (no newline) or with a wrong checksum is skipped on replay; the
+next append first ends it with a newline so its own record stays intact.
+Writers hold a shared `flock` on the file while appending and a drainer takes
+an exclusive one before reading, so no append lands in a file being replayed;
+a writer that opened the file just before it was claimed notices the rename
+and retries on the new active file.
+
+A claimed file is deleted only after all of its deltas were applied, so a crash
+in between re-applies it on the next run (at least once, as the counter buffer).
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+Pair = Tuple[int, int]
+
+SPOOL_ACTIVE: str = "active.spool"
+SPOOL_CLAIMED_GLOB: str = "claimed-*.spool"
+SPOOL_DRAIN_LOCK: str = "drain.lock"
+# Objects per applied batch (one task message each)
+SPOOL_REPLAY_BATCH: int = 1000
+
+
+def encode_line(deltas: Dict[Pair, int]) -> bytes:
+    payload = json.dumps(
+        [[ct_id, obj_id, delta] for (ct_id, obj_id), delta in deltas.items()],
+        separators=(",", ":"),
+    ).encode()
+    return b"%08x %s\n" % (zlib.crc32(payload), payload)
+
+
+def decode_line(line: bytes) -> Optional[Dict[Pair, int]]:
+    """Deltas of a spool line; None if it is torn or corrupt."""
+    if not line.endswith(b"\n"):
+        return None
+    checksum, _, payload = line[:-1].partition(b" ")
+    try:
+        if int(checksum, 16) != zlib.crc32(payload):
+            return None
+        return {(ct_id, obj_id): delta for ct_id, obj_id, delta in json.loads(payload)}
+    except ValueError:
+        return None
+
+
+class CounterSpool:
+    """Local append-only spool of counter deltas (see module docstring)."""
+
+    def __init__(self, directory: str | os.PathLike | None = None):
+        self.directory = Path(directory or settings.COUNTER_SPOOL_DIR)
+
+    @property
+    def active_path(self) -> Path:
+        return self.directory / SPOOL_ACTIVE
+
+    def append(self, deltas: Dict[Pair, int]) -> None:
+        """Append one record; raises `OSError` if the spool is not writable."""
+        line = encode_line(deltas)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        while True:
+            fd = os.open(self.active_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_SH)
+                try:
+                    current = os.stat(self.active_path).st_ino
+                except FileNotFoundError:
+                    current = None
+                if current != os.fstat(fd).st_ino:
+                    continue  # claimed by a drainer in the meantime
+                size = os.fstat(fd).st_size
+                if size and os.pread(fd, 1, size - 1) != b"\n":
+                    # A crash tore the last line: keep it apart from this one
+                    # (writers racing here leave blank lines, skipped on replay)
+                    os.write(fd, b"\n" + line)
+                else:
+                    os.write(fd, line)
+                return
+            finally:
+                os.close(fd)
+
+    def claimed(self) -> List[Path]:
+        """Claimed files, oldest first (including ones left by a crashed drainer)."""
+        return sorted(self.directory.glob(SPOOL_CLAIMED_GLOB))
+
+    def claim(self) -> List[Path]:
+        """Move the active file aside for replay; return all claimed files."""
+        try:
+            os.rename(
+                self.active_path, self.directory / f"claimed-{time.time_ns()}.spool"
+            )
+        except FileNotFoundError:
+            pass
+        return self.claimed()
+
+    def pending(self) -> bool:
+        return self.active_path.exists() or bool(self.claimed())
+
+    def read(self, path: Path) -> Tuple[Dict[Pair, int], int]:
+        """Summed deltas of a claimed file and the number of skipped lines."""
+        deltas: Counter = Counter()
+        skipped = 0
+        with open(path, "rb") as f:
+            # Waits for writers that opened the file before it was claimed
+            fcntl.flock(f, fcntl.LOCK_EX)
+            for line in f:
+                if line == b"\n":
+                    continue
+                record = decode_line(line)
+                if record is None:
+                    skipped += 1
+                    continue
+                deltas.update(record)
+        return dict(deltas), skipped
+
+    def _rewrite(self, path: Path, deltas: Dict[Pair, int]) -> None:
+        """Atomically replace a claimed file with the given deltas."""
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            f.write(encode_line(deltas))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def replay(
+        self,
+        apply: Callable[[Dict[Pair, int]], None],
+        batch_size: int = SPOOL_REPLAY_BATCH,
+    ) -> Optional[Tuple[int, int]]:
+        """Apply every spooled delta in batches; return (objects, skipped lines).
+
+        Returns None if another drainer is running. A claimed file is deleted
+        after its last batch was applied; if `apply` raises, the file is
+        rewritten with the batches not applied yet and the error propagates.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / SPOOL_DRAIN_LOCK, "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            objects = skipped = 0
+            for path in self.claim():
+                deltas, torn = self.read(path)
+                if torn:
+                    logger.warning("Skipped %d torn lines in %s", torn, path)
+                items = list(deltas.items())
+                for start in range(0, len(items), batch_size):
+                    try:
+                        apply(dict(items[start : start + batch_size]))
+                    except Exception:
+                        self._rewrite(path, dict(items[start:]))
+                        raise
+                path.unlink()
+                objects += len(items)
+                skipped += torn
+            return objects, skipped
+
+
+class SpoolDrainer:
+    """Per-process thread that replays the spool every `COUNTER_SPOOL_DRAIN_INTERVAL`.
+
+    Started by the first spooled write of the process; it stops once the spool
+    is empty. Failed replays (the broker is still down) are retried.
+
+    It is also the circuit breaker of the process: `trip()` opens it and
+    `is_open` stays true until a replay went through (the broker took the
+    spooled deltas, or another drainer already had), so producers spool
+    directly instead of waiting on a dead broker for every request.
+    """
+
+    def __init__(self, apply: Callable[[Dict[Pair, int]], None]):
+        self.apply = apply
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._open = False
+
+    @property
+    def is_open(self) -> bool:
+        # A forked child inherits the flag but not the thread that clears it
+        thread = self._thread
+        return self._open and thread is not None and thread.is_alive()
+
+    def trip(self) -> None:
+        """Open the breaker after a failed publish and start draining."""
+        self._open = True
+        self.start()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="counter-spool-drainer", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        spool = CounterSpool()
+        try:
+            while True:
+                time.sleep(settings.COUNTER_SPOOL_DRAIN_INTERVAL)
+                try:
+                    replayed = spool.replay(self.apply)
+                except Exception:
+                    logger.warning(
+                        "Counter spool replay failed, will retry", exc_info=True
+                    )
+                    continue
+                if replayed is not None:
+                    self._open = False
+                with self._lock:
+                    # Under the lock: a write after this check starts a new thread
+                    if not spool.pending():
+                        self._thread = None
+                        return
+        finally:
+            self._open = False
+            connections.close_all()
@@ -1,36 +1,178 @@
 from __future__ import annotations
 
-from typing import Dict, Iterable, List, Tuple, Type
+import logging
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Tuple, Type
 
 from celery import shared_task
 
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
+from django.db import models, transaction
 from django.db.models import F
 
+from .analytics import record_views, rollup_views
+from .constants import COUNTER_MODE_BUFFERED, COUNTER_MODE_COALESCED
+from .counters import CounterBuffer, CounterCoalescer, add_to_shards, compact_shards
+from .metrics import STAGE_ENQUEUE, timed
+from .spool import CounterSpool, SpoolDrainer
+
+logger = logging.getLogger(__name__)
+
+
+def _counter_model(ct_id: int) -> Type[models.Model] | None:
+    """Return the model for a content type id if it has a `counter` field."""
+    model: Type[models.Model] | None = ContentType.objects.get_for_id(
+        ct_id
+    ).model_class()
+    # Skip invalid content types or models without `counter`
+    if model is None or not hasattr(model, "counter"):
+        return None
+    return model
+
 
 @shared_task
-def increment_counters_task(pairs: List[Tuple[int, int]]) -> None:
-    """Celery task to atomically increment `counter` fields for given objects."""
-    by_ct: Dict[int, List[int]] = {}
-    for ct_id, obj_id in pairs:
-        by_ct.setdefault(ct_id, []).append(obj_id)
-
-    for ct_id, ids in by_ct.items():
-        model: Type[models.Model] | None = ContentType.objects.get_for_id(
-            ct_id
-        ).model_class()
-        # Skip invalid content types or models without `counter`
-        if model is None or not hasattr(model, "counter"):
-            continue
-        model.objects.filter(id__in=ids).update(counter=F("counter") + 1)
+def increment_counters_task(
+    pairs: Sequence[Tuple[int, int]] = (),
+    deltas: Sequence[Tuple[int, int, int]] = (),
+) -> None:
+    """Celery task to atomically increment `counter` fields for given objects.
 
+    Each pair is one view; a pair repeated N times (e.g. an object shared by
+    several pages of a batch request) is incremented by N. `deltas` carries
+    already summed `(content_type_id, object_id, views)` triples, as published
+    by the coalescing producer.
+    """
+    # Pairs and triples arrive as lists through the broker
+    counts = Counter(tuple(pair) for pair in pairs)
+    for ct_id, obj_id, delta in deltas:
+        counts[(ct_id, obj_id)] += delta
+    apply_counter_deltas(counts)
 
-def increment_counters_async(pairs: Iterable[Tuple[int, int]]) -> None:
-    """Helper to enqueue the Celery task for counter increments."""
-    items = list(pairs)
+
+def apply_counter_deltas(deltas: Dict[Tuple[int, int], int]) -> None:
+    """Apply `counter = counter + N` with one UPDATE per (content type, delta).
+
+    With `COUNTER_SHARDS` set the deltas go to counter shards instead. With
+    `ANALYTICS_ENABLED` the views are also appended to the analytics buckets,
+    including pairs of pages, which have no counter (the trending scores are
+    fed from there by `rollup_views`).
+    """
+    if settings.ANALYTICS_ENABLED:
+        record_views(deltas)
+    if settings.COUNTER_SHARDS:
+        valid = {
+            pair: delta
+            for pair, delta in deltas.items()
+            if _counter_model(pair[0]) is not None
+        }
+        if valid:
+            add_to_shards(valid, settings.COUNTER_SHARDS)
+        return
+
+    by_ct_delta: Dict[Tuple[int, int], List[int]] = {}
+    for (ct_id, obj_id), delta in deltas.items():
+        by_ct_delta.setdefault((ct_id, delta), []).append(obj_id)
+
+    with transaction.atomic():
+        for (ct_id, delta), ids in by_ct_delta.items():
+            model = _counter_model(ct_id)
+            if model is None:
+                continue
+            model.objects.filter(id__in=ids).update(counter=F("counter") + delta)
+
+
+@shared_task(acks_late=True)
+def flush_counter_buffer_task() -> int:
+    """Periodic Celery task that writes buffered increments to the database."""
+    return CounterBuffer().flush(apply_counter_deltas)
+
+
+@shared_task
+def compact_counter_shards_task() -> int | None:
+    """Periodic Celery task that folds counter shards into `counter`."""
+    return compact_shards()
+
+
+@shared_task
+def rollup_views_task() -> int | None:
+    """Periodic Celery task that folds raw view buckets into rollups."""
+    return rollup_views()
+
+
+def enqueue_counter_deltas(deltas: Dict[Tuple[int, int], int]) -> None:
+    """Send one task message for summed deltas; raises if the broker is down."""
+    increment_counters_task.delay(
+        deltas=[(ct_id, obj_id, delta) for (ct_id, obj_id), delta in deltas.items()]
+    )
+
+
+# Replays spooled deltas through the broker once it is reachable again
+spool_drainer = SpoolDrainer(enqueue_counter_deltas)
+
+
+def spool_counter_deltas(deltas: Dict[Tuple[int, int], int]) -> None:
+    """Keep deltas the broker refused in the local spool (see `core.spool`)."""
+    try:
+        CounterSpool().append(deltas)
+    except OSError:
+        # Spool is not writable either: last resort, write to the database inline
+        logger.exception("Counter spool unavailable, applying increments inline")
+        apply_counter_deltas(deltas)
+        return
+    spool_drainer.start()
+
+
+def publish_counter_deltas(deltas: Dict[Tuple[int, int], int]) -> None:
+    """Enqueue one task for summed per-object deltas."""
+    if spool_drainer.is_open:
+        spool_counter_deltas(deltas)
+        return
     try:
-        increment_counters_task.delay(items)
+        enqueue_counter_deltas(deltas)
     except Exception:
-        # Fallback to synchronous execution if broker is unavailable
-        increment_counters_task(items)
+        # Broker is unavailable: spool until the drainer gets through again
+        spool_drainer.trip()
+        spool_counter_deltas(deltas)
+
+
+# Producer of the coalesced mode, one per process
+counter_coalescer = CounterCoalescer(publish_counter_deltas)
+
+
+def increment_counters_async(pairs: Iterable[Tuple[int, int]]) -> None:
+    """Helper to enqueue the Celery task for counter increments.
+
+    Callers pass each object at most once per page view; repeated pairs count
+    as separate views.
+
+    In coalesced mode (`COUNTER_MODE = "coalesced"`) increments are summed in
+    this process and published as one task per window (see `CounterCoalescer`).
+    In buffered mode (`COUNTER_MODE = "buffered"`) increments are only summed
+    in the shared buffer; `flush_counter_buffer_task` writes them later.
+    After a failed publish, increments go to the spool without trying the
+    broker until the drainer published again (see `SpoolDrainer`).
+    """
+    items = list(pairs)
+    # Time seen by the request (see `core.metrics`)
+    with timed(STAGE_ENQUEUE):
+        if settings.COUNTER_MODE == COUNTER_MODE_COALESCED:
+            counter_coalescer.add(items)
+            return
+        if settings.COUNTER_MODE == COUNTER_MODE_BUFFERED:
+            try:
+                CounterBuffer().add(items)
+                return
+            except Exception:
+                # Buffer cache is unavailable: fall through to the immediate path
+                pass
+        if spool_drainer.is_open:
+            # A publish failed lately: skip the broker (and its connect timeout)
+            spool_counter_deltas(Counter(items))
+            return
+        try:
+            increment_counters_task.delay(items)
+        except Exception:
+            # Broker is unavailable: spool until the drainer gets through again
+            spool_drainer.trip()
+            spool_counter_deltas(Counter(items))
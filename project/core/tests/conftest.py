@@ -1,11 +1,20 @@
 # Fixtures
 import pytest
 
+from django.core.cache import cache
+
 from rest_framework.test import APIClient
 
 from core.models import Audio, Page, Video
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
     return APIClient()
@@ -0,0 +1,140 @@
+import pytest
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Audio, Page, PageContent, Video
+from core.pagination import estimate_count
+
+
+def _ct(model):
+    return ContentType.objects.get_for_model(model).id
+
+
+def _fill(n, page_factory, video_factory, audio_factory):
+    """n pages, videos and audios; every page holds one video and one audio."""
+    for _ in range(n):
+        page, video, audio = page_factory(), video_factory(), audio_factory()
+        for position, obj in enumerate((video, audio), start=1):
+            PageContent.objects.create(
+                page=page,
+                content_type_id=_ct(type(obj)),
+                object_id=obj.id,
+                position=position,
+            )
+
+
+def _queries(client, url, params=None):
+    client.get(url, params)  # warm up the ContentType cache
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(url, params)
+    assert resp.status_code == 200
+    return len(ctx), resp
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    # session, user, statistics (in a savepoint), count, rows; plus the content
+    # type filter choices of PageContent
+    "model, limit",
+    [(Video, 8), (Audio, 8), (Page, 8), (PageContent, 9)],
+)
+def test_changelist_query_count_is_constant(
+    admin_client, page_factory, video_factory, audio_factory, model, limit
+):
+    url = reverse(f"admin:core_{model._meta.model_name}_changelist")
+    _fill(3, page_factory, video_factory, audio_factory)
+    few, _ = _queries(admin_client, url)
+
+    _fill(30, page_factory, video_factory, audio_factory)
+    many, resp = _queries(admin_client, url)
+
+    assert few == many <= limit
+    assert resp.context["cl"].result_count == model.objects.count()
+
+
+@pytest.mark.django_db
+def test_pagecontent_page_filter_does_not_list_pages(
+    admin_client, page_factory, video_factory, audio_factory
+):
+    _fill(5, page_factory, video_factory, audio_factory)
+    page = Page.objects.order_by("id").last()
+    url = reverse("admin:core_pagecontent_changelist")
+
+    _, resp = _queries(admin_client, url, {"page_id": page.id})
+
+    assert resp.context["cl"].result_count == 2
+    html = resp.content.decode()
+    assert 'name="page_id"' in html
+    # no filter link per page
+    assert "?page__id__exact=" not in html
+    assert admin_client.get(url, {"page_id": "x"}).status_code == 302
+
+
+@pytest.mark.django_db
+def test_change_forms_do_not_load_every_page(
+    admin_client, page_factory, video_factory, audio_factory
+):
+    _fill(3, page_factory, video_factory, audio_factory)
+    item = PageContent.objects.order_by("id").first()
+    page = item.page
+    edit_item = reverse("admin:core_pagecontent_change", args=[item.id])
+    edit_page = reverse("admin:core_page_change", args=[page.id])
+    few_item, _ = _queries(admin_client, edit_item)
+    few_page, _ = _queries(admin_client, edit_page)
+
+    _fill(30, page_factory, video_factory, audio_factory)
+    for position in range(3, 30):
+        PageContent.objects.create(
+            page=page, content_type_id=_ct(Video), object_id=1, position=position
+        )
+    many_item, resp = _queries(admin_client, edit_item)
+    many_page, _ = _queries(admin_client, edit_page)
+
+    # the page is an autocomplete widget, not a <select> of every page
+    assert few_item == many_item
+    assert "admin-autocomplete" in resp.content.decode()
+    # content type choices come from the cache, not a query per inline row
+    assert few_page == many_page
+
+
+@pytest.mark.django_db
+def test_changelist_uses_estimated_count(admin_client, settings, video_factory):
+    settings.ADMIN_EXACT_COUNT_LIMIT = 5
+    for _ in range(8):
+        video_factory()
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    for _ in range(4):
+        video_factory()
+    url = reverse("admin:core_video_changelist")
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = admin_client.get(url)
+
+    # the statistics say 8 rows: shown as is, without COUNT(*)
+    assert resp.context["cl"].result_count == 8
+    assert not any("COUNT(" in query["sql"] for query in ctx.captured_queries)
+
+    settings.ADMIN_PERFORMANCE_MODE = False
+    assert admin_client.get(url).context["cl"].result_count == 12
+
+
+@pytest.mark.parametrize(
+    "explain, expected",
+    [
+        ('{"Plan": {"Node Type": "Seq Scan", "Plan Rows": 42}}', 42),
+        ('[{"Plan": {"Plan Rows": 42}}]', None),
+        ('{"Plan": {}}', None),
+        ('{"Plan": {"Plan Rows": null}}', None),
+        ("Seq Scan on core_video", None),
+    ],
+)
+def test_filtered_estimate_reads_the_postgresql_plan(monkeypatch, explain, expected):
+    monkeypatch.setattr(connection, "vendor", "postgresql")
+    monkeypatch.setattr(QuerySet, "explain", lambda self, **options: explain)
+
+    assert estimate_count(Video.objects.filter(title="x")) == expected
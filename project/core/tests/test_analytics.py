@@ -0,0 +1,175 @@
+from datetime import timedelta
+
+import pytest
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.analytics import rollup_views, truncate
+from core.models import Page, PageContent, Video, ViewBucket, ViewRollup
+
+
+@pytest.fixture
+def analytics(settings):
+    settings.ANALYTICS_ENABLED = True
+    settings.ANALYTICS_HOURLY_RETENTION_DAYS = 2
+    settings.ANALYTICS_DAILY_RETENTION_DAYS = 30
+    return settings
+
+
+def _ct(model):
+    return ContentType.objects.get_for_model(model).id
+
+
+def _raw(obj, ago, count=1):
+    bucket = timezone.now().replace(second=0, microsecond=0) - ago
+    return ViewBucket.objects.create(
+        content_type_id=_ct(type(obj)),
+        object_id=obj.id,
+        bucket_start=bucket,
+        count=count,
+    )
+
+
+def _rollups(obj, granularity):
+    return dict(
+        ViewRollup.objects.filter(
+            content_type_id=_ct(type(obj)), object_id=obj.id, granularity=granularity
+        ).values_list("bucket_start", "count")
+    )
+
+
+@pytest.mark.django_db
+def test_views_are_recorded_per_object_and_page(
+    api_client, analytics, page_factory, video_factory, audio_factory
+):
+    page = page_factory()
+    video, audio = video_factory(), audio_factory()
+    for position, obj in enumerate((video, audio, video), start=1):
+        PageContent.objects.create(
+            page=page,
+            content_type_id=_ct(type(obj)),
+            object_id=obj.id,
+            position=position,
+        )
+
+    for _ in range(2):
+        api_client.get(reverse("page-detail", kwargs={"pk": page.id}))
+
+    views = {}
+    for row in ViewBucket.objects.all():
+        key = (row.content_type_id, row.object_id)
+        views[key] = views.get(key, 0) + row.count
+    assert views == {
+        (_ct(Video), video.id): 2,
+        (_ct(type(audio)), audio.id): 2,
+        (_ct(Page), page.id): 2,
+    }
+    video.refresh_from_db()
+    assert video.counter == 2
+
+
+@pytest.mark.django_db
+def test_rollup_folds_complete_minutes(analytics, video_factory):
+    video = video_factory()
+    _raw(video, timedelta(hours=3), 2)
+    _raw(video, timedelta(hours=3), 3)
+    _raw(video, timedelta(hours=1), 4)
+    current = _raw(video, timedelta(0), 7)
+
+    assert rollup_views(batch_size=2) == 3
+    # the current minute may still receive writes
+    assert list(ViewBucket.objects.values_list("id", flat=True)) == [current.id]
+
+    now = timezone.now()
+    three_ago = truncate(now - timedelta(hours=3), "hour")
+    one_ago = truncate(now - timedelta(hours=1), "hour")
+    assert _rollups(video, "hour") == {three_ago: 5, one_ago: 4}
+    days = {}
+    for bucket, count in ((three_ago, 5), (one_ago, 4)):
+        day = truncate(bucket, "day")
+        days[day] = days.get(day, 0) + count
+    assert _rollups(video, "day") == days
+
+    # later runs add to the existing rollups
+    _raw(video, timedelta(hours=1), 1)
+    assert rollup_views() == 1
+    assert _rollups(video, "hour")[one_ago] == 5
+
+
+@pytest.mark.django_db
+def test_rollup_applies_retention(analytics, video_factory):
+    video = video_factory()
+    _raw(video, timedelta(days=3))
+    _raw(video, timedelta(days=40))
+
+    call_command("rollup_views")
+
+    # hourly rows past 2 days and daily rows past 30 days are gone
+    assert list(_rollups(video, "hour").values()) == []
+    assert list(_rollups(video, "day").values()) == [1]
+
+
+def _expected(rows, granularity, points):
+    step = timedelta(hours=1) if granularity == "hour" else timedelta(days=1)
+    first = truncate(timezone.now(), granularity) - step * (points - 1)
+    views = [0] * points
+    for row in rows:
+        n = (truncate(row.bucket_start, granularity) - first) // step
+        if 0 <= n < points:
+            views[n] += row.count
+    return first, views
+
+
+@pytest.mark.django_db
+def test_series_is_zero_filled_and_bounded(api_client, analytics, video_factory):
+    video = video_factory()
+    rows = [_raw(video, timedelta(hours=h, minutes=2)) for h in (0, 2, 2, 30)]
+    rollup_views()
+    url = reverse("view-series", kwargs={"kind": "videos", "pk": video.id})
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = api_client.get(url, {"points": 5})
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert (data["type"], data["id"], data["granularity"]) == (
+        "video",
+        video.id,
+        "hour",
+    )
+    first, views = _expected(rows, "hour", 5)
+    assert data["series"][0]["start"] == first.isoformat().replace("+00:00", "Z")
+    assert [point["views"] for point in data["series"]] == views
+    assert data["total"] == sum(views)
+    # object lookup and one range scan, however many rows exist
+    assert len(ctx) == 2
+
+    daily = api_client.get(url, {"granularity": "day", "points": 3}).json()
+    assert [point["views"] for point in daily["series"]] == _expected(rows, "day", 3)[1]
+    assert daily["total"] == 4
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "kind, params, status",
+    [
+        ("videos", {"granularity": "minute"}, 400),
+        ("videos", {"points": 0}, 400),
+        ("videos", {"points": 49}, 400),  # 2 days of hourly retention
+        ("videos", {"points": "x"}, 400),
+        ("songs", {}, 404),
+    ],
+)
+def test_series_rejects_bad_requests(
+    api_client, analytics, video_factory, kind, params, status
+):
+    video = video_factory()
+    url = reverse("view-series", kwargs={"kind": kind, "pk": video.id})
+    assert api_client.get(url, params).status_code == status
+    missing = reverse("view-series", kwargs={"kind": "pages", "pk": 999})
+    assert api_client.get(missing).status_code == 404
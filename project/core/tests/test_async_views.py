@@ -0,0 +1,97 @@
+import pytest
+from asgiref.sync import async_to_sync
+
+from django.contrib.contenttypes.models import ContentType
+from django.test import AsyncClient
+from django.urls import reverse
+
+from core import async_views
+from core.models import PageContent
+
+
+def _attach(page, obj, position):
+    PageContent.objects.create(
+        page=page,
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=obj.id,
+        position=position,
+    )
+
+
+@pytest.fixture
+def async_get():
+    client = AsyncClient()
+
+    async def get(url, **params):
+        resp = await client.get(url, params)
+        # let scheduled counter increments finish before the test inspects the DB
+        for task in list(async_views._background_tasks):
+            await task
+        return resp
+
+    return async_to_sync(get)
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("use_snapshots", [False, True])
+def test_async_detail_matches_sync_detail(
+    api_client,
+    async_get,
+    page_factory,
+    video_factory,
+    audio_factory,
+    settings,
+    use_snapshots,
+):
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    settings.PAGE_SNAPSHOT_ENABLED = use_snapshots
+    page = page_factory(title="Page")
+    video = video_factory(title="V", counter=0)
+    _attach(page, video, 1)
+    _attach(page, audio_factory(title="A", counter=3), 2)
+
+    resp = async_get(reverse("async-page-detail", kwargs={"pk": page.id}))
+    assert resp.status_code == 200
+    # counters were incremented in the background after the response
+    video.refresh_from_db()
+    assert video.counter == 1
+
+    sync = api_client.get(reverse("page-detail", kwargs={"pk": page.id})).json()
+    for item in sync["items"]:
+        item["counter"] -= 1
+    assert resp.json() == sync
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_detail_unknown_page(async_get):
+    resp = async_get(reverse("async-page-detail", kwargs={"pk": 999}))
+    assert resp.status_code == 404
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_list_has_page_number_shape(async_get, page_factory):
+    for n in range(1, 8):
+        page_factory(title=f"Page {n}")
+
+    resp = async_get(reverse("async-page-list"), page=2, page_size=3)
+    data = resp.json()
+    assert data["count"] == 7
+    assert [p["title"] for p in data["results"]] == ["Page 4", "Page 5", "Page 6"]
+    assert "page=3" in data["next"]
+    assert "page=" not in data["previous"]
+    assert data["results"][0]["url"].endswith(
+        reverse("async-page-detail", kwargs={"pk": data["results"][0]["id"]})
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_detail_honours_fields(async_get, page_factory, audio_factory):
+    page = page_factory()
+    _attach(page, audio_factory(title="A"), 1)
+    url = reverse("async-page-detail", kwargs={"pk": page.id})
+
+    resp = async_get(url, fields="title")
+    assert resp.json()["items"] == [
+        {"id": resp.json()["items"][0]["id"], "type": "audio", "title": "A"}
+    ]
+    assert async_get(url, fields="nope").status_code == 400
@@ -0,0 +1,105 @@
+import pytest
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Page, PageContent
+from core.serializers import PageDetailSerializer
+
+
+def _attach(page, obj, position):
+    PageContent.objects.create(
+        page=page,
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=obj.id,
+        position=position,
+    )
+
+
+def _batch(api_client, ids):
+    return api_client.get(reverse("page-batch"), {"ids": ",".join(str(i) for i in ids)})
+
+
+@pytest.mark.django_db
+def test_batch_matches_detail_shape(
+    api_client, page_factory, video_factory, audio_factory
+):
+    shared = video_factory(title="Shared")
+    first = page_factory(title="First")
+    _attach(first, shared, 1)
+    _attach(first, audio_factory(title="A"), 2)
+    second = page_factory(title="Second")
+    _attach(second, video_factory(title="V"), 1)
+    _attach(second, shared, 2)
+    empty = page_factory(title="Empty")
+
+    pages = [second, first, empty]
+    expected = [PageDetailSerializer(Page.objects.get(pk=p.pk)).data for p in pages]
+
+    # requested order is kept; unknown and repeated ids are ignored
+    resp = _batch(api_client, [second.id, 999, first.id, second.id, empty.id])
+    assert resp.status_code == 200
+    assert resp.json() == expected
+
+
+@pytest.mark.django_db
+def test_batch_counts_each_page_view(
+    api_client, page_factory, video_factory, audio_factory
+):
+    shared = video_factory(counter=0)
+    audio = audio_factory(counter=0)
+    pages = [page_factory() for _ in range(3)]
+    for page in pages:
+        _attach(page, shared, 1)
+    # repeated within one page: still one view of that page
+    _attach(pages[0], audio, 2)
+    _attach(pages[0], audio, 3)
+
+    assert _batch(api_client, [p.id for p in pages]).status_code == 200
+
+    shared.refresh_from_db()
+    audio.refresh_from_db()
+    assert shared.counter == 3
+    assert audio.counter == 1
+
+
+@pytest.mark.django_db
+def test_batch_query_count_is_constant(
+    api_client, page_factory, video_factory, audio_factory, monkeypatch
+):
+    # Count the read path only; counter UPDATEs are grouped by delta
+    calls = []
+    monkeypatch.setattr("core.views.increment_counters_async", calls.append)
+
+    def make_pages(n):
+        pages = []
+        for _ in range(n):
+            page = page_factory()
+            _attach(page, video_factory(), 1)
+            _attach(page, audio_factory(), 2)
+            pages.append(page)
+        return [p.id for p in pages]
+
+    small, large = make_pages(2), make_pages(20)
+
+    def count_queries(ids):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = _batch(api_client, ids)
+        assert resp.status_code == 200
+        assert len(resp.json()) == len(ids)
+        return len(ctx.captured_queries)
+
+    # pages, PageContent rows, one query per content type
+    assert count_queries(small) == count_queries(large) == 4
+    # one counter call per request, covering every page
+    assert [len(pairs) for pairs in calls] == [4, 40]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("ids", ["", "1,x", ",".join(str(n) for n in range(1, 102))])
+def test_batch_rejects_bad_ids(api_client, ids):
+    resp = api_client.get(reverse("page-batch"), {"ids": ids})
+    assert resp.status_code == 400
+    assert "ids" in resp.json()
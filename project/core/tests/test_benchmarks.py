@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from django.core.management import call_command
+
+from core.benchmarks import percentile, summarize
+
+
+def test_percentiles_use_nearest_rank():
+    samples = [float(n) for n in range(1, 101)]
+    assert percentile(samples, 50) == 50
+    assert percentile(samples, 99) == 99
+    assert summarize(samples)["p95_ms"] == 95
+
+
+@pytest.mark.django_db
+def test_bench_pagination_command_runs(capsys):
+    call_command(
+        "bench_pagination",
+        "--page-number=3",
+        "--page-size=2",
+        "--repeat=2",
+        "--ensure-pages",
+    )
+    out = capsys.readouterr().out
+    assert "cursor page       3" in out
+
+
+@pytest.mark.django_db
+def test_bench_api_writes_json_report(tmp_path):
+    output = tmp_path / "bench.json"
+    call_command(
+        "bench_api",
+        "--seed-data",
+        "--pages=20",
+        "--videos=5",
+        "--audios=5",
+        "--requests=5",
+        f"--output={output}",
+    )
+
+    report = json.loads(output.read_text())
+    assert report["dataset"]["pages"] == 20
+    rows = {(r["endpoint"], r["mode"]): r for r in report["results"]}
+    assert set(rows) == {("list", "in-process"), ("detail", "in-process")}
+    for row in rows.values():
+        assert row["errors"] == 0
+        assert row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"]
+        assert row["queries_per_request"] > 0
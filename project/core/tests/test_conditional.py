@@ -0,0 +1,173 @@
+from datetime import timedelta
+
+import pytest
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import Page, PageContent, PageListChange
+
+
+def _attach(page, obj, position):
+    PageContent.objects.create(
+        page=page,
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=obj.id,
+        position=position,
+    )
+
+
+@pytest.fixture
+def page(page_factory, video_factory, audio_factory):
+    page = page_factory(title="Page")
+    _attach(page, video_factory(title="V", counter=0), 1)
+    _attach(page, audio_factory(title="A"), 2)
+    return page
+
+
+def _detail(page):
+    return reverse("page-detail", kwargs={"pk": page.id})
+
+
+@pytest.mark.django_db
+def test_detail_not_modified_skips_rendering(api_client, page):
+    first = api_client.get(_detail(page))
+    etag = first["ETag"]
+    assert etag.startswith('W/"')  # counters are not covered by the validator
+    assert first["Last-Modified"]
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = api_client.get(_detail(page), HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 304
+    assert resp["ETag"] == etag
+    sql = " ".join(q["sql"] for q in ctx.captured_queries)
+    assert '"core_pagesnapshot"' not in sql
+    assert '"core_video"."title"' not in sql
+
+    # the 304 still counted as a view, without changing the validator
+    video = PageContent.objects.get(page=page, position=1).content
+    assert video.counter == 2
+    assert api_client.get(_detail(page))["ETag"] == etag
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("cached", [False, True])
+def test_not_modified_reads_only_the_pairs(api_client, page, settings, cached):
+    settings.PAGE_DETAIL_CACHE_ENABLED = cached
+    etag = api_client.get(_detail(page))["ETag"]
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = api_client.get(_detail(page), HTTP_IF_NONE_MATCH=etag)
+
+    assert resp.status_code == 304
+    queries = [q["sql"] for q in ctx.captured_queries]
+    # validators, the pairs unless cached, then the counter UPDATEs (eager
+    # task: savepoint, one per content type, release)
+    assert len(queries) == (5 if cached else 6)
+    reads = [sql for sql in queries if sql.startswith("SELECT")]
+    assert '"core_page"."updated_at"' in reads[0]
+    if not cached:
+        assert reads[1].startswith(
+            'SELECT "core_pagecontent"."content_type_id" AS "content_type_id", '
+            '"core_pagecontent"."object_id" AS "object_id" FROM'
+        )
+    assert len(reads) == (1 if cached else 2)
+
+
+@pytest.mark.django_db
+def test_detail_if_modified_since(api_client, page):
+    last_modified = api_client.get(_detail(page))["Last-Modified"]
+    resp = api_client.get(_detail(page), HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert resp.status_code == 304
+
+
+@pytest.mark.django_db
+def test_counter_free_representation_has_strong_etag(api_client, page):
+    full = api_client.get(_detail(page))["ETag"]
+    resp = api_client.get(_detail(page), {"exclude": "counter"})
+    assert not resp["ETag"].startswith("W/")
+    assert resp["ETag"] != full.removeprefix("W/")
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("change", ["content", "attach", "detach", "page"])
+def test_detail_validator_follows_writes(api_client, page, audio_factory, change):
+    etag = api_client.get(_detail(page))["ETag"]
+
+    if change == "content":
+        video = PageContent.objects.get(page=page, position=1).content
+        video.title = "Renamed"
+        video.save()
+    elif change == "attach":
+        _attach(page, audio_factory(), 3)
+    elif change == "detach":
+        PageContent.objects.filter(page=page, position=2).first().delete()
+    else:
+        page.title = "Renamed"
+        page.save()
+
+    resp = api_client.get(_detail(page), HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200
+    assert resp["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_list_conditional_get(api_client, page_factory):
+    for n in range(3):
+        page_factory(title=f"Page {n}")
+    url = reverse("page-list")
+
+    etag = api_client.get(url)["ETag"]
+    assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    # another page of results is another representation
+    assert api_client.get(url, {"page_size": 2})["ETag"] != etag
+
+    page_factory(title="New")
+    resp = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200
+    assert resp.json()["count"] == 4
+
+
+@pytest.mark.django_db
+def test_list_validators_follow_deletes_without_counting(api_client, page_factory):
+    pages = [page_factory(title=f"Page {n}") for n in range(3)]
+    url = reverse("page-list")
+    etag = api_client.get(url)["ETag"]
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert api_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert len(ctx) == 2  # MAX(updated_at) and the last deletion
+    assert not any("COUNT(" in query["sql"] for query in ctx.captured_queries)
+
+    # not the newest page: MAX(updated_at) stays the same
+    pages[0].delete()
+    resp = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200
+    assert resp.json()["count"] == 2
+
+
+@pytest.mark.django_db
+def test_list_last_modified_follows_deletes(api_client, page_factory):
+    pages = [page_factory(title=f"Page {n}") for n in range(2)]
+    Page.objects.update(updated_at=timezone.now() - timedelta(minutes=5))
+    url = reverse("page-list")
+    last_modified = api_client.get(url)["Last-Modified"]
+    assert api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code == 304
+
+    pages[0].delete()
+
+    # stored in the database, so every worker sees it
+    assert PageListChange.objects.get().deleted_at > Page.objects.get().updated_at
+    resp = api_client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert resp.status_code == 200
+    assert resp.json()["count"] == 1
+    assert resp["Last-Modified"] != last_modified
+
+
+@pytest.mark.django_db
+def test_missing_page_is_404(api_client):
+    resp = api_client.get(reverse("page-detail", kwargs={"pk": 999}))
+    assert resp.status_code == 404
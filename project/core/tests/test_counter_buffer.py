@@ -0,0 +1,121 @@
+import pytest
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.counters import CounterBuffer, check_buffer_backend
+from core.models import Audio, PageContent, Video
+from core.tasks import apply_counter_deltas, flush_counter_buffer_task
+
+
+@pytest.fixture
+def buffered(settings):
+    settings.COUNTER_MODE = "buffered"
+    buffer = CounterBuffer()
+    buffer.cache.clear()
+    yield buffer
+    buffer.cache.clear()
+
+
+def _attach(page, obj, position):
+    PageContent.objects.create(
+        page=page,
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=obj.id,
+        position=position,
+    )
+
+
+@pytest.mark.django_db
+def test_buffered_views_are_flushed_in_bulk(
+    api_client, buffered, page_factory, video_factory, audio_factory
+):
+    page = page_factory()
+    video = video_factory(counter=0)
+    audio = audio_factory(counter=5)
+    _attach(page, video, 1)
+    _attach(page, audio, 2)
+
+    for _ in range(3):
+        resp = api_client.get(reverse("page-detail", kwargs={"pk": page.id}))
+        assert resp.status_code == 200
+
+    # nothing written until the flush
+    video.refresh_from_db()
+    assert video.counter == 0
+
+    assert buffered.flush(apply_counter_deltas, wait_for_writers=False) == 2
+    video.refresh_from_db()
+    audio.refresh_from_db()
+    assert video.counter == 3
+    assert audio.counter == 8
+
+    # the buffer is empty afterwards
+    assert buffered.flush(apply_counter_deltas, wait_for_writers=False) == 0
+
+
+@pytest.mark.django_db
+def test_flush_groups_updates_by_delta(buffered, video_factory, audio_factory):
+    ct_video = ContentType.objects.get_for_model(Video).id
+    ct_audio = ContentType.objects.get_for_model(Audio).id
+    videos = [video_factory() for _ in range(4)]
+    audio = audio_factory()
+
+    buffered.add([(ct_video, v.id) for v in videos])
+    buffered.add([(ct_video, videos[0].id), (ct_audio, audio.id)])
+
+    with CaptureQueriesContext(connection) as ctx:
+        buffered.flush(apply_counter_deltas, wait_for_writers=False)
+
+    updates = [q for q in ctx.captured_queries if q["sql"].startswith("UPDATE")]
+    # video +2, videos +1, audio +1
+    assert len(updates) == 3
+    assert [Video.objects.get(id=v.id).counter for v in videos] == [2, 1, 1, 1]
+
+
+@pytest.mark.django_db
+def test_flush_waits_one_interval_for_in_flight_writers(buffered, video_factory):
+    ct_video = ContentType.objects.get_for_model(Video).id
+    video = video_factory()
+    buffered.add([(ct_video, video.id)])
+
+    # the first periodic run only retires the generation
+    assert flush_counter_buffer_task() == 0
+    assert flush_counter_buffer_task() == 1
+    video.refresh_from_db()
+    assert video.counter == 1
+
+
+@pytest.mark.django_db
+def test_failed_flush_is_retried(buffered, video_factory):
+    ct_video = ContentType.objects.get_for_model(Video).id
+    video = video_factory()
+    buffered.add([(ct_video, video.id)])
+
+    def broken(deltas):
+        raise RuntimeError("db is down")
+
+    with pytest.raises(RuntimeError):
+        buffered.flush(broken, wait_for_writers=False)
+
+    assert buffered.flush(apply_counter_deltas, wait_for_writers=False) == 1
+    video.refresh_from_db()
+    assert video.counter == 1
+
+
+def test_buffer_rejects_per_process_cache(settings):
+    settings.CACHES = {
+        **settings.CACHES,
+        "counters": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    }
+    with pytest.raises(ImproperlyConfigured):
+        check_buffer_backend()
+
+    settings.CACHES = {
+        **settings.CACHES,
+        "counters": {"BACKEND": "django.core.cache.backends.redis.RedisCache"},
+    }
+    check_buffer_backend()
@@ -0,0 +1,152 @@
+import os
+import subprocess
+import sys
+import textwrap
+import threading
+
+import pytest
+
+from django.contrib.contenttypes.models import ContentType
+from django.urls import reverse
+
+from core.counters import CounterCoalescer
+from core.models import Audio, PageContent, Video
+from core.tasks import counter_coalescer, increment_counters_task
+
+
+def _attach(page, obj, position):
+    PageContent.objects.create(
+        page=page,
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=obj.id,
+        position=position,
+    )
+
+
+@pytest.fixture
+def window(settings):
+    settings.COUNTER_COALESCE_WINDOW = 60
+    settings.COUNTER_COALESCE_MAX_PAIRS = 1000
+    return settings
+
+
+def test_increments_are_summed_into_one_publish(window):
+    published = []
+    coalescer = CounterCoalescer(published.append)
+
+    coalescer.add([(1, 10), (2, 20)])
+    coalescer.add([(1, 10)])
+    coalescer.add([(1, 11), (1, 10)])
+
+    assert published == []
+    assert coalescer.flush() == 3
+    assert published == [{(1, 10): 3, (2, 20): 1, (1, 11): 1}]
+    assert coalescer.flush() == 0
+
+
+def test_size_cap_publishes_immediately(window):
+    window.COUNTER_COALESCE_MAX_PAIRS = 2
+    published = []
+    coalescer = CounterCoalescer(published.append)
+
+    coalescer.add([(1, 10), (1, 10)])
+    assert published == []
+    coalescer.add([(1, 11)])
+    assert published == [{(1, 10): 2, (1, 11): 1}]
+
+
+def test_window_publishes_in_the_background(window):
+    window.COUNTER_COALESCE_WINDOW = 0.05
+    done = threading.Event()
+    published = []
+
+    def publish(deltas):
+        published.append(deltas)
+        done.set()
+
+    coalescer = CounterCoalescer(publish)
+    coalescer.add([(1, 10)])
+    coalescer.add([(1, 10)])
+
+    assert done.wait(timeout=5)
+    assert published == [{(1, 10): 2}]
+
+
+def test_pending_deltas_are_published_at_exit(tmp_path, settings):
+    out = tmp_path / "published.txt"
+    script = textwrap.dedent(f"""
+        import django
+        django.setup()
+        from core.counters import CounterCoalescer
+
+        def publish(deltas):
+            with open({str(out)!r}, "w") as f:
+                f.write(repr(sorted(deltas.items())))
+
+        CounterCoalescer(publish).add([(1, 10), (1, 10), (2, 5)])
+        """)
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": "project.settings_test",
+        "COUNTER_COALESCE_WINDOW": "60",
+    }
+    # The process exits long before the window closes
+    subprocess.run(
+        [sys.executable, "-c", script], cwd=settings.BASE_DIR, env=env, check=True
+    )
+
+    assert out.read_text() == "[((1, 10), 2), ((2, 5), 1)]"
+
+
+@pytest.mark.django_db
+def test_task_accepts_pairs_and_deltas(video_factory, audio_factory):
+    ct_video = ContentType.objects.get_for_model(Video).id
+    ct_audio = ContentType.objects.get_for_model(Audio).id
+    video = video_factory(counter=1)
+    audio = audio_factory(counter=0)
+
+    increment_counters_task(
+        pairs=[[ct_video, video.id]],
+        deltas=[[ct_video, video.id, 4], [ct_audio, audio.id, 2]],
+    )
+
+    video.refresh_from_db()
+    audio.refresh_from_db()
+    assert (video.counter, audio.counter) == (6, 2)
+
+
+@pytest.mark.django_db
+def test_coalesced_views_publish_one_message(
+    api_client, window, page_factory, video_factory, audio_factory, monkeypatch
+):
+    window.COUNTER_MODE = "coalesced"
+    messages = []
+    monkeypatch.setattr(
+        increment_counters_task,
+        "delay",
+        lambda **kwargs: messages.append(kwargs) or increment_counters_task(**kwargs),
+    )
+    video = video_factory(counter=0)
+    audio = audio_factory(counter=0)
+    first, second = page_factory(), page_factory()
+    _attach(first, video, 1)
+    _attach(first, audio, 2)
+    _attach(second, video, 1)
+
+    for page in (first, second, first):
+        resp = api_client.get(reverse("page-detail", kwargs={"pk": page.id}))
+        assert resp.status_code == 200
+    video.refresh_from_db()
+    assert video.counter == 0
+
+    assert counter_coalescer.flush() == 2
+    assert len(messages) == 1
+    assert sorted(messages[0]["deltas"]) == sorted(
+        [
+            (ContentType.objects.get_for_model(Video).id, video.id, 3),
+            (ContentType.objects.get_for_model(Audio).id, audio.id, 2),
+        ]
+    )
+    video.refresh_from_db()
+    audio.refresh_from_db()
+    assert (video.counter, audio.counter) == (3, 2)
@@ -0,0 +1,160 @@
+import json
+
+import pytest
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.urls import reverse
+
+from core.counters import _compact_batch, compact_shards, shard_totals
+from core.models import CounterShard, PageContent, Video
+from core.tasks import apply_counter_deltas, increment_counters_task
+
+
+@pytest.fixture
+def sharded(settings):
+    settings.COUNTER_SHARDS = 4
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+
+
+def _attach(page, obj, position):
+    PageContent.objects.create(
+        page=page,
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=obj.id,
+        position=position,
+    )
+
+
+@pytest.mark.django_db
+def test_increments_go_to_shards(sharded, video_factory):
+    video = video_factory(counter=5)
+    ct_id = ContentType.objects.get_for_model(video).id
+
+    for _ in range(20):
+        increment_counters_task([[ct_id, video.id]])
+    apply_counter_deltas({(ct_id, video.id): 10})
+
+    video.refresh_from_db()
+    assert video.counter == 5  # the hot row is never updated
+    shards = CounterShard.objects.filter(content_type_id=ct_id, object_id=video.id)
+    assert 1 <= shards.count() <= 4
+    assert sum(s.count for s in shards) == 30
+    assert shard_totals([(ct_id, video.id)]) == {(ct_id, video.id): 30}
+
+
+@pytest.mark.django_db
+def test_cached_total_follows_writes(
+    sharded, video_factory, django_capture_on_commit_callbacks
+):
+    video = video_factory()
+    pair = (ContentType.objects.get_for_model(video).id, video.id)
+
+    assert shard_totals([pair]) == {pair: 0}  # cached
+    with django_capture_on_commit_callbacks(execute=True):
+        apply_counter_deltas({pair: 3})
+    assert shard_totals([pair]) == {pair: 3}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("use_snapshots", [False, True])
+@pytest.mark.parametrize("use_cache", [False, True])
+def test_detail_counter_includes_shards(
+    api_client,
+    sharded,
+    settings,
+    page_factory,
+    video_factory,
+    audio_factory,
+    use_snapshots,
+    use_cache,
+    django_capture_on_commit_callbacks,
+):
+    settings.PAGE_SNAPSHOT_ENABLED = use_snapshots
+    settings.PAGE_DETAIL_CACHE_ENABLED = use_cache
+    page = page_factory()
+    _attach(page, video_factory(counter=2), 1)
+    _attach(page, audio_factory(counter=0), 2)
+    url = reverse("page-detail", kwargs={"pk": page.id})
+
+    counters = []
+    for _ in range(3):
+        with django_capture_on_commit_callbacks(execute=True):
+            resp = api_client.get(url)
+        counters.append([item["counter"] for item in resp.json()["items"]])
+    # each response shows the views counted before it
+    assert counters == [[2, 0], [3, 1], [4, 2]]
+
+
+@pytest.mark.django_db
+def test_compaction_folds_shards_into_counter(
+    sharded, video_factory, audio_factory, django_capture_on_commit_callbacks
+):
+    video, audio = video_factory(counter=5), audio_factory(counter=1)
+    pairs = [
+        (ContentType.objects.get_for_model(obj).id, obj.id) for obj in (video, audio)
+    ]
+    for _ in range(8):
+        apply_counter_deltas(dict.fromkeys(pairs, 2))
+    assert shard_totals(pairs) == dict.fromkeys(pairs, 16)  # cached
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert compact_shards(batch_size=3) >= 2
+
+    assert not CounterShard.objects.exists()
+    video.refresh_from_db()
+    audio.refresh_from_db()
+    assert (video.counter, audio.counter) == (21, 17)
+    # the cached totals were dropped with the shards
+    assert shard_totals(pairs) == dict.fromkeys(pairs, 0)
+
+    call_command("compact_counter_shards")
+
+
+@pytest.mark.django_db
+def test_compaction_keeps_increments_made_meanwhile(sharded, video_factory):
+    video = video_factory()
+    ct_id = ContentType.objects.get_for_model(video).id
+    shard = CounterShard.objects.create(
+        content_type_id=ct_id, object_id=video.id, shard=0, count=4
+    )
+    rows = [(shard.id, ct_id, video.id, 4)]
+    # a view lands on the shard between the read and the fold
+    CounterShard.objects.filter(id=shard.id).update(count=6)
+
+    _compact_batch(rows)
+
+    video.refresh_from_db()
+    shard.refresh_from_db()
+    assert (video.counter, shard.count) == (4, 2)
+
+
+@pytest.mark.django_db
+def test_admin_counter_includes_shards(admin_client, sharded, video_factory):
+    video = video_factory(counter=3)
+    apply_counter_deltas({(ContentType.objects.get_for_model(video).id, video.id): 4})
+
+    resp = admin_client.get(
+        reverse("admin:core_video_changelist"), {"o": "3"}  # sort by counter
+    )
+
+    assert resp.status_code == 200
+    assert Video.objects.get().counter == 3
+    assert '<td class="field-views">7</td>' in resp.content.decode()
+
+
+@pytest.mark.django_db
+def test_shards_are_deleted_with_the_object(sharded, video_factory):
+    video = video_factory()
+    apply_counter_deltas({(ContentType.objects.get_for_model(video).id, video.id): 1})
+    video.delete()
+    assert not CounterShard.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_bench_counters_reports_modes(video_factory, capsys):
+    video_factory()
+    call_command("bench_counters", "--workers=1", "--increments=3", "--shards=0,2")
+    results = json.loads(capsys.readouterr().out)["results"]
+    assert [r["shards"] for r in results] == [0, 2]
+    assert all(r["calls"] == 3 and r["errors"] == 0 and r["lost"] == 0 for r in results)
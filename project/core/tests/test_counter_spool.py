@@ -0,0 +1,204 @@
+import threading
+import time
+
+import pytest
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.urls import reverse
+
+from core.models import PageContent, Video
+from core.spool import CounterSpool, SpoolDrainer, encode_line
+from core.tasks import (
+    enqueue_counter_deltas,
+    increment_counters_async,
+    increment_counters_task,
+    publish_counter_deltas,
+)
+
+
+@pytest.fixture
+def spool(settings, tmp_path):
+    settings.COUNTER_SPOOL_DIR = str(tmp_path / "spool")
+    return CounterSpool()
+
+
+@pytest.fixture
+def broker_down(monkeypatch):
+    def delay(*args, **kwargs):
+        raise ConnectionError("broker is down")
+
+    monkeypatch.setattr(increment_counters_task, "delay", delay)
+    started = []
+    monkeypatch.setattr("core.tasks.spool_drainer.start", lambda: started.append(1))
+    return started
+
+
+def _replayed(spool, **kwargs):
+    applied = []
+    result = spool.replay(applied.append, **kwargs)
+    totals = {}
+    for batch in applied:
+        for pair, delta in batch.items():
+            totals[pair] = totals.get(pair, 0) + delta
+    return result, totals
+
+
+@pytest.mark.django_db
+def test_broker_outage_spools_instead_of_writing(
+    api_client, spool, broker_down, page_factory, video_factory
+):
+    page = page_factory()
+    video = video_factory(counter=1)
+    PageContent.objects.create(
+        page=page,
+        content_type=ContentType.objects.get_for_model(Video),
+        object_id=video.id,
+        position=1,
+    )
+
+    for _ in range(3):
+        resp = api_client.get(reverse("page-detail", kwargs={"pk": page.id}))
+        assert resp.status_code == 200
+
+    video.refresh_from_db()
+    assert video.counter == 1  # nothing written in the request
+    assert len(spool.active_path.read_bytes().splitlines()) == 3
+    assert broker_down
+
+    call_command("replay_counter_spool", "--direct")
+    video.refresh_from_db()
+    assert video.counter == 4
+    assert not spool.pending()
+
+
+def test_coalesced_publish_failure_is_spooled(spool, broker_down):
+    publish_counter_deltas({(1, 10): 5})
+
+    assert _replayed(spool) == ((1, 0), {(1, 10): 5})
+
+
+def test_torn_and_corrupt_lines_are_skipped(spool):
+    spool.append({(1, 10): 1})
+    spool.append({(1, 10): 2, (2, 20): 1})
+    corrupt = bytearray(encode_line({(1, 10): 100}))
+    corrupt[-3] ^= 1
+    with open(spool.active_path, "ab") as f:
+        f.write(bytes(corrupt))
+        # a crash in the middle of an append
+        f.write(encode_line({(1, 10): 1000})[:-4])
+
+    assert _replayed(spool) == ((2, 2), {(1, 10): 3, (2, 20): 1})
+    assert not spool.pending()
+
+
+def test_append_after_a_torn_line_is_kept(spool):
+    spool.append({(1, 10): 1})
+    with open(spool.active_path, "ab") as f:
+        f.write(encode_line({(1, 10): 1000})[:-4])  # a crash mid-append
+    spool.append({(1, 10): 7})
+    spool.append({(1, 10): 2})
+
+    assert _replayed(spool) == ((1, 1), {(1, 10): 10})
+
+
+def test_appends_after_a_claim_go_to_a_new_file(spool):
+    spool.append({(1, 10): 1})
+    # a drainer crashed after claiming the file
+    assert len(spool.claim()) == 1
+    spool.append({(1, 10): 2})
+
+    # one object in each of the two files
+    assert _replayed(spool) == ((2, 0), {(1, 10): 3})
+    assert spool.claimed() == []
+
+
+def test_failed_apply_keeps_only_unapplied_batches(spool):
+    spool.append({(1, n): 1 for n in range(5)})
+    applied = []
+
+    def flaky(batch):
+        if len(applied) == 2:
+            raise ConnectionError("broker is down again")
+        applied.append(batch)
+
+    with pytest.raises(ConnectionError):
+        spool.replay(flaky, batch_size=2)
+
+    result, rest = _replayed(spool)
+    assert result == (1, 0)
+    assert [pair for batch in applied for pair in batch] + list(rest) == [
+        (1, n) for n in range(5)
+    ]
+
+
+def test_concurrent_appends_and_replays_lose_nothing(spool):
+    totals = {}
+
+    def writer():
+        for _ in range(200):
+            spool.append({(1, 10): 1})
+
+    threads = [threading.Thread(target=writer) for _ in range(8)]
+    for t in threads:
+        t.start()
+    while any(t.is_alive() for t in threads):
+        totals[(1, 10)] = totals.get((1, 10), 0) + _replayed(spool)[1].get((1, 10), 0)
+    for t in threads:
+        t.join()
+    totals[(1, 10)] += _replayed(spool)[1].get((1, 10), 0)
+
+    assert totals == {(1, 10): 1600}
+
+
+def test_drainer_retries_until_the_spool_is_empty(spool, settings):
+    settings.COUNTER_SPOOL_DRAIN_INTERVAL = 0.01
+    spool.append({(1, 10): 2})
+    attempts, applied = [], []
+
+    def apply(deltas):
+        attempts.append(deltas)
+        if len(attempts) == 1:
+            raise ConnectionError("broker is down")
+        applied.append(deltas)
+
+    SpoolDrainer(apply).start()
+    deadline = time.monotonic() + 5
+    while spool.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert applied == [{(1, 10): 2}]
+    assert not spool.pending()
+
+
+def test_open_breaker_spools_without_calling_the_broker(spool, settings, monkeypatch):
+    settings.COUNTER_SPOOL_DRAIN_INTERVAL = 0.2
+    broker_up = threading.Event()
+    produced, drained = [], []
+
+    def delay(*args, **kwargs):
+        # Producers pass the pairs, the drainer passes summed `deltas`
+        (drained if "deltas" in kwargs else produced).append(kwargs or args)
+        if not broker_up.is_set():
+            raise ConnectionError("broker is down")
+
+    monkeypatch.setattr(increment_counters_task, "delay", delay)
+    drainer = SpoolDrainer(enqueue_counter_deltas)
+    monkeypatch.setattr("core.tasks.spool_drainer", drainer)
+
+    for _ in range(5):
+        increment_counters_async([(1, 10)])
+    assert drainer.is_open
+    # only the first request tried the broker
+    assert len(produced) == 1
+    assert len(spool.active_path.read_bytes().splitlines()) == 5
+
+    broker_up.set()
+    deadline = time.monotonic() + 5
+    while drainer.is_open and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not drainer.is_open
+    assert drained[-1] == {"deltas": [(1, 10, 5)]}
+
+    increment_counters_async([(1, 10)])
+    assert len(produced) == 2
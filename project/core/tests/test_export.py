@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Page, PageContent
+from core.serializers import PageDetailSerializer
+
+
+def _attach(page, obj, position):
+    PageContent.objects.create(
+        page=page,
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=obj.id,
+        position=position,
+    )
+
+
+def _lines(resp):
+    body = b"".join(resp.streaming_content)
+    assert body.endswith(b"\n")
+    return [json.loads(line) for line in body.splitlines()]
+
+
+@pytest.fixture
+def pages(page_factory, video_factory, audio_factory, monkeypatch):
+    monkeypatch.setattr("core.views.EXPORT_CHUNK_SIZE", 2)
+    shared = video_factory(title="Shared", counter=3)
+    pages = []
+    for n in range(5):
+        page = page_factory(title=f"Page {n}")
+        # positions out of insertion order
+        _attach(page, audio_factory(title=f"A{n}"), 2)
+        _attach(page, shared, 1)
+        pages.append(page)
+    pages.append(page_factory(title="Empty"))
+    return pages
+
+
+@pytest.mark.django_db
+def test_export_streams_one_detail_per_line(api_client, pages):
+    resp = api_client.get(reverse("page-export"))
+
+    assert resp.status_code == 200
+    assert resp.streaming
+    assert resp["Content-Type"] == "application/x-ndjson"
+    expected = [PageDetailSerializer(Page.objects.get(pk=p.pk)).data for p in pages]
+    assert _lines(resp) == expected
+
+
+@pytest.mark.django_db
+def test_export_honours_sparse_fields(api_client, pages):
+    resp = api_client.get(reverse("page-export"), {"fields": "title"})
+
+    for line in _lines(resp):
+        for item in line["items"]:
+            assert set(item) == {"id", "type", "title"}
+
+
+@pytest.mark.django_db
+def test_export_rejects_unknown_fields(api_client, pages):
+    resp = api_client.get(reverse("page-export"), {"fields": "nope"})
+
+    assert resp.status_code == 400
+    assert resp["Content-Type"] == "application/x-ndjson"
+    assert len(resp.content.splitlines()) == 1
+
+
+@pytest.mark.django_db
+def test_export_does_not_count_views(api_client, pages, monkeypatch):
+    calls = []
+    monkeypatch.setattr("core.views.increment_counters_async", calls.append)
+
+    _lines(api_client.get(reverse("page-export")))
+    assert calls == []
+
+
+@pytest.mark.django_db
+def test_export_queries_per_chunk(api_client, pages):
+    resp = api_client.get(reverse("page-export"))
+
+    with CaptureQueriesContext(connection) as ctx:
+        chunks = list(resp.streaming_content)
+    # 6 pages in chunks of 2; pages and contents are read once, then one query
+    # per content type of each chunk
+    assert len(chunks) == 3
+    assert len(ctx) == 2 + 3 * 2
+    assert not any("COUNT(" in q["sql"] for q in ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_export_stops_when_the_client_disconnects(api_client, pages):
+    resp = api_client.get(reverse("page-export"))
+    stream = iter(resp.streaming_content)
+    assert len(next(stream).splitlines()) == 2
+
+    # What the server does when the client goes away
+    resp.close()
+    with CaptureQueriesContext(connection) as ctx:
+        assert list(stream) == []
+    assert len(ctx) == 0
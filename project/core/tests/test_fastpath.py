@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from django.contrib.contenttypes.models import ContentType
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Audio, PageContent
+from core.renderers import ORJSONRenderer
+
+TRICKY = 'Ünïcødé "quoted" \\ / \t\n \u2028 \u2029 \x01 \U0001f600'
+
+
+def _attach(page, obj, position):
+    PageContent.objects.create(
+        page=page,
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=obj.id,
+        position=position,
+    )
+
+
+@pytest.fixture
+def pages(page_factory, video_factory, audio_factory, monkeypatch, settings):
+    # Keep counters still between the two renderings
+    monkeypatch.setattr("core.views.increment_counters_async", lambda pairs: None)
+    settings.PAGE_SNAPSHOT_ENABLED = False
+    settings.PAGE_DETAIL_CACHE_ENABLED = False
+
+    shared = video_factory(title=TRICKY, counter=7, subtitles_url="")
+    gone = audio_factory(title="Gone")
+    pages = []
+    for n in range(7):
+        page = page_factory(title=f"{TRICKY} {n}")
+        _attach(page, shared, 1)
+        _attach(page, audio_factory(title=f"A{n}", transcript=TRICKY * 3), 2)
+        _attach(page, video_factory(title=f"V{n}", counter=n), 3)
+        _attach(page, shared, 4)
+        pages.append(page)
+    # a dangling reference is skipped by both paths
+    _attach(pages[0], gone, 5)
+    Audio.objects.filter(pk=gone.pk).delete()
+    return pages
+
+
+def _urls(pages):
+    urls = [
+        (reverse("page-list"), {}),
+        (reverse("page-list"), {"page": 2, "page_size": 3}),
+        (reverse("page-list"), {"pagination": "cursor", "page_size": 4}),
+    ]
+    for page in pages[:3]:
+        detail = reverse("page-detail", kwargs={"pk": page.id})
+        urls += [
+            (detail, {}),
+            (detail, {"fields": "title,transcript"}),
+            (detail, {"exclude": "counter,video_url"}),
+        ]
+    return urls
+
+
+@pytest.mark.django_db
+def test_fast_path_is_byte_identical(api_client, pages, settings):
+    for url, params in _urls(pages):
+        settings.PAGES_FAST_SERIALIZATION = False
+        slow = api_client.get(url, params)
+        settings.PAGES_FAST_SERIALIZATION = True
+        fast = api_client.get(url, params)
+
+        assert slow.status_code == fast.status_code == 200
+        assert fast.content == slow.content, (url, params)
+
+
+@pytest.mark.django_db
+def test_orjson_renderer_is_byte_identical(api_client, pages):
+    for url, params in _urls(pages):
+        data = api_client.get(url, params).data
+        assert ORJSONRenderer().render(data) == JSONRenderer().render(data)
+    # U+2028/U+2029 stay escaped as with the stdlib encoder
+    assert b"\\u2028" in ORJSONRenderer().render({"t": TRICKY})
+
+
+def test_orjson_renderer_spells_exponent_floats_differently():
+    data = {"plain": [0.5, 2.0, 123456.789], "exponent": [1e16, 1e-05]}
+    ours, stdlib = ORJSONRenderer().render(data), JSONRenderer().render(data)
+
+    # the same numbers, only their spelling differs
+    assert json.loads(ours) == json.loads(stdlib) == data
+    assert ours == b'{"plain":[0.5,2.0,123456.789],"exponent":[1e16,0.00001]}'
+    assert b"[1e+16,1e-05]" in stdlib
+
+
+@pytest.mark.django_db
+def test_fast_detail_missing_page(api_client, settings):
+    settings.PAGE_SNAPSHOT_ENABLED = False
+    settings.PAGES_FAST_SERIALIZATION = True
+    resp = api_client.get(reverse("page-detail", kwargs={"pk": 999}))
+    assert resp.status_code == 404
@@ -0,0 +1,165 @@
+import json
+
+import pytest
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+
+from core.models import Audio, Page, PageContent, Video
+
+
+def _write(path, records):
+    path.write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+    return str(path)
+
+
+def _video(key, title="Video"):
+    return {
+        "type": "video",
+        "external_id": key,
+        "title": title,
+        "video_url": f"https://cdn.example.com/{key}.mp4",
+    }
+
+
+def _audio(key, title="Audio"):
+    return {"type": "audio", "external_id": key, "title": title, "transcript": "t"}
+
+
+def _page(key, items, title="Page"):
+    return {
+        "type": "page",
+        "external_id": key,
+        "title": title,
+        "items": [{"type": t, "external_id": k} for t, k in items],
+    }
+
+
+def _items(page):
+    return [
+        (pc.content_type.model, pc.content.external_id)
+        for pc in PageContent.objects.filter(page=page).order_by("position")
+    ]
+
+
+@pytest.mark.django_db
+def test_import_creates_content_and_ordered_pages(tmp_path):
+    path = _write(
+        tmp_path / "in.ndjson",
+        [
+            _video("v1"),
+            _audio("a1"),
+            _video("v2"),
+            _page("p1", [("audio", "a1"), ("video", "v2"), ("video", "v1")]),
+            _page("p2", [("video", "v1"), ("video", "missing")]),
+        ],
+    )
+
+    # chunks of 2 records: content is always imported before its pages
+    call_command("import_content", path, "--chunk-size=2")
+
+    assert Video.objects.count() == 2
+    assert Audio.objects.count() == 1
+    assert _items(Page.objects.get(external_id="p1")) == [
+        ("audio", "a1"),
+        ("video", "v2"),
+        ("video", "v1"),
+    ]
+    # unknown references are skipped without leaving gaps in positions
+    p2 = Page.objects.get(external_id="p2")
+    assert list(p2.contents.values_list("position", flat=True)) == [1]
+
+
+@pytest.mark.django_db
+def test_reimport_updates_in_place(tmp_path, api_client, settings):
+    settings.PAGE_DETAIL_CACHE_ENABLED = True
+    call_command(
+        "import_content",
+        _write(tmp_path / "a.ndjson", [_video("v1"), _audio("a1"), _page("p1", [])]),
+    )
+    video = Video.objects.get(external_id="v1")
+    Video.objects.filter(pk=video.pk).update(counter=5)
+    page = Page.objects.get(external_id="p1")
+    # warm the detail cache and snapshot
+    api_client.get(reverse("page-detail", kwargs={"pk": page.pk}))
+
+    call_command(
+        "import_content",
+        _write(
+            tmp_path / "b.ndjson",
+            [
+                _video("v1", title="Renamed"),
+                _page("p1", [("video", "v1"), ("audio", "a1")], title="New"),
+            ],
+        ),
+    )
+
+    video.refresh_from_db()
+    assert (Video.objects.count(), Page.objects.count()) == (1, 1)
+    assert video.title == "Renamed"
+    assert video.counter == 5  # live counters are never overwritten
+    resp = api_client.get(reverse("page-detail", kwargs={"pk": page.pk}))
+    assert resp.json()["title"] == "New"
+    assert [i["title"] for i in resp.json()["items"]] == ["Renamed", "Audio"]
+
+
+@pytest.mark.django_db
+def test_page_without_items_keeps_its_contents(tmp_path):
+    call_command(
+        "import_content",
+        _write(tmp_path / "a.ndjson", [_video("v1"), _page("p1", [("video", "v1")])]),
+    )
+    record = {"type": "page", "external_id": "p1", "title": "Renamed"}
+    call_command("import_content", _write(tmp_path / "b.ndjson", [record]))
+
+    page = Page.objects.get(external_id="p1")
+    assert page.title == "Renamed"
+    assert _items(page) == [("video", "v1")]
+
+
+@pytest.mark.django_db
+def test_dry_run_writes_nothing(tmp_path, capsys):
+    path = _write(
+        tmp_path / "in.ndjson", [_video("v1"), _page("p1", [("video", "v1")])]
+    )
+
+    call_command("import_content", path, "--dry-run")
+
+    assert not Video.objects.exists() and not Page.objects.exists()
+    out = capsys.readouterr().out
+    assert "Dry run: would import 2 records" in out
+    assert "1 page-content links" in out
+    assert "rows/s" in out
+
+
+@pytest.mark.django_db
+def test_invalid_line_reports_its_number(tmp_path):
+    path = tmp_path / "in.ndjson"
+    path.write_text(json.dumps(_video("v1")) + "\n\n{not json}\n", encoding="utf-8")
+
+    with pytest.raises(CommandError, match="line 3"):
+        call_command("import_content", str(path))
+    with pytest.raises(CommandError, match="missing title, video_url"):
+        call_command(
+            "import_content",
+            _write(tmp_path / "b.ndjson", [{"type": "video", "external_id": "x"}]),
+        )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "record, message",
+    [
+        ({**_video("v"), "title": None}, "`title` must be a string"),
+        ({**_video("v"), "title": "x" * 256}, "`title` is longer than 255"),
+        ({**_video("v"), "subtitles_url": None}, "`subtitles_url` must be a string"),
+        ({**_audio("a"), "transcript": 5}, "`transcript` must be a string"),
+        (_page("p" * 256, []), "`external_id` is longer than 255"),
+    ],
+)
+def test_invalid_values_are_rejected_with_their_line(tmp_path, record, message):
+    path = _write(tmp_path / "in.ndjson", [_video("ok"), record])
+
+    with pytest.raises(CommandError, match=f"line 2: {message}"):
+        call_command("import_content", path)
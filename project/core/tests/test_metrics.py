@@ -0,0 +1,156 @@
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.metrics import MetricsRegistry, RequestStats, registry
+from core.models import PageContent
+
+
+@pytest.fixture(autouse=True)
+def metrics(settings, tmp_path):
+    settings.METRICS_ENABLED = True
+    settings.METRICS_DIR = str(tmp_path)
+    registry.clear()
+    yield tmp_path
+    registry.clear()
+
+
+def _parse(text):
+    samples = {}
+    for line in text.splitlines():
+        if line.startswith("#"):
+            continue
+        name, labels, value = re.fullmatch(r"(\w+)\{(.*)\} (\S+)", line).groups()
+        samples[(name, labels)] = float(value)
+    return samples
+
+
+def _samples(api_client, **headers):
+    """`{(name, labels): value}` of the /metrics exposition."""
+    resp = api_client.get(reverse("metrics"), headers=headers)
+    assert resp.status_code == 200
+    assert resp["Content-Type"].startswith("text/plain; version=0.0.4")
+    return _parse(resp.content.decode())
+
+
+@pytest.mark.django_db
+def test_page_detail_metrics(api_client, page_factory, video_factory, audio_factory):
+    page = page_factory()
+    for position, obj in enumerate((video_factory(), audio_factory()), start=1):
+        PageContent.objects.create(
+            page=page,
+            content_type=ContentType.objects.get_for_model(obj),
+            object_id=obj.id,
+            position=position,
+        )
+
+    with CaptureQueriesContext(connection) as ctx:
+        resp = api_client.get(reverse("page-detail", kwargs={"pk": page.id}))
+    assert resp.status_code == 200
+    queries = len(ctx)  # the next request resets the query log
+    samples = _samples(api_client)
+
+    labels = 'route="page-detail",action="retrieve"'
+    assert samples[("http_request_duration_seconds_count", labels)] == 1
+    assert samples[("http_request_duration_seconds_bucket", f'{labels},le="+Inf"')] == 1
+    assert samples[("http_request_db_queries_total", labels)] == queries
+    assert samples[("http_request_db_duration_seconds_total", labels)] > 0
+    for stage in ("serialization", "enqueue"):
+        key = ("http_request_stage_duration_seconds_total", f'{labels},stage="{stage}"')
+        assert samples[key] > 0
+
+
+@pytest.mark.django_db
+def test_metrics_are_labelled_by_route_and_action(api_client):
+    api_client.get(reverse("page-list"))
+    api_client.get(reverse("page-list"))
+    api_client.get("/no/such/path/")
+
+    samples = _samples(api_client)
+
+    count = "http_request_duration_seconds_count"
+    assert samples[(count, 'route="page-list",action="list"')] == 2
+    assert samples[(count, 'route="unmatched",action="get"')] == 1
+    # cumulative buckets end at the request count
+    buckets = [
+        value
+        for (name, labels), value in samples.items()
+        if name == "http_request_duration_seconds_bucket"
+        and labels.startswith('route="page-list"')
+    ]
+    assert buckets == sorted(buckets) and buckets[-1] == 2
+
+
+@pytest.mark.django_db
+def test_metrics_add_up_the_files_of_all_processes(api_client, metrics):
+    other = MetricsRegistry()  # another worker, with its own file
+    stats = RequestStats()
+    stats.queries = 3
+    other.observe(("page-list", "list"), 0.02, stats)
+    other.flush()
+    (metrics / "metrics-0-0.json").write_text("torn")
+
+    api_client.get(reverse("page-list"))
+    samples = _samples(api_client)
+
+    labels = 'route="page-list",action="list"'
+    assert samples[("http_request_duration_seconds_count", labels)] == 2
+    assert samples[("http_request_db_queries_total", labels)] >= 3
+    # only this process's requests
+    assert (
+        _parse(registry.render())[("http_request_duration_seconds_count", labels)] == 1
+    )
+
+
+@pytest.mark.django_db
+def test_metrics_token(api_client, settings):
+    settings.METRICS_TOKEN = "s3cret"
+
+    assert api_client.get(reverse("metrics")).status_code == 403
+    resp = api_client.get(reverse("metrics"), headers={"Authorization": "Bearer wrong"})
+    assert resp.status_code == 403
+    assert _samples(api_client, Authorization="Bearer s3cret") is not None
+
+
+@pytest.mark.django_db
+def test_metrics_under_asgi(page_factory):
+    page = page_factory()
+
+    resp = async_to_sync(AsyncClient().get)(
+        reverse("page-detail", kwargs={"pk": page.id})
+    )
+    assert resp.status_code == 200
+
+    samples = _parse(registry.render())
+    labels = 'route="page-detail",action="retrieve"'
+    assert samples[("http_request_duration_seconds_count", labels)] == 1
+    # the sync view runs in another thread than the middleware
+    assert samples[("http_request_db_queries_total", labels)] > 0
+
+
+@pytest.mark.django_db
+def test_metrics_can_be_disabled(api_client, settings):
+    settings.METRICS_ENABLED = False
+
+    api_client.get(reverse("page-list"))
+
+    assert api_client.get(reverse("metrics")).status_code == 404
+    assert "page-list" not in registry.render()
+
+
+@pytest.mark.django_db
+def test_bench_metrics_command_runs(capsys, page_factory):
+    page_factory()
+
+    call_command("bench_metrics", "--requests=3", "--rounds=2")
+
+    out = capsys.readouterr().out
+    assert "detail: mean" in out and "us per query" in out
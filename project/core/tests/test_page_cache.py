@@ -0,0 +1,85 @@
+import pytest
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import PageContent
+
+
+def _attach(page, obj, position):
+    return PageContent.objects.create(
+        page=page,
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=obj.id,
+        position=position,
+    )
+
+
+@pytest.fixture
+def page_with_items(page_factory, video_factory, audio_factory):
+    page = page_factory(title="Page")
+    video = video_factory(title="V", counter=0)
+    audio = audio_factory(title="A", counter=10)
+    _attach(page, video, 1)
+    _attach(page, audio, 2)
+    return page, video, audio
+
+
+def _get(api_client, page):
+    resp = api_client.get(reverse("page-detail", kwargs={"pk": page.id}))
+    assert resp.status_code == 200
+    return resp.data
+
+
+@pytest.mark.django_db
+def test_cached_detail_overlays_live_counters(api_client, page_with_items):
+    page, video, audio = page_with_items
+
+    first = _get(api_client, page)
+    assert [i["counter"] for i in first["items"]] == [0, 10]
+
+    with CaptureQueriesContext(connection) as ctx:
+        second = _get(api_client, page)
+
+    # counters were incremented by the first request and show up on a cache hit
+    assert [i["counter"] for i in second["items"]] == [1, 11]
+    # no page / PageContent rendering queries on a hit (only the validator lookup)
+    assert not any('"core_page"."title"' in q["sql"] for q in ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_content_change_invalidates_cached_detail(api_client, page_with_items):
+    page, video, _ = page_with_items
+    _get(api_client, page)
+
+    video.title = "Renamed"
+    video.save()
+
+    assert _get(api_client, page)["items"][0]["title"] == "Renamed"
+
+
+@pytest.mark.django_db
+def test_page_content_change_invalidates_cached_detail(
+    api_client, page_with_items, video_factory
+):
+    page, _, _ = page_with_items
+    _get(api_client, page)
+
+    _attach(page, video_factory(title="New"), 3)
+    assert [i["title"] for i in _get(api_client, page)["items"]] == ["V", "A", "New"]
+
+    PageContent.objects.filter(page=page, position=1).get().delete()
+    assert [i["title"] for i in _get(api_client, page)["items"]] == ["A", "New"]
+
+
+@pytest.mark.django_db
+def test_deleted_page_is_not_served_from_cache(api_client, page_with_items):
+    page, _, _ = page_with_items
+    _get(api_client, page)
+
+    page_id = page.id
+    page.delete()
+    resp = api_client.get(reverse("page-detail", kwargs={"pk": page_id}))
+    assert resp.status_code == 404
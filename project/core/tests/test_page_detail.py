@@ -1,6 +1,9 @@
 import pytest
 
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from core.models import Audio, PageContent, Video
@@ -40,3 +43,97 @@ def test_page_detail_increments_counters(
     # order and payload
     items = resp.data["items"]
     assert [i["type"] for i in items] == ["video", "audio"]
+
+
+def _attach(page, obj, position):
+    PageContent.objects.create(
+        page=page,
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=obj.id,
+        position=position,
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("use_snapshots", [False, True])
+def test_page_detail_query_count_is_constant(
+    api_client, page_factory, video_factory, audio_factory, settings, use_snapshots
+):
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    settings.PAGE_SNAPSHOT_ENABLED = use_snapshots
+    small = page_factory(title="Small")
+    _attach(small, video_factory(), 1)
+    _attach(small, audio_factory(), 2)
+
+    large = page_factory(title="Large")
+    for position in range(1, 51):
+        factory = video_factory if position % 2 else audio_factory
+        _attach(large, factory(title=f"Item {position}"), position)
+
+    def count_queries(page):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = api_client.get(reverse("page-detail", kwargs={"pk": page.id}))
+        assert resp.status_code == 200
+        return len(ctx.captured_queries), resp.data["items"]
+
+    small_count, _ = count_queries(small)
+    large_count, items = count_queries(large)
+
+    assert large_count == small_count
+    # items are put back in `position` order
+    assert [i["title"] for i in items] == [f"Item {n}" for n in range(1, 51)]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    # page validators, page, items, counter increments (4: two UPDATEs in a
+    # savepoint); a hit reads the validators and live counters only
+    "use_snapshots, fast, miss",
+    [
+        # page, contents, videos, audios
+        (False, False, 9),
+        # page, pairs, videos, audios
+        (False, True, 9),
+        # snapshot, audio transcripts, counters
+        (True, False, 8),
+    ],
+)
+def test_page_detail_total_query_count(
+    api_client,
+    page_factory,
+    video_factory,
+    audio_factory,
+    settings,
+    django_capture_on_commit_callbacks,
+    use_snapshots,
+    fast,
+    miss,
+):
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    settings.PAGE_SNAPSHOT_ENABLED = use_snapshots
+    settings.PAGES_FAST_SERIALIZATION = fast
+    with django_capture_on_commit_callbacks(execute=True):  # builds the snapshot
+        page = page_factory(title="Page")
+        video = video_factory()
+        for position, obj in enumerate((video, audio_factory(), video), start=1):
+            _attach(page, obj, position)
+    url = reverse("page-detail", kwargs={"pk": page.id})
+    api_client.get(url)  # warms the ContentType cache
+
+    def queries():
+        with CaptureQueriesContext(connection) as ctx:
+            assert api_client.get(url).status_code == 200
+        return [query["sql"] for query in ctx.captured_queries]
+
+    cache.clear()
+    cold = queries()
+    warm = queries()
+
+    assert (len(cold), len(warm)) == (miss, 6)
+    # content rows are read once, for the payload, and never joined to
+    # django_content_type
+    assert sum("core_pagecontent" in sql for sql in cold) == (not use_snapshots)
+    assert not any("core_pagecontent" in sql for sql in warm)
+    assert not any("django_content_type" in sql for sql in cold + warm)
+    video.refresh_from_db()
+    assert video.counter == 3  # once per view, although the page repeats it
@@ -0,0 +1,47 @@
+import pytest
+
+from django.urls import reverse
+
+
+@pytest.fixture
+def pages(page_factory):
+    return [page_factory(title=f"Page {n}") for n in range(1, 8)]
+
+
+@pytest.mark.django_db
+def test_page_number_pagination_is_default(api_client, pages):
+    resp = api_client.get(reverse("page-list"), {"page": 2, "page_size": 3})
+    assert resp.status_code == 200
+    assert resp.data["count"] == 7
+    assert [p["title"] for p in resp.data["results"]] == ["Page 4", "Page 5", "Page 6"]
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_walks_all_pages(api_client, pages):
+    url = reverse("page-list") + "?pagination=cursor&page_size=3"
+    titles = []
+    while url:
+        resp = api_client.get(url)
+        assert resp.status_code == 200
+        assert "count" not in resp.data
+        titles += [p["title"] for p in resp.data["results"]]
+        url = resp.data["next"]
+    assert titles == [f"Page {n}" for n in range(1, 8)]
+
+
+@pytest.mark.django_db
+def test_cursor_pagination_from_settings(api_client, pages, settings):
+    settings.PAGES_PAGINATION = "cursor"
+    resp = api_client.get(reverse("page-list"))
+    assert "count" not in resp.data
+    assert resp.data["next"]
+
+    # old clients keep the page-number shape
+    resp = api_client.get(reverse("page-list"), {"page": 1})
+    assert resp.data["count"] == 7
+
+
+@pytest.mark.django_db
+def test_unknown_pagination_mode_is_rejected(api_client, pages):
+    resp = api_client.get(reverse("page-list"), {"pagination": "offset"})
+    assert resp.status_code == 400
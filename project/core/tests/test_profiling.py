@@ -0,0 +1,108 @@
+import gzip
+import json
+import threading
+import time
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import AsyncClient
+from django.urls import reverse
+
+from core.profiling import StackSampler, write_profile
+
+
+@pytest.fixture
+def profiling(settings, tmp_path):
+    settings.PROFILING_ENABLED = True
+    settings.PROFILING_SAMPLE_RATE = 1.0
+    settings.PROFILING_INTERVAL = 0.001
+    settings.PROFILING_DIR = str(tmp_path)
+    settings.PROFILING_MAX_FILES = 2
+    return tmp_path
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+@pytest.mark.django_db
+def test_sampled_page_requests_are_written_and_rotated(
+    api_client, page_factory, profiling
+):
+    pages = [page_factory() for _ in range(3)]
+    for page in pages:
+        api_client.get(reverse("page-detail", kwargs={"pk": page.id}))
+    api_client.get(reverse("search"), {"q": "x"})  # not under the prefix
+
+    files = sorted(profiling.glob("profile-*.json.gz"))
+    # the newest PROFILING_MAX_FILES files only
+    assert len(files) == 2
+    profile = json.loads(gzip.decompress(files[-1].read_bytes()))
+    assert profile["request"] == f"GET /api/pages/{pages[-1].id}/"
+    assert profile["status"] == 200
+    assert profile["duration_ms"] > 0
+    assert isinstance(profile["stacks"], dict)
+
+
+@pytest.mark.django_db
+def test_unsampled_requests_are_not_profiled(
+    api_client, page_factory, profiling, settings
+):
+    settings.PROFILING_SAMPLE_RATE = 0.0
+    page = page_factory()
+
+    api_client.get(reverse("page-detail", kwargs={"pk": page.id}))
+
+    assert not list(profiling.iterdir())
+
+
+@pytest.mark.django_db
+def test_sampled_requests_are_profiled_under_asgi(page_factory, profiling):
+    page = page_factory()
+    client = AsyncClient()
+
+    resp = async_to_sync(client.get)(reverse("page-detail", kwargs={"pk": page.id}))
+    assert resp.status_code == 200
+    async_to_sync(client.get)(reverse("search"), {"q": "x"})
+
+    (path,) = profiling.glob("profile-*.json.gz")
+    profile = json.loads(gzip.decompress(path.read_bytes()))
+    assert profile["request"] == f"GET /api/pages/{page.id}/"
+    assert profile["status"] == 200
+
+
+def test_sampler_records_the_stack_of_the_thread():
+    with StackSampler(threading.get_ident(), 0.001) as sampler:
+        _busy(0.05)
+
+    busy = [stack for stack in sampler.stacks if stack.endswith("(_busy)")]
+    assert busy
+    # outermost first: this test, then the busy loop
+    caller = busy[0].split(";")[-2]
+    assert caller.endswith("(test_sampler_records_the_stack_of_the_thread)")
+
+
+def test_profile_report_merges_profiles(tmp_path, capsys):
+    for _ in range(2):
+        profile = {"duration_ms": 5.0, "stacks": {"a;b": 3, "a;c": 1}}
+        write_profile(tmp_path, profile, max_files=10)
+    (tmp_path / "profile-0-0.json.gz").write_bytes(b"torn")
+    collapsed = tmp_path / "out.collapsed"
+
+    call_command("profile_report", f"--dir={tmp_path}", f"--collapsed={collapsed}")
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "2 profiled requests, 10 ms, 8 samples"
+    # ranked by self samples
+    assert [line.split()[-1] for line in lines[2:5]] == ["b", "c", "a"]
+    assert lines[2].split()[:4] == ["75.0%", "75.0%", "6", "6"]
+    assert lines[4].split()[:4] == ["0.0%", "100.0%", "0", "8"]
+    assert collapsed.read_text() == "a;b 6\na;c 2\n"
+
+    with pytest.raises(CommandError):
+        call_command("profile_report", f"--dir={tmp_path / 'empty'}")
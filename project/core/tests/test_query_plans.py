@@ -0,0 +1,73 @@
+"""EXPLAIN-based regression tests for the PageContent hot paths.
+
+Run on SQLite by default; `TEST_DB_ENGINE=postgres pytest` runs them on PostgreSQL.
+"""
+
+import pytest
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+
+from core.models import Audio, Page, PageContent, Video
+
+PAGES = 400
+ITEMS_PER_PAGE = 50
+OBJECTS = 2_000
+
+
+@pytest.fixture
+def dataset(db):
+    """~20k PageContent rows spread over many pages and objects, then ANALYZE."""
+    Page.objects.bulk_create(Page(title=f"P{n}") for n in range(PAGES))
+    page_ids = list(Page.objects.values_list("id", flat=True))
+    ct_ids = [
+        ContentType.objects.get_for_model(Video).id,
+        ContentType.objects.get_for_model(Audio).id,
+    ]
+    PageContent.objects.bulk_create(
+        (
+            PageContent(
+                page_id=page_id,
+                content_type_id=ct_ids[n % 2],
+                object_id=(page_id * ITEMS_PER_PAGE + n) % OBJECTS,
+                position=n,
+            )
+            for page_id in page_ids
+            for n in range(ITEMS_PER_PAGE)
+        ),
+        batch_size=5_000,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return page_ids[PAGES // 2], ct_ids[0]
+
+
+def _assert_uses_index(queryset, index_name):
+    plan = queryset.explain()
+    assert index_name in plan, plan
+    table = PageContent._meta.db_table
+    if connection.vendor == "postgresql":
+        assert f"Seq Scan on {table}" not in plan, plan
+    else:
+        rows = [row for row in plan.splitlines() if table in row]
+        assert rows and all("SEARCH" in row for row in rows), plan
+    return plan
+
+
+def test_page_detail_uses_page_position_index(dataset):
+    page_id, _ = dataset
+    plan = _assert_uses_index(
+        PageContent.objects.filter(page_id=page_id), "pagecontent_page_pos_idx"
+    )
+    # the (page, position, id) index also delivers the ORDER BY
+    assert "TEMP B-TREE" not in plan and "Sort" not in plan, plan
+
+
+def test_reverse_lookup_uses_content_index(dataset):
+    _, ct_id = dataset
+    _assert_uses_index(
+        PageContent.objects.filter(content_type_id=ct_id, object_id=42).values_list(
+            "page_id", flat=True
+        ),
+        "pagecontent_ct_obj_idx",
+    )
@@ -0,0 +1,140 @@
+import pytest
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Audio, Page, Video
+from core.search import search
+
+
+def _hits(query, limit=20):
+    return [(item["type"], item["title"]) for item in search(query, 0, limit)]
+
+
+@pytest.mark.django_db
+def test_search_ranks_titles_and_transcripts(api_client, video_factory, audio_factory):
+    video_factory(title="Celery deep dive")
+    audio_factory(title="Weekly talk", transcript="We discuss celery and redis.")
+    audio_factory(title="Celery in production", transcript="Workers and queues.")
+    video_factory(title="Unrelated")
+
+    resp = api_client.get(reverse("search"), {"q": "CELERY"})
+
+    assert resp.status_code == 200
+    data = resp.json()
+    assert (data["next"], data["previous"]) == (None, None)
+    results = data["results"]
+    assert set(results[0]) == {"id", "type", "title", "counter", "rank"}
+    # title matches before the transcript-only match
+    assert [item["title"] for item in results][-1] == "Weekly talk"
+    assert {item["title"] for item in results[:2]} == {
+        "Celery deep dive",
+        "Celery in production",
+    }
+    assert results[0]["rank"] >= results[1]["rank"] >= results[2]["rank"]
+    # all words must match, in any language
+    assert _hits("celery redis") == [("audio", "Weekly talk")]
+    audio_factory(title="Лекция", transcript="Очереди задач в Celery")
+    assert _hits("очереди") == [("audio", "Лекция")]
+
+
+@pytest.mark.django_db
+def test_index_follows_writes(video_factory, audio_factory):
+    video = video_factory(title="Old title")
+    audio = audio_factory(transcript="first words")
+    Video.objects.bulk_create([Video(title="Bulk import", video_url="https://x")])
+
+    video.title = "New title"
+    video.save()
+    Audio.objects.filter(id=audio.id).update(transcript="second words")
+
+    assert _hits("old") == []
+    assert _hits("new") == [("video", "New title")]
+    assert _hits("first") == []
+    assert _hits("second") == [("audio", "Audio")]
+    assert _hits("bulk") == [("video", "Bulk import")]
+
+    video.delete()
+    assert _hits("new") == []
+    # rebuilding keeps the same results
+    call_command("rebuild_search_index")
+    assert _hits("second") == [("audio", "Audio")]
+
+
+@pytest.mark.django_db
+def test_search_paginates_without_count(api_client, video_factory):
+    for n in range(5):
+        video_factory(title=f"Lesson {n}")
+    url = reverse("search")
+
+    with CaptureQueriesContext(connection) as ctx:
+        first = api_client.get(url, {"q": "lesson", "page_size": 2}).json()
+    # ranked hits, then the video fields
+    assert len(ctx) == 2
+    assert len(first["results"]) == 2 and first["previous"] is None
+
+    second = api_client.get(first["next"]).json()
+    third = api_client.get(second["next"]).json()
+    assert len(third["results"]) == 1 and third["next"] is None
+    assert "page=" not in api_client.get(second["previous"]).request["QUERY_STRING"]
+    titles = [
+        item["title"] for data in (first, second, third) for item in data["results"]
+    ]
+    assert sorted(titles) == [f"Lesson {n}" for n in range(5)]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "params",
+    [
+        {},
+        {"q": " "},
+        {"q": "x" * 201},
+        {"q": "a", "page": 0},
+        {"q": "a", "page_size": 101},
+    ],
+)
+def test_search_validates_params(api_client, params):
+    assert api_client.get(reverse("search"), params).status_code == 400
+
+
+@pytest.mark.django_db
+def test_search_ignores_query_syntax(video_factory):
+    video_factory(title='Say "hello" OR NOT')
+    assert _hits('"hello" OR -(') == [("video", 'Say "hello" OR NOT')]
+    assert _hits("!!!") == []
+
+
+@pytest.mark.django_db
+def test_title_prefix_lookup_uses_lower_index(page_factory):
+    for title in ("Alpha", "alphabet", "ALPS", "Beta", "al_pha"):
+        page_factory(title=title)
+
+    matches = Page.objects.filter(title__iprefix="ALP").order_by("title")
+    assert [page.title for page in matches] == ["ALPS", "Alpha", "alphabet"]
+    assert Page.objects.filter(title__iprefix="al_").get().title == "al_pha"
+    assert "page_title_lower_idx" in matches.explain()
+
+
+@pytest.mark.django_db
+def test_admin_search_uses_prefix_lookup(admin_client, video_factory):
+    video_factory(title="Django tips")
+    video_factory(title="Tips for django")
+
+    resp = admin_client.get(reverse("admin:core_video_changelist"), {"q": "djan"})
+
+    assert [video.title for video in resp.context["cl"].result_list] == ["Django tips"]
+
+
+@pytest.mark.django_db
+def test_bench_search_command_runs(capsys, video_factory, audio_factory):
+    video_factory(title="Video #4242")
+    audio_factory(transcript="Transcript focusing on pagination.")
+
+    call_command("bench_search", "--repeat=2", "--query=pagination")
+
+    out = capsys.readouterr().out
+    assert "2 videos and audios" in out
+    assert "fulltext" in out and "prefix" in out
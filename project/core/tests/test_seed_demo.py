@@ -0,0 +1,45 @@
+import pytest
+
+from django.core.management import call_command
+
+from core.models import Audio, Page, PageContent, Video
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("distribution", ["uniform", "zipf"])
+def test_stream_mode_seeds_consistent_dataset(distribution):
+    call_command(
+        "seed_demo",
+        "--stream",
+        "--pages=50",
+        "--videos=20",
+        "--audios=10",
+        "--min-items=1",
+        "--max-items=8",
+        "--chunk-size=7",
+        f"--distribution={distribution}",
+        "--seed=1",
+    )
+
+    assert Page.objects.count() == 50
+    assert Video.objects.count() == 20
+    assert Audio.objects.count() == 10
+
+    video_ids = set(Video.objects.values_list("id", flat=True))
+    audio_ids = set(Audio.objects.values_list("id", flat=True))
+    for pc in PageContent.objects.select_related("content_type"):
+        pool = video_ids if pc.content_type.model == "video" else audio_ids
+        assert pc.object_id in pool
+    sizes = [p.contents.count() for p in Page.objects.all()]
+    assert min(sizes) >= 1 and max(sizes) <= 8
+
+    # explicit ids do not collide with regular inserts afterwards
+    last_id = Page.objects.latest("id").id
+    assert Page.objects.create(title="After").id > last_id
+
+
+@pytest.mark.django_db
+def test_flush_truncates_previous_data(page_factory):
+    page_factory()
+    call_command("seed_demo", "--flush", "--pages=2", "--seed=1")
+    assert Page.objects.count() == 2
@@ -0,0 +1,144 @@
+import pytest
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import PageContent, PageSnapshot
+
+
+def _attach(page, obj, position):
+    return PageContent.objects.create(
+        page=page,
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=obj.id,
+        position=position,
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache(settings):
+    settings.PAGE_DETAIL_CACHE_ENABLED = False
+
+
+@pytest.mark.django_db
+def test_snapshot_has_no_counters_and_follows_writes(
+    page_factory, video_factory, audio_factory, django_capture_on_commit_callbacks
+):
+    with django_capture_on_commit_callbacks(execute=True):
+        page = page_factory(title="Page")
+        video = video_factory(title="V", counter=7)
+        _attach(page, video, 1)
+        _attach(page, audio_factory(title="A"), 2)
+
+    snapshot = PageSnapshot.objects.get(page=page)
+    assert [i["title"] for i in snapshot.items] == ["V", "A"]
+    assert all("counter" not in i for i in snapshot.items)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        video.title = "Renamed"
+        video.save()
+    snapshot.refresh_from_db()
+    assert snapshot.items[0]["title"] == "Renamed"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        video.delete()
+    snapshot.refresh_from_db()
+    assert [i["title"] for i in snapshot.items] == ["A"]
+
+
+@pytest.mark.django_db
+def test_detail_served_from_snapshot(
+    api_client,
+    page_factory,
+    video_factory,
+    audio_factory,
+    settings,
+    django_capture_on_commit_callbacks,
+):
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    with django_capture_on_commit_callbacks(execute=True):
+        page = page_factory(title="Page")
+        _attach(page, video_factory(title="V", counter=3), 1)
+        _attach(page, audio_factory(title="A", counter=4), 2)
+
+    settings.PAGE_SNAPSHOT_ENABLED = False
+    live = api_client.get(reverse("page-detail", kwargs={"pk": page.id})).json()
+
+    settings.PAGE_SNAPSHOT_ENABLED = True
+    with CaptureQueriesContext(connection) as ctx:
+        resp = api_client.get(reverse("page-detail", kwargs={"pk": page.id}))
+    snap = resp.json()
+
+    # same payload (counters moved on by the first request), read from the snapshot
+    assert [i["counter"] for i in snap["items"]] == [4, 5]
+    for item in live["items"]:
+        item["counter"] += 1
+    assert snap == live
+    reads = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("SELECT")]
+    assert any('"core_pagesnapshot"' in q for q in reads)
+    # `core_page` is only read for the ETag/Last-Modified validators
+    assert not any('"core_page"."title"' in q for q in reads)
+
+
+@pytest.mark.django_db
+def test_snapshot_is_rebuilt_once_per_transaction(
+    page_factory, video_factory, django_capture_on_commit_callbacks
+):
+    page = page_factory()
+    videos = [video_factory(title=f"V{n}") for n in range(5)]
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        with transaction.atomic():  # e.g. an admin page with inline contents
+            for position, video in enumerate(videos, start=1):
+                _attach(page, video, position)
+        assert not PageSnapshot.objects.filter(page=page).exists()
+
+    with CaptureQueriesContext(connection) as ctx:
+        for callback in callbacks:
+            callback()
+    writes = [q["sql"] for q in ctx.captured_queries if "core_pagesnapshot" in q["sql"]]
+    assert len(writes) == 1
+    snapshot = PageSnapshot.objects.get(page=page)
+    assert [i["title"] for i in snapshot.items] == [f"V{n}" for n in range(5)]
+
+
+@pytest.mark.django_db
+def test_missing_snapshot_is_served_but_not_saved(
+    api_client, page_factory, video_factory, settings
+):
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    page = page_factory()
+    _attach(page, video_factory(title="V"), 1)
+    PageSnapshot.objects.all().delete()
+
+    resp = api_client.get(reverse("page-detail", kwargs={"pk": page.id}))
+
+    assert [i["title"] for i in resp.json()["items"]] == ["V"]
+    assert not PageSnapshot.objects.exists()
+
+
+@pytest.mark.django_db
+def test_page_delete_removes_snapshot(page_factory, video_factory):
+    page = page_factory()
+    _attach(page, video_factory(), 1)
+    page.delete()
+    assert not PageSnapshot.objects.exists()
+
+
+@pytest.mark.django_db
+def test_rebuild_snapshots_command(page_factory, video_factory):
+    pages = [page_factory(title=f"P{n}") for n in range(5)]
+    for page in pages:
+        _attach(page, video_factory(), 1)
+    PageSnapshot.objects.all().delete()
+
+    call_command("rebuild_snapshots", "--chunk-size=2")
+    assert PageSnapshot.objects.count() == 5
+    assert all(len(s.items) == 1 for s in PageSnapshot.objects.all())
+
+    with pytest.raises(CommandError):
+        call_command("rebuild_snapshots", "--chunk-size=0")
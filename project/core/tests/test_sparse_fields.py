@@ -0,0 +1,105 @@
+import pytest
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import PageContent, PageSnapshot
+
+
+def _attach(page, obj, position):
+    PageContent.objects.create(
+        page=page,
+        content_type=ContentType.objects.get_for_model(obj),
+        object_id=obj.id,
+        position=position,
+    )
+
+
+@pytest.fixture
+def page(page_factory, video_factory, audio_factory):
+    page = page_factory(title="Page")
+    _attach(page, video_factory(title="V", counter=1), 1)
+    _attach(page, audio_factory(title="A", counter=2, transcript="x" * 1000), 2)
+    return page
+
+
+def _get(api_client, page, **params):
+    with CaptureQueriesContext(connection) as ctx:
+        resp = api_client.get(reverse("page-detail", kwargs={"pk": page.id}), params)
+    assert resp.status_code == 200
+    return resp.json()["items"], [q["sql"] for q in ctx.captured_queries]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("use_snapshots", [False, True])
+@pytest.mark.parametrize(
+    "params",
+    [{"exclude": "transcript"}, {"fields": "title,counter"}],
+)
+def test_transcript_is_not_read_unless_requested(
+    api_client, page, settings, use_snapshots, params
+):
+    settings.PAGE_SNAPSHOT_ENABLED = use_snapshots
+    items, queries = _get(api_client, page, **params)
+
+    assert "transcript" not in items[1]
+    assert not any("transcript" in sql for sql in queries)
+    # snapshots do not carry large columns either
+    assert all(
+        "transcript" not in item
+        for snapshot in PageSnapshot.objects.all()
+        for item in snapshot.items
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("use_snapshots", [False, True])
+def test_fields_select_item_fields(api_client, page, settings, use_snapshots):
+    settings.PAGE_SNAPSHOT_ENABLED = use_snapshots
+
+    items, _ = _get(api_client, page, fields="title")
+    assert items == [
+        {"id": items[0]["id"], "type": "video", "title": "V"},
+        {"id": items[1]["id"], "type": "audio", "title": "A"},
+    ]
+
+    items, _ = _get(api_client, page, fields="transcript")
+    assert list(items[1]) == ["id", "type", "transcript"]
+    assert items[1]["transcript"] == "x" * 1000
+
+    # the default payload is unchanged and keeps the field order
+    items, _ = _get(api_client, page)
+    assert list(items[1]) == ["id", "type", "title", "counter", "transcript"]
+    assert items[1]["transcript"] == "x" * 1000
+
+
+@pytest.mark.django_db
+def test_fieldsets_are_cached_separately(api_client, page):
+    full, _ = _get(api_client, page)
+    sparse, _ = _get(api_client, page, exclude="transcript,counter")
+    again, _ = _get(api_client, page)
+
+    assert "counter" not in sparse[0] and "transcript" not in sparse[1]
+    assert again[1]["transcript"] == full[1]["transcript"]
+
+
+@pytest.mark.django_db
+def test_batch_honours_fields(api_client, page):
+    with CaptureQueriesContext(connection) as ctx:
+        resp = api_client.get(
+            reverse("page-batch"), {"ids": str(page.id), "exclude": "transcript"}
+        )
+    assert resp.status_code == 200
+    assert "transcript" not in resp.json()[0]["items"][1]
+    assert not any("transcript" in q["sql"] for q in ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_unknown_field_is_rejected(api_client, page):
+    resp = api_client.get(
+        reverse("page-detail", kwargs={"pk": page.id}), {"fields": "title,nope"}
+    )
+    assert resp.status_code == 400
+    assert "fields" in resp.json()
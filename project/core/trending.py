@@ -0,0 +1,200 @@
+"""Trending videos and audios: an exponentially decayed view score per object.
+
+A view at time `t` is worth `2 ** -((T - t) / TRENDING_HALF_LIFE)` views at
+time `T`. Relative to a fixed epoch `E` and with `tau = half-life / ln 2`:
+
+    score(T) = exp(L - (T - E) / tau),  L = ln(sum(views_i * exp((t_i - E) / tau)))
+
+`L` does not depend on `T`, so a view only ever adds to it
+(`L = logaddexp(L, ln(views) + (t - E) / tau)`, one UPDATE per batch in
+`add_views`) and `ORDER BY L DESC` is the current ranking of both content types
+at once: the top N is an index scan of N rows. Keeping the logarithm avoids
+overflow; it grows by ln 2 per half-life.
+
+Scores are fed by `core.analytics.rollup_views` from the per-minute view rows
+it folds, not by every counter write, so trending needs `ANALYTICS_ENABLED`
+and lags by up to a rollup interval plus one minute.
+
+`rebuild_trending` recomputes every score from the analytics buckets.
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.expressions import Combinable
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+from django.utils import timezone
+
+from .constants import ANALYTICS_HOUR
+from .counters import VIEWS_ANNOTATION, with_shard_totals
+from .fastpath import item_rows
+from .loaders import ITEM_TYPE_MODELS
+from .models import TrendingScore, ViewBucket, ViewRollup
+
+Pair = Tuple[int, int]
+
+TRENDING_EPOCH: datetime = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+# Fields of the listed items
+TRENDING_ITEM_FIELDS: frozenset[str] = frozenset({"id", "type", "title", "counter"})
+# Log of (practically) no views: the starting point of a new row
+EMPTY_SCORE: float = -1e300
+# exp() below this underflows on PostgreSQL (an error, not 0)
+_MIN_EXPONENT: float = -700.0
+REBUILD_BATCH: int = 5000
+
+
+def _tau() -> float:
+    return settings.TRENDING_HALF_LIFE / math.log(2)
+
+
+def log_weight(views: int, at: datetime) -> float:
+    """`L` contribution of `views` at time `at`."""
+    return math.log(views) + (at - TRENDING_EPOCH).total_seconds() / _tau()
+
+
+def _log_add(x: float) -> Combinable:
+    """SQL `logaddexp(score, x)`, computed without overflow or underflow."""
+    score = F("score")
+    value = Value(x, output_field=FloatField())
+    exponent = Greatest(-Abs(score - value), Value(_MIN_EXPONENT))
+    return Greatest(score, value) + Ln(Value(1.0) + Exp(exponent))
+
+
+def item_ct_ids() -> Dict[int, str]:
+    return {
+        ContentType.objects.get_for_model(model).id: item_type
+        for item_type, model in ITEM_TYPE_MODELS.items()
+    }
+
+
+def add_views(deltas: Dict[Pair, int], at: Optional[datetime] = None) -> None:
+    """Add views to the scores of videos and audios; other pairs are ignored.
+
+    One UPDATE per (content type, delta); rows of objects seen for the first
+    time are created first, as in `core.counters.add_to_shards`.
+    """
+    items = item_ct_ids()
+    at = at or timezone.now()
+    by_ct_delta: Dict[Tuple[int, int], List[int]] = {}
+    for (ct_id, obj_id), delta in deltas.items():
+        if ct_id in items and delta > 0:
+            by_ct_delta.setdefault((ct_id, delta), []).append(obj_id)
+
+    with transaction.atomic():
+        for (ct_id, delta), ids in by_ct_delta.items():
+            x = log_weight(delta, at)
+            rows = TrendingScore.objects.filter(content_type_id=ct_id)
+            updated = rows.filter(object_id__in=ids).update(score=_log_add(x))
+            if updated == len(ids):
+                continue
+            existing = set(
+                rows.filter(object_id__in=ids).values_list("object_id", flat=True)
+            )
+            missing = [obj_id for obj_id in ids if obj_id not in existing]
+            # A concurrent writer may create the same rows: keep theirs, add ours
+            TrendingScore.objects.bulk_create(
+                [
+                    TrendingScore(
+                        content_type_id=ct_id, object_id=obj_id, score=EMPTY_SCORE
+                    )
+                    for obj_id in missing
+                ],
+                ignore_conflicts=True,
+            )
+            rows.filter(object_id__in=missing).update(score=_log_add(x))
+
+
+def top(limit: int) -> List[Dict[str, Any]]:
+    """The `limit` highest-scored videos and audios with their current score.
+
+    One index scan of `limit` rows plus one query per content type.
+    """
+    rows = list(
+        TrendingScore.objects.order_by("-score").values_list(
+            "content_type_id", "object_id", "score"
+        )[:limit]
+    )
+    items = item_rows(
+        ((ct_id, obj_id) for ct_id, obj_id, _ in rows), TRENDING_ITEM_FIELDS
+    )
+    offset = (timezone.now() - TRENDING_EPOCH).total_seconds() / _tau()
+    return [
+        {**items[(ct_id, obj_id)], "score": round(math.exp(score - offset), 3)}
+        for ct_id, obj_id, score in rows
+        if (ct_id, obj_id) in items
+    ]
+
+
+def _logaddexp(a: float, b: float) -> float:
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def _history(items: Dict[int, str]) -> Iterable[Tuple[int, int, datetime, int]]:
+    """Recorded views `(ct_id, obj_id, time, views)`: hourly rollups and raw rows.
+
+    Views of a rolled up hour are placed at its middle, but not in the future.
+    """
+    half_hour = timedelta(minutes=30)
+    now = timezone.now()
+    for ct_id, obj_id, start, count in (
+        ViewRollup.objects.filter(
+            granularity=ANALYTICS_HOUR, content_type_id__in=list(items)
+        )
+        .values_list("content_type_id", "object_id", "bucket_start", "count")
+        .iterator(chunk_size=REBUILD_BATCH)
+    ):
+        yield ct_id, obj_id, min(start + half_hour, now), count
+    yield from (
+        ViewBucket.objects.filter(content_type_id__in=list(items))
+        .values_list("content_type_id", "object_id", "bucket_start", "count")
+        .iterator(chunk_size=REBUILD_BATCH)
+    )
+
+
+def rebuild_trending(from_counters: bool = False) -> int:
+    """Recompute all scores from scratch; return how many objects are ranked.
+
+    Scores come from the analytics history (hourly rollups, then raw buckets).
+    With `from_counters` each object's lifetime `counter` (plus its counter
+    shards) is taken as views made now instead, for deployments without
+    analytics. Views written while
+    the rebuild runs may be lost or counted twice.
+    """
+    items = item_ct_ids()
+    scores: Dict[Pair, float] = {}
+    if from_counters:
+        now = timezone.now()
+        for ct_id, item_type in items.items():
+            for obj_id, counter in (
+                with_shard_totals(ITEM_TYPE_MODELS[item_type].objects.all())
+                .filter(**{f"{VIEWS_ANNOTATION}__gt": 0})
+                .values_list("id", VIEWS_ANNOTATION)
+                .iterator(chunk_size=REBUILD_BATCH)
+            ):
+                scores[(ct_id, obj_id)] = log_weight(counter, now)
+    else:
+        for ct_id, obj_id, at, count in _history(items):
+            if count <= 0:
+                continue
+            x = log_weight(count, at)
+            pair = (ct_id, obj_id)
+            scores[pair] = _logaddexp(scores[pair], x) if pair in scores else x
+
+    with transaction.atomic():
+        TrendingScore.objects.all().delete()
+        TrendingScore.objects.bulk_create(
+            (
+                TrendingScore(content_type_id=ct_id, object_id=obj_id, score=score)
+                for (ct_id, obj_id), score in scores.items()
+            ),
+            batch_size=REBUILD_BATCH,
+        )
+    return len(scores)
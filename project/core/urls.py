@@ -2,9 +2,20 @@ from django.urls import include, path
 
 from rest_framework.routers import DefaultRouter
 
-from .views import PageViewSet
+from . import async_views
+from .views import PageViewSet, SearchView, TrendingView, ViewSeriesView
 
 router = DefaultRouter()
 router.register(r"pages", PageViewSet, basename="page")
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("", include(router.urls)),
+    path("trending/", TrendingView.as_view(), name="trending"),
+    path("search/", SearchView.as_view(), name="search"),
+    path(
+        "analytics/<str:kind>/<int:pk>/", ViewSeriesView.as_view(), name="view-series"
+    ),
+    # Native async variants for ASGI deployments
+    path("async/pages/", async_views.page_list, name="async-page-list"),
+    path("async/pages/<int:pk>/", async_views.page_detail, name="async-page-detail"),
+]
@@ -1,14 +1,66 @@
 from __future__ import annotations
 
-from typing import Type
+from typing import Any, Dict, FrozenSet, List, Optional, Type
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.http import Http404, StreamingHttpResponse
+from django.urls import reverse
 
 from rest_framework import mixins, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.views import APIView
 
-from .constants import ALLOWED_CONTENT_MODELS, APP_LABEL_CORE
-from .models import Page, PageContent
-from .serializers import PageDetailSerializer, PageListSerializer
+from .analytics import TRACKED_KINDS, max_points, view_series, with_page_view
+from .cache import get_cached_pairs, get_page_detail
+from .conditional import (
+    detail_validators,
+    list_validators,
+    not_modified,
+    set_validators,
+)
+from .constants import (
+    ANALYTICS_DEFAULT_POINTS,
+    ANALYTICS_GRANULARITIES,
+    ANALYTICS_GRANULARITY_PARAM,
+    ANALYTICS_HOUR,
+    ANALYTICS_POINTS_PARAM,
+    BATCH_IDS_PARAM,
+    BATCH_MAX_IDS,
+    EXPORT_CHUNK_SIZE,
+    MAX_PAGE_SIZE,
+    SEARCH_DEFAULT_PAGE_SIZE,
+    SEARCH_MAX_QUERY_LENGTH,
+    SEARCH_QUERY_PARAM,
+    TRENDING_DEFAULT_LIMIT,
+    TRENDING_LIMIT_PARAM,
+    TRENDING_MAX_LIMIT,
+)
+from .export import export_pages
+from .fastpath import page_list_rows, render_page_detail
+from .loaders import (
+    PageDetail,
+    attach_shard_totals,
+    counted_pairs,
+    load_content_map,
+    page_pairs,
+)
+from .models import Page
+from .pagination import DefaultPagination, get_pagination_class
+from .renderers import NDJSONRenderer
+from .search import search
+from .serializers import (
+    PageDetailSerializer,
+    PageListSerializer,
+    parse_item_fields,
+)
+from .snapshots import get_snapshot_detail
 from .tasks import increment_counters_async
+from .trending import top
 
 
 class PageViewSet(
@@ -16,28 +68,310 @@ class PageViewSet(
 ):
     """API viewset for listing and retrieving pages.
     On detail view, increments counters of attached content via Celery task.
+    List and detail answer conditional GETs (see `core.conditional`).
+    Detail payloads are served from a versioned cache (see `core.cache`) backed
+    by materialized page snapshots (see `core.snapshots`).
     """
 
-    queryset = Page.objects.all().prefetch_related("contents__content_type")
+    queryset = Page.objects.all().prefetch_related("contents")
     serializer_class = PageListSerializer
 
+    @property
+    def paginator(self):
+        """Per-request paginator (page number or cursor), see `core.pagination`."""
+        if not hasattr(self, "_paginator"):
+            self._paginator = get_pagination_class(self.request)()
+        return self._paginator
+
     def get_serializer_class(self) -> Type[PageListSerializer | PageDetailSerializer]:
-        return PageDetailSerializer if self.action == "retrieve" else PageListSerializer
+        if self.action in ("retrieve", "batch"):
+            return PageDetailSerializer
+        return PageListSerializer
+
+    @property
+    def item_fields(self) -> Optional[FrozenSet[str]]:
+        """Page item fields from `?fields=`/`?exclude=` (None: all of them)."""
+        if not hasattr(self, "_item_fields"):
+            self._item_fields = parse_item_fields(self.request.query_params)
+        return self._item_fields
+
+    def get_serializer_context(self) -> Dict[str, Any]:
+        context = super().get_serializer_context()
+        if self.action in ("retrieve", "batch"):
+            context["item_fields"] = self.item_fields
+        return context
+
+    def list(self, request, *args, **kwargs) -> Response:
+        validators = list_validators(request)
+        response = not_modified(request, validators)
+        if response is None:
+            if settings.PAGES_FAST_SERIALIZATION:
+                response = self._fast_list(request)
+            else:
+                response = super().list(request, *args, **kwargs)
+        return set_validators(response, validators)
+
+    def _fast_list(self, request) -> Response:
+        """`list` built from `.values()` rows (see `core.fastpath`)."""
+        queryset = self.filter_queryset(Page.objects.values("id", "title"))
+        page = self.paginate_queryset(queryset)
+        list_url = request.build_absolute_uri(reverse("page-list"))
+        if page is None:
+            return Response(page_list_rows(queryset, list_url))
+        return self.get_paginated_response(page_list_rows(page, list_url))
+
+    def build_detail(self, page_id: int) -> PageDetail:
+        """Render the detail payload from the page snapshot or the live tables.
+
+        The counted pairs come from the same rows as the payload.
+        """
+        if settings.PAGE_SNAPSHOT_ENABLED:
+            detail = get_snapshot_detail(page_id, self.item_fields)
+            if detail is None:
+                raise Http404
+            return detail
+        if settings.PAGES_FAST_SERIALIZATION:
+            detail = render_page_detail(page_id, self.item_fields)
+            if detail is None:
+                raise Http404
+            return detail
+        page = self.get_object()
+        # `contents` is prefetched by the queryset and reused by the serializer
+        pairs = counted_pairs(
+            (pc.content_type_id, pc.object_id) for pc in page.contents.all()
+        )
+        return self.get_serializer(page).data, pairs
 
     def retrieve(self, request, *args, **kwargs) -> Response:
-        page: Page = self.get_object()
-        data = self.get_serializer(page).data
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        try:
+            page_id = int(lookup)
+        except (TypeError, ValueError):
+            raise Http404
 
-        # Produce only (content_type_id, object_id) pairs for core models in support
-        content_pairs = list(
-            PageContent.objects.filter(
-                page=page,
-                content_type__app_label=APP_LABEL_CORE,
-                content_type__model__in=ALLOWED_CONTENT_MODELS,
-            ).values_list("content_type_id", "object_id")
+        validators = detail_validators(page_id, self.item_fields)
+        if validators is None:
+            raise Http404
+
+        response = not_modified(request, validators)
+        if response is None:
+            data, content_pairs = get_page_detail(
+                page_id, lambda: self.build_detail(page_id), self.item_fields
+            )
+            response = Response(data)
+        else:
+            # A 304 still counts as a view; only the pairs are read, not the body
+            content_pairs = get_cached_pairs(page_id, self.item_fields)
+            if content_pairs is None:
+                content_pairs = page_pairs(page_id)
+
+        content_pairs = with_page_view(content_pairs, page_id)
+        if content_pairs:
+            increment_counters_async(content_pairs)
+
+        return set_validators(response, validators)
+
+    def _batch_ids(self) -> List[int]:
+        raw = self.request.query_params.get(BATCH_IDS_PARAM, "")
+        try:
+            ids = [int(part) for part in raw.split(",") if part.strip()]
+        except ValueError:
+            raise ValidationError({BATCH_IDS_PARAM: "Expected comma-separated ids."})
+        if not ids:
+            raise ValidationError({BATCH_IDS_PARAM: "At least one id is required."})
+        # Keep the requested order, drop repeats
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > BATCH_MAX_IDS:
+            raise ValidationError(
+                {BATCH_IDS_PARAM: f"At most {BATCH_MAX_IDS} ids per request."}
+            )
+        return ids
+
+    @action(detail=False, methods=["get"])
+    def batch(self, request, *args, **kwargs) -> Response:
+        """`GET /api/pages/batch/?ids=1,2,3`: details of many pages at once.
+
+        Pages come back in the order of `ids`, unknown ids are skipped. The
+        PageContent rows of all pages are read in one query and each content
+        type once, however many pages share an object; counters of all pages
+        are sent in a single `increment_counters_async` call.
+        """
+        page_ids = self._batch_ids()
+        by_id = {
+            page.id: page
+            for page in Page.objects.filter(id__in=page_ids).prefetch_related(
+                "contents"
+            )
+        }
+        pages = [by_id[page_id] for page_id in page_ids if page_id in by_id]
+
+        contents = [pc for page in pages for pc in page.contents.all()]
+        content_map = load_content_map(contents, self.item_fields)
+        if settings.COUNTER_SHARDS:
+            attach_shard_totals(content_map)
+        serializer = self.get_serializer(
+            pages,
+            many=True,
+            context={**self.get_serializer_context(), "content_map": content_map},
         )
 
+        # Once per object and page, as in `retrieve`
+        content_pairs = [
+            pair
+            for page in pages
+            for pair in with_page_view(
+                counted_pairs(
+                    (pc.content_type_id, pc.object_id) for pc in page.contents.all()
+                ),
+                page.id,
+            )
+        ]
         if content_pairs:
             increment_counters_async(content_pairs)
 
-        return Response(data)
+        return Response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        renderer_classes=[NDJSONRenderer, *api_settings.DEFAULT_RENDERER_CLASSES],
+    )
+    def export(self, request, *args, **kwargs) -> StreamingHttpResponse:
+        """`GET /api/pages/export/`: every page with its items as NDJSON.
+
+        One line per page in id order, shaped like the detail payload and
+        honouring `?fields=`/`?exclude=`. The body is streamed with flat memory
+        (see `core.export`); exports are not counted as views.
+        """
+        # Validate the fieldset before the response starts streaming
+        fields = self.item_fields
+        response = StreamingHttpResponse(
+            export_pages(EXPORT_CHUNK_SIZE, fields),
+            content_type=NDJSONRenderer.media_type,
+        )
+        response["Content-Disposition"] = 'attachment; filename="pages.ndjson"'
+        return response
+
+
+class ViewSeriesView(APIView):
+    """`GET /api/analytics/<kind>/<id>/`: views of a video, audio or page over time.
+
+    `kind` is `videos`, `audios` or `pages`; `?granularity=hour|day` (default
+    hour) and `?points=N` (default a day of hours / a month of days, at most
+    what the retention keeps). Served from the rollups only (see
+    `core.analytics`): one existence check and one index range scan of at most
+    `points` rows.
+    """
+
+    def get(self, request, kind: str, pk: int) -> Response:
+        model = TRACKED_KINDS.get(kind)
+        if model is None or not model.objects.filter(pk=pk).exists():
+            raise Http404
+
+        granularity = request.query_params.get(
+            ANALYTICS_GRANULARITY_PARAM, ANALYTICS_HOUR
+        )
+        if granularity not in ANALYTICS_GRANULARITIES:
+            raise ValidationError(
+                {
+                    ANALYTICS_GRANULARITY_PARAM: "Expected one of "
+                    f"{', '.join(ANALYTICS_GRANULARITIES)}."
+                }
+            )
+        limit = max_points(granularity)
+        raw = request.query_params.get(ANALYTICS_POINTS_PARAM)
+        try:
+            points = int(raw) if raw else ANALYTICS_DEFAULT_POINTS[granularity]
+        except ValueError:
+            points = 0
+        if not 1 <= points <= limit:
+            raise ValidationError(
+                {ANALYTICS_POINTS_PARAM: f"Expected an integer from 1 to {limit}."}
+            )
+
+        ct_id = ContentType.objects.get_for_model(model).id
+        series = view_series(ct_id, pk, granularity, points)
+        return Response(
+            {
+                "type": model._meta.model_name,
+                "id": pk,
+                "granularity": granularity,
+                "total": sum(point["views"] for point in series),
+                "series": series,
+            }
+        )
+
+
+def _positive_int(request, param: str, default: int, maximum: int) -> int:
+    raw = request.query_params.get(param)
+    try:
+        value = int(raw) if raw else default
+    except ValueError:
+        value = 0
+    if not 1 <= value <= maximum:
+        raise ValidationError({param: f"Expected an integer from 1 to {maximum}."})
+    return value
+
+
+class TrendingView(APIView):
+    """`GET /api/trending/?limit=10`: most viewed videos and audios right now.
+
+    Ranked by an exponentially decayed view score (see `core.trending`); each
+    item has the fields `id`, `type`, `title`, `counter` and its `score`, the
+    decayed number of views. Constant cost: an index scan of `limit` rows plus
+    one query per content type.
+    """
+
+    def get(self, request) -> Response:
+        limit = _positive_int(
+            request, TRENDING_LIMIT_PARAM, TRENDING_DEFAULT_LIMIT, TRENDING_MAX_LIMIT
+        )
+        return Response(top(limit))
+
+
+class SearchView(APIView):
+    """`GET /api/search/?q=...`: full-text search of videos and audios.
+
+    Matches video titles and audio titles and transcripts (see `core.search`),
+    best first; each item has `id`, `type`, `title`, `counter` and its `rank`.
+    Paginated by `?page=N&page_size=M` with `next`/`previous` links and no
+    total count, which would cost a second pass over all matches.
+    """
+
+    def get(self, request) -> Response:
+        query = request.query_params.get(SEARCH_QUERY_PARAM, "").strip()
+        if not query or len(query) > SEARCH_MAX_QUERY_LENGTH:
+            raise ValidationError(
+                {
+                    SEARCH_QUERY_PARAM: "Expected a non-empty query of at most "
+                    f"{SEARCH_MAX_QUERY_LENGTH} characters."
+                }
+            )
+        page_param = DefaultPagination.page_query_param
+        size_param = DefaultPagination.page_size_query_param
+        page_size = _positive_int(
+            request, size_param, SEARCH_DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+        )
+        page = _positive_int(request, page_param, 1, 10**6)
+
+        # One extra row tells whether there is a next page
+        results = search(query, offset=(page - 1) * page_size, limit=page_size + 1)
+        url = request.build_absolute_uri()
+        previous = None
+        if page > 1:
+            previous = (
+                replace_query_param(url, page_param, page - 1)
+                if page > 2
+                else remove_query_param(url, page_param)
+            )
+        return Response(
+            {
+                "next": (
+                    replace_query_param(url, page_param, page + 1)
+                    if len(results) > page_size
+                    else None
+                ),
+                "previous": previous,
+                "results": results[:page_size],
+            }
+        )
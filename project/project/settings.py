@@ -15,7 +15,12 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
-from core.constants import DEFAULT_PAGE_SIZE
+from core.constants import (
+    COUNTER_MODE_BUFFERED,
+    COUNTER_MODE_IMMEDIATE,
+    DEFAULT_PAGE_SIZE,
+    PAGINATION_PAGE,
+)
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -48,6 +53,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so request latency covers the whole stack (see core.metrics)
+    "core.metrics.MetricsMiddleware",
+    # Opt-in sampling profiler of /api/pages/ (see core.profiling)
+    "core.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -150,7 +159,122 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": DEFAULT_PAGE_SIZE,
 }
 
+# Opt-in fast paths: pages list/detail payloads built from `.values()` rows
+# (core.fastpath) and an orjson JSON renderer producing the same bytes
+PAGES_FAST_SERIALIZATION = os.getenv("PAGES_FAST_SERIALIZATION", "False") == "True"
+API_ORJSON_RENDERER = os.getenv("API_ORJSON_RENDERER", "False") == "True"
+REST_FRAMEWORK["DEFAULT_RENDERER_CLASSES"] = [
+    (
+        "core.renderers.ORJSONRenderer"
+        if API_ORJSON_RENDERER
+        else "rest_framework.renderers.JSONRenderer"
+    ),
+    "rest_framework.renderers.BrowsableAPIRenderer",
+]
+
+# Default paginator of /api/pages/: "page" (count/next/previous) or "cursor" (keyset)
+PAGES_PAGINATION = os.getenv("PAGES_PAGINATION", PAGINATION_PAGE)
+# Admin changelists: estimated row counts from planner statistics instead of an exact
+# COUNT(*); below `ADMIN_EXACT_COUNT_LIMIT` estimated rows the exact count is used
+ADMIN_PERFORMANCE_MODE = os.getenv("ADMIN_PERFORMANCE_MODE", "True") == "True"
+ADMIN_EXACT_COUNT_LIMIT = int(os.getenv("ADMIN_EXACT_COUNT_LIMIT", "10000"))
+
 # Celery
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "memory://")
 CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", None)
 CELERY_TASK_ALWAYS_EAGER = os.getenv("CELERY_TASK_ALWAYS_EAGER", "False") == "True"
+
+# View counters: "immediate" (one task per view), "coalesced" (one task per process
+# per `COUNTER_COALESCE_WINDOW` seconds or `COUNTER_COALESCE_MAX_PAIRS` objects) or
+# "buffered" (write-behind buffer flushed by `flush_counter_buffer_task`, run it
+# with `celery -A project beat`)
+COUNTER_MODE = os.getenv("COUNTER_MODE", COUNTER_MODE_IMMEDIATE)
+COUNTER_COALESCE_WINDOW = float(os.getenv("COUNTER_COALESCE_WINDOW", "1"))
+COUNTER_COALESCE_MAX_PAIRS = int(os.getenv("COUNTER_COALESCE_MAX_PAIRS", "1000"))
+COUNTER_BUFFER_CACHE = "counters"
+# Local spool for increments the broker refused (see `core.spool`), replayed every
+# `COUNTER_SPOOL_DRAIN_INTERVAL` seconds or with `manage.py replay_counter_spool`
+COUNTER_SPOOL_DIR = os.getenv(
+    "COUNTER_SPOOL_DIR", str(BASE_DIR / "var" / "counter-spool")
+)
+COUNTER_SPOOL_DRAIN_INTERVAL = float(os.getenv("COUNTER_SPOOL_DRAIN_INTERVAL", "5"))
+COUNTER_FLUSH_INTERVAL = float(os.getenv("COUNTER_FLUSH_INTERVAL", "5"))
+# Spread increments over N `CounterShard` rows per object to avoid hot-row lock
+# contention (0 = update `counter` directly); read totals are cached briefly
+COUNTER_SHARDS = int(os.getenv("COUNTER_SHARDS", "0"))
+COUNTER_TOTAL_CACHE_TIMEOUT = int(os.getenv("COUNTER_TOTAL_CACHE_TIMEOUT", "5"))
+# Seconds between folds of the shards back into `counter` by celery beat
+COUNTER_COMPACT_INTERVAL = float(os.getenv("COUNTER_COMPACT_INTERVAL", "300"))
+# View analytics (see `core.analytics`): raw per-minute rows are folded into
+# hourly/daily rollups every `ANALYTICS_ROLLUP_INTERVAL` seconds by celery beat.
+# Off by default: it adds a row per viewed object to every counter write
+ANALYTICS_ENABLED = os.getenv("ANALYTICS_ENABLED", "False") == "True"
+ANALYTICS_ROLLUP_INTERVAL = float(os.getenv("ANALYTICS_ROLLUP_INTERVAL", "60"))
+ANALYTICS_HOURLY_RETENTION_DAYS = int(
+    os.getenv("ANALYTICS_HOURLY_RETENTION_DAYS", "14")
+)
+ANALYTICS_DAILY_RETENTION_DAYS = int(os.getenv("ANALYTICS_DAILY_RETENTION_DAYS", "730"))
+# Trending ranking (see `core.trending`): views lose half their weight every
+# `TRENDING_HALF_LIFE` seconds. Fed by the analytics rollup, so it needs
+# ANALYTICS_ENABLED; off by default
+TRENDING_ENABLED = os.getenv("TRENDING_ENABLED", "False") == "True"
+TRENDING_HALF_LIFE = float(os.getenv("TRENDING_HALF_LIFE", str(6 * 3600)))
+CELERY_BEAT_SCHEDULE = {}
+if COUNTER_MODE == COUNTER_MODE_BUFFERED:
+    CELERY_BEAT_SCHEDULE["flush-counter-buffer"] = {
+        "task": "core.tasks.flush_counter_buffer_task",
+        "schedule": COUNTER_FLUSH_INTERVAL,
+    }
+if COUNTER_SHARDS:
+    CELERY_BEAT_SCHEDULE["compact-counter-shards"] = {
+        "task": "core.tasks.compact_counter_shards_task",
+        "schedule": COUNTER_COMPACT_INTERVAL,
+    }
+if ANALYTICS_ENABLED:
+    CELERY_BEAT_SCHEDULE["rollup-views"] = {
+        "task": "core.tasks.rollup_views_task",
+        "schedule": ANALYTICS_ROLLUP_INTERVAL,
+    }
+
+# Cache (use a shared backend, e.g. django.core.cache.backends.redis.RedisCache,
+# when running several processes: page-detail invalidation relies on it)
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    },
+    # Buffered view counters: must be shared between processes and must not evict
+    # keys (no LRU culling, no TTL); buffered mode refuses to start on LocMem
+    "counters": {
+        "BACKEND": os.getenv(
+            "COUNTER_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("COUNTER_CACHE_LOCATION", "counters"),
+    },
+}
+
+# Per-route latency, SQL and stage metrics served at /metrics (see core.metrics).
+# Every process writes its totals to `METRICS_DIR` (empty it on restart) and
+# /metrics sums them; with `METRICS_TOKEN` set it requires a bearer token
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "False") == "True"
+METRICS_DIR = os.getenv("METRICS_DIR", str(BASE_DIR / "var" / "metrics"))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+# Sampling profiler: stack samples of a `PROFILING_SAMPLE_RATE` fraction of requests
+# under `PROFILING_PATH_PREFIX`, written to a directory keeping the newest
+# `PROFILING_MAX_FILES` files (report: `manage.py profile_report`)
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False") == "True"
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0.01"))
+PROFILING_INTERVAL = float(os.getenv("PROFILING_INTERVAL", "0.005"))
+PROFILING_PATH_PREFIX = os.getenv("PROFILING_PATH_PREFIX", "/api/pages/")
+PROFILING_DIR = os.getenv("PROFILING_DIR", str(BASE_DIR / "var" / "profiles"))
+PROFILING_MAX_FILES = int(os.getenv("PROFILING_MAX_FILES", "500"))
+
+# Page-detail response cache
+PAGE_DETAIL_CACHE_ENABLED = os.getenv("PAGE_DETAIL_CACHE_ENABLED", "True") == "True"
+PAGE_DETAIL_CACHE_TIMEOUT = int(os.getenv("PAGE_DETAIL_CACHE_TIMEOUT", "300"))
+
+# Serve page detail from materialized PageSnapshot rows (backfill: rebuild_snapshots)
+PAGE_SNAPSHOT_ENABLED = os.getenv("PAGE_SNAPSHOT_ENABLED", "True") == "True"
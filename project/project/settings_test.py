@@ -1,7 +1,6 @@
 # project/project/settings_test.py
 from .settings import *  # base settings
 
-
 # --- DB: use SQLite for tests only ---
 DATABASES = {
     "default": {
@@ -10,6 +9,19 @@ DATABASES = {
     }
 }
 
+# Opt-in PostgreSQL run (e.g. query-plan tests): TEST_DB_ENGINE=postgres pytest
+if os.getenv("TEST_DB_ENGINE") == "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.getenv("DB_NAME", "app"),
+            "USER": os.getenv("DB_USER", "postgres"),
+            "PASSWORD": os.getenv("DB_PASSWORD", ""),
+            "HOST": os.getenv("DB_HOST", "localhost"),
+            "PORT": os.getenv("DB_PORT", "5432"),
+        }
+    }
+
 # --- Celery: run tasks in-process during tests ---
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_BROKER_URL = "memory://"
@@ -18,3 +30,20 @@ CELERY_RESULT_BACKEND = None
 # Optional: make tests a bit faster
 PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+
+# --- Cache: per-process locmem for tests ---
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "counters": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "counters",
+    },
+}
+COUNTER_MODE = "immediate"
+COUNTER_SHARDS = 0
+PAGES_FAST_SERIALIZATION = False
+# Enabled per test in test_analytics.py and test_trending.py
+ANALYTICS_ENABLED = False
+TRENDING_ENABLED = False
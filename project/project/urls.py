@@ -18,6 +18,8 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from core.metrics import metrics_view
+
 # OpenAPI / Swagger / ReDoc (drf-spectacular)
 from drf_spectacular.views import (
     SpectacularAPIView,
@@ -28,6 +30,9 @@ from drf_spectacular.views import (
 urlpatterns = [
     # Admin
     path("admin/", admin.site.urls),
+    # Prometheus metrics of every worker on this host (sums the files in
+    # METRICS_DIR); needs a bearer token when METRICS_TOKEN is set
+    path("metrics", metrics_view, name="metrics"),
     # API (app routes)
     path("api/", include("core.urls")),
     # OpenAPI schema (JSON)